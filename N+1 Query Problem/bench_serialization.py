@@ -0,0 +1,83 @@
+"""
+Microbenchmark: serialising /users-with-posts results.
+
+- pydantic: build Post / UserWithPosts models, then what FastAPI does with
+  response_model (validate again, jsonable_encoder, json.dumps)
+- trusted (json / orjson): encode the dict rows directly (fast_json.py)
+
+Rows are posts; there are 5 posts per user on average. Run from this folder:
+
+    python bench_serialization.py
+    python bench_serialization.py --rows 1000 10000
+"""
+
+import argparse
+import asyncio
+import time
+from collections import defaultdict
+from typing import List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+import fast_json
+from datagen import generate
+from solve import Post, UserWithPosts
+
+RESPONSE_FIELD = create_response_field(name="Response_users_with_posts", type_=List[UserWithPosts])
+
+
+def group(users, posts):
+    posts_by_user = defaultdict(list)
+    for post in posts:
+        posts_by_user[post["user_id"]].append(post)
+    return [(user, posts_by_user.get(user["id"], [])) for user in users]
+
+
+def pydantic_path(grouped):
+    result = [
+        UserWithPosts(id=user["id"], name=user["name"], posts=[Post(**post) for post in user_posts])
+        for user, user_posts in grouped
+    ]
+    content = asyncio.run(serialize_response(field=RESPONSE_FIELD, response_content=result, is_coroutine=True))
+    return JSONResponse(content).body
+
+
+def trusted_path(grouped):
+    result = [{"id": user["id"], "name": user["name"], "posts": user_posts} for user, user_posts in grouped]
+    return fast_json.dumps(result)
+
+
+def trusted_json_path(grouped):
+    orjson, fast_json.orjson = fast_json.orjson, None
+    try:
+        return trusted_path(grouped)
+    finally:
+        fast_json.orjson = orjson
+
+
+def timed(fn, grouped):
+    start = time.perf_counter()
+    body = fn(grouped)
+    return (time.perf_counter() - start) * 1000, len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    paths = [("pydantic", pydantic_path), ("trusted json", trusted_json_path)]
+    if fast_json.orjson is not None:
+        paths.append(("trusted orjson", trusted_path))
+
+    print(f"{'rows':>9} {'body MB':>8} " + " ".join(f"{label + ' ms':>18}" for label, _ in paths))
+    for rows in args.rows:
+        grouped = group(*generate(max(1, rows // 5), rows))
+        timings = [timed(fn, grouped) for _, fn in paths]
+        print(f"{rows:>9,} {timings[0][1] / 1e6:>8.1f} " + " ".join(f"{ms:>18.1f}" for ms, _ in timings))
+
+
+if __name__ == "__main__":
+    main()
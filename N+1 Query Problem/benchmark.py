@@ -0,0 +1,89 @@
+"""
+Load benchmark for the N+1 endpoints.
+
+Drives problem.py and solve.py in-process (Starlette TestClient, no
+sockets) over the same generated data set and reports, per endpoint:
+latency p50/p95/p99, throughput and queries per request (from the
+X-Query-Count header). Run from this folder:
+
+    python benchmark.py
+    python benchmark.py --users 2000 --posts 10000 --skew 1.0 --delay-ms 1 --requests 50 --clients 8
+"""
+
+import argparse
+import contextlib
+import io
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi.testclient import TestClient
+
+import problem
+import solve
+from datagen import generate
+
+ENDPOINTS = [
+    ("N+1 (serial)", problem.app, "/users-with-posts"),
+    ("N+1 (concurrent)", problem.app, "/users-with-posts/concurrent?max_concurrency=50"),
+    ("batched", solve.app, "/users-with-posts"),
+]
+
+
+def percentile(sorted_samples, pct):
+    index = min(len(sorted_samples) - 1, max(0, round(pct / 100 * len(sorted_samples)) - 1))
+    return sorted_samples[index]
+
+
+def run(client, path, requests, clients):
+    def one(_):
+        start = time.perf_counter()
+        response = client.get(path)
+        response.raise_for_status()
+        return (time.perf_counter() - start) * 1000, int(response.headers["X-Query-Count"])
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        results = list(pool.map(one, range(requests)))
+    wall = time.perf_counter() - start
+
+    latencies = sorted(ms for ms, _ in results)
+    return {
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "rps": requests / wall,
+        "queries": statistics.mean(q for _, q in results),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--posts", type=int, default=2500)
+    parser.add_argument("--skew", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--delay-ms", type=float, default=1.0, help="simulated latency of one query")
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--clients", type=int, default=4, help="concurrent client threads")
+    args = parser.parse_args()
+
+    users, posts = generate(args.users, args.posts, skew=args.skew, seed=args.seed)
+    for module in (problem, solve):
+        module.users_db[:] = users
+        module.posts_db[:] = posts
+        module.QUERY_DELAY_SECONDS = args.delay_ms / 1000
+
+    print(f"{args.users:,} users, {args.posts:,} posts (skew {args.skew}), "
+          f"query delay {args.delay_ms} ms, {args.requests} requests x {args.clients} clients\n")
+    print(f"{'endpoint':<18} {'queries/req':>11} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'req/s':>9}")
+    for label, app, path in ENDPOINTS:
+        # the endpoints log every query to stdout
+        with TestClient(app) as client, contextlib.redirect_stdout(io.StringIO()):
+            stats = run(client, path, args.requests, args.clients)
+        print(f"{label:<18} {stats['queries']:>11.0f} {stats['p50']:>10.1f} {stats['p95']:>10.1f} "
+              f"{stats['p99']:>10.1f} {stats['rps']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
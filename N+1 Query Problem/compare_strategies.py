@@ -0,0 +1,75 @@
+"""
+Compare the three ways of loading users with their posts as users grow:
+
+- serial N+1      (problem.py: 1 + N blocking queries, one after another)
+- batched         (solve.py: 2 queries, grouped in memory)
+- concurrent N+1  (problem.py: 1 + N async queries, bounded fan-out)
+
+Every strategy goes through the same fake DB layer, so the per-query
+delay is the only cost being modelled. Run from this folder:
+
+    python compare_strategies.py
+    python compare_strategies.py --delay-ms 1 --concurrency 50 --users 5 100 1000 10000
+"""
+
+import argparse
+import asyncio
+import time
+
+import problem
+import solve
+from datagen import generate
+
+
+def load_data(users, posts):
+    # both apps read the module-level lists at query time
+    for module in (problem, solve):
+        module.users_db[:] = users
+        module.posts_db[:] = posts
+
+
+def serial_n_plus_1():
+    users = problem.get_all_users()
+    for user in users:
+        problem.get_posts_by_user_id(user["id"])
+    return 1 + len(users)
+
+
+def concurrent_n_plus_1(max_concurrency):
+    _, query_count = asyncio.run(problem.fetch_users_with_posts_concurrent(max_concurrency))
+    return query_count
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    query_count = fn(*args)
+    return query_count, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, nargs="+", default=[5, 50, 500, 5000, 10000])
+    parser.add_argument("--delay-ms", type=float, default=1.0, help="simulated latency of one query")
+    parser.add_argument("--posts-per-user", type=int, default=2)
+    parser.add_argument("--skew", type=float, default=0.0, help="post distribution skew (see datagen.py)")
+    parser.add_argument("--concurrency", type=int, default=50, help="max queries in flight (concurrent strategy)")
+    args = parser.parse_args()
+
+    problem.QUERY_DELAY_SECONDS = solve.QUERY_DELAY_SECONDS = args.delay_ms / 1000
+
+    print(f"query delay {args.delay_ms} ms, concurrency {args.concurrency}\n")
+    print(f"{'users':>7} | {'serial N+1':>21} | {'batched':>19} | {'concurrent N+1':>21}")
+    print(f"{'':>7} | {'queries':>8} {'ms':>12} | {'queries':>8} {'ms':>10} | {'queries':>8} {'ms':>12}")
+    for num_users in args.users:
+        load_data(*generate(num_users, num_users * args.posts_per_user, skew=args.skew))
+        serial = timed(serial_n_plus_1)
+        batch = timed(solve.load_batched)
+        concurrent = timed(concurrent_n_plus_1, args.concurrency)
+        print(
+            f"{num_users:>7} | {serial[0]:>8} {serial[1]:>12.1f} | {batch[0]:>8} {batch[1]:>10.1f}"
+            f" | {concurrent[0]:>8} {concurrent[1]:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Seeded synthetic data for the N+1 demo.
+
+    users, posts = generate(num_users=1000, num_posts=5000, skew=1.0)
+
+Posts are spread over users with a Zipf-like weight 1 / rank**skew:
+skew=0 gives every user about the same number of posts, skew=1 gives a
+few prolific authors and a long tail of users with one or no post.
+
+problem.py and solve.py swap their fixed 5-user lists for generated data
+when N1_USERS is set:
+
+    N1_USERS=1000 N1_POSTS=5000 N1_SKEW=1.0 N1_SEED=42 uvicorn solve:app
+"""
+
+import os
+import random
+from itertools import accumulate
+from typing import Dict, List, Tuple
+
+WORDS = (
+    "query index cache join batch latency network server client database "
+    "async loop pool row table lazy eager load fetch model schema"
+).split()
+
+
+def generate(num_users: int, num_posts: int, skew: float = 0.0, seed: int = 42) -> Tuple[List[Dict], List[Dict]]:
+    """Return (users, posts) in the same row shape as the fixed demo data."""
+    rnd = random.Random(seed)
+    users = [{"id": i, "name": f"User {i}"} for i in range(1, num_users + 1)]
+    if not users:
+        return users, []
+
+    # shuffled so the prolific authors are not simply the lowest ids
+    ranked_ids = [u["id"] for u in users]
+    rnd.shuffle(ranked_ids)
+    cum_weights = list(accumulate(1 / rank ** skew for rank in range(1, num_users + 1)))
+    owners = rnd.choices(ranked_ids, cum_weights=cum_weights, k=num_posts)
+
+    posts = [
+        {
+            "id": post_id,
+            "user_id": user_id,
+            "title": f"Post {post_id}: " + " ".join(rnd.choices(WORDS, k=3)),
+            "content": " ".join(rnd.choices(WORDS, k=12)),
+        }
+        for post_id, user_id in enumerate(owners, start=1)
+    ]
+    return users, posts
+
+
+def generate_from_env() -> Tuple[List[Dict], List[Dict]]:
+    """generate() with N1_USERS / N1_POSTS / N1_SKEW / N1_SEED."""
+    num_users = int(os.environ["N1_USERS"])
+    return generate(
+        num_users,
+        int(os.environ.get("N1_POSTS", num_users * 2)),
+        skew=float(os.environ.get("N1_SKEW", "0")),
+        seed=int(os.environ.get("N1_SEED", "42")),
+    )
@@ -0,0 +1,34 @@
+"""
+JSON responses for trusted rows.
+
+The fake DB already returns rows in the exact shape of the response
+models, so re-validating them (building Post / UserWithPosts, then
+FastAPI checking the result against response_model again) is pure
+overhead. Endpoints keep `response_model=` for the OpenAPI schema and
+return a TrustedJSONResponse, which FastAPI sends as-is.
+
+orjson is used when installed, the standard json module otherwise.
+"""
+
+import json
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class TrustedJSONResponse(JSONResponse):
+    """JSONResponse without validation, encoded with the fastest available encoder."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -8,11 +8,15 @@ This file demonstrates the N+1 query problem where:
 This results in poor performance due to multiple database calls.
 """
 
-from fastapi import FastAPI
-from typing import List, Dict
+from fastapi import FastAPI, Query
+from typing import List, Dict, Tuple
 from pydantic import BaseModel
+import asyncio
+import os
 import time
 
+from fast_json import TrustedJSONResponse
+
 app = FastAPI(title="N+1 Query Problem Demo")
 
 # Fake database using arrays
@@ -35,6 +39,11 @@ posts_db = [
     {"id": 8, "user_id": 5, "title": "Eve's article", "content": "Technical article"},
 ]
 
+# Larger synthetic data set on demand, e.g. N1_USERS=1000 N1_POSTS=5000 (see datagen.py)
+if os.environ.get("N1_USERS"):
+    from datagen import generate_from_env
+    users_db, posts_db = generate_from_env()
+
 # Response models
 class Post(BaseModel):
     id: int
@@ -48,8 +57,10 @@ class UserWithPosts(BaseModel):
     posts: List[Post]
 
 # Simulate database query delay (in real DB, this would be network/IO time)
+QUERY_DELAY_SECONDS = float(os.environ.get("QUERY_DELAY_MS", "2000")) / 1000
+
 def simulate_query_delay():
-    time.sleep(2)  # 10ms delay per query
+    time.sleep(QUERY_DELAY_SECONDS)
 
 def get_all_users() -> List[Dict]:
     """Simulates: SELECT * FROM users"""
@@ -61,6 +72,41 @@ def get_posts_by_user_id(user_id: int) -> List[Dict]:
     simulate_query_delay()
     return [post for post in posts_db if post["user_id"] == user_id]
 
+# Async variant of the fake DB layer: the delay awaits instead of blocking,
+# so independent queries can be in flight at the same time.
+async def simulate_query_delay_async():
+    await asyncio.sleep(QUERY_DELAY_SECONDS)
+
+async def get_all_users_async() -> List[Dict]:
+    """Simulates: SELECT * FROM users (async driver)"""
+    await simulate_query_delay_async()
+    return users_db.copy()
+
+async def get_posts_by_user_id_async(user_id: int) -> List[Dict]:
+    """Simulates: SELECT * FROM posts WHERE user_id = ? (async driver)"""
+    await simulate_query_delay_async()
+    return [post for post in posts_db if post["user_id"] == user_id]
+
+async def fetch_users_with_posts_concurrent(max_concurrency: int) -> Tuple[List[Dict], int]:
+    """
+    Still N+1 queries, but the N post queries run concurrently,
+    at most `max_concurrency` in flight (like a DB connection pool).
+    Returns (users with their posts, query count).
+    """
+    users = await get_all_users_async()
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def posts_for(user: Dict) -> List[Dict]:
+        async with semaphore:
+            return await get_posts_by_user_id_async(user["id"])
+
+    posts_per_user = await asyncio.gather(*(posts_for(user) for user in users))
+    result = [
+        {"id": user["id"], "name": user["name"], "posts": posts}
+        for user, posts in zip(users, posts_per_user)
+    ]
+    return result, 1 + len(users)
+
 @app.get("/users-with-posts", response_model=List[UserWithPosts])
 def get_users_with_posts_n_plus_1():
     """
@@ -70,6 +116,9 @@ def get_users_with_posts_n_plus_1():
     - 1 query to get all users (N users)
     - N queries to get posts for each user
     - Total: N+1 queries
+
+    Rows are sent as-is (TrustedJSONResponse): no Post / UserWithPosts
+    objects and no second validation pass against response_model.
     """
     start_time = time.time()
     query_count = 0
@@ -87,11 +136,7 @@ def get_users_with_posts_n_plus_1():
         query_count += 1
         print(f"Query {query_count}: SELECT * FROM posts WHERE user_id = {user['id']}")
         
-        result.append(UserWithPosts(
-            id=user["id"],
-            name=user["name"],
-            posts=[Post(**post) for post in user_posts]
-        ))
+        result.append({"id": user["id"], "name": user["name"], "posts": user_posts})
     
     end_time = time.time()
     elapsed_time = (end_time - start_time) * 1000  # Convert to milliseconds
@@ -103,7 +148,36 @@ def get_users_with_posts_n_plus_1():
     print(f"Average time per query: {elapsed_time/query_count:.2f}ms")
     print(f"{'='*60}\n")
     
-    return result
+    return TrustedJSONResponse(result, headers={
+        "X-Query-Count": str(query_count),
+        "X-Elapsed-Ms": f"{elapsed_time:.2f}",
+    })
+
+@app.get("/users-with-posts/concurrent", response_model=List[UserWithPosts])
+async def get_users_with_posts_concurrent(
+    max_concurrency: int = Query(10, ge=1, le=1000, description="Max post queries in flight"),
+):
+    """
+    Same N+1 queries, fanned out concurrently on the event loop.
+
+    - Query count is unchanged: 1 + N
+    - Wall-clock time drops to about (1 + ceil(N / max_concurrency)) query delays
+    - No threadpool worker is held while waiting for the fake DB
+    """
+    start_time = time.time()
+    result, query_count = await fetch_users_with_posts_concurrent(max_concurrency)
+    elapsed_time = (time.time() - start_time) * 1000
+
+    print(f"\n{'='*60}")
+    print(f"CONCURRENT N+1 RESULTS (max_concurrency={max_concurrency}):")
+    print(f"Total queries executed: {query_count}")
+    print(f"Total time: {elapsed_time:.2f}ms")
+    print(f"{'='*60}\n")
+
+    return TrustedJSONResponse(result, headers={
+        "X-Query-Count": str(query_count),
+        "X-Elapsed-Ms": f"{elapsed_time:.2f}",
+    })
 
 @app.get("/stats")
 def get_stats():
@@ -112,6 +186,7 @@ def get_stats():
         "total_users": len(users_db),
         "total_posts": len(posts_db),
         "expected_queries_n_plus_1": len(users_db) + 1,
+        "query_delay_ms": QUERY_DELAY_SECONDS * 1000,
         "note": "With N+1 problem, you'll execute N+1 queries where N is the number of users"
     }
 
@@ -119,5 +194,6 @@ if __name__ == "__main__":
     import uvicorn
     print("Starting N+1 Query Problem Demo Server...")
     print("Try: http://127.0.0.1:8001/users-with-posts")
+    print("Try: http://127.0.0.1:8001/users-with-posts/concurrent?max_concurrency=10")
     print("Try: http://127.0.0.1:8001/stats")
     uvicorn.run(app, host="127.0.0.1", port=8001)
@@ -8,11 +8,19 @@ This file demonstrates the solution to the N+1 query problem using:
 This results in much better performance!
 """
 
-from fastapi import FastAPI
-from typing import List, Dict
+from fastapi import FastAPI, Query
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import Callable, Iterator, List, Dict, Optional, Tuple
 from pydantic import BaseModel
+import os
+import statistics
+import threading
 import time
 from collections import defaultdict
+from itertools import groupby
+from operator import itemgetter
+
+from fast_json import TrustedJSONResponse, dumps
 
 app = FastAPI(title="N+1 Query Problem Solution")
 
@@ -36,6 +44,11 @@ posts_db = [
     {"id": 8, "user_id": 5, "title": "Eve's article", "content": "Technical article"},
 ]
 
+# Larger synthetic data set on demand, e.g. N1_USERS=1000 N1_POSTS=5000 (see datagen.py)
+if os.environ.get("N1_USERS"):
+    from datagen import generate_from_env
+    users_db, posts_db = generate_from_env()
+
 # Response models
 class Post(BaseModel):
     id: int
@@ -49,8 +62,10 @@ class UserWithPosts(BaseModel):
     posts: List[Post]
 
 # Simulate database query delay
+QUERY_DELAY_SECONDS = float(os.environ.get("QUERY_DELAY_MS", "2000")) / 1000
+
 def simulate_query_delay():
-    time.sleep(2)  # 100ms delay per query
+    time.sleep(QUERY_DELAY_SECONDS)
 
 def get_all_users() -> List[Dict]:
     """Simulates: SELECT * FROM users"""
@@ -62,6 +77,61 @@ def get_all_posts() -> List[Dict]:
     simulate_query_delay()
     return posts_db.copy()
 
+def get_all_users_ordered() -> List[Dict]:
+    """Simulates: SELECT * FROM users ORDER BY id"""
+    simulate_query_delay()
+    return sorted(users_db, key=itemgetter("id"))
+
+def get_all_posts_ordered_by_user() -> List[Dict]:
+    """Simulates: SELECT * FROM posts ORDER BY user_id, id"""
+    simulate_query_delay()
+    # posts_db is kept in id order and sorted() is stable
+    return sorted(posts_db, key=itemgetter("user_id"))
+
+def get_users_limited(limit: int) -> List[Dict]:
+    """Simulates: SELECT * FROM users LIMIT ? (only used by /comparison)"""
+    simulate_query_delay()
+    return users_db[:limit]
+
+def get_posts_by_user_id(user_id: int) -> List[Dict]:
+    """Simulates: SELECT * FROM posts WHERE user_id = ? (only used by /comparison)"""
+    simulate_query_delay()
+    return [post for post in posts_db if post["user_id"] == user_id]
+
+def get_posts_by_user_ids(user_ids: List[int]) -> List[Dict]:
+    """Simulates: SELECT * FROM posts WHERE user_id IN (...) (only used by /comparison)"""
+    simulate_query_delay()
+    wanted = set(user_ids)
+    return [post for post in posts_db if post["user_id"] in wanted]
+
+def load_n_plus_1(limit: Optional[int] = None) -> int:
+    """Load users (the first `limit`, or all) with their posts, one posts query per user. Returns the query count."""
+    users = get_all_users() if limit is None else get_users_limited(limit)
+    for user in users:
+        get_posts_by_user_id(user["id"])
+    return 1 + len(users)
+
+def load_batched(limit: Optional[int] = None) -> int:
+    """Load users (the first `limit`, or all) with their posts in 2 queries. Returns the query count."""
+    if limit is None:
+        get_all_users()
+        posts = get_all_posts()
+    else:
+        posts = get_posts_by_user_ids([user["id"] for user in get_users_limited(limit)])
+    posts_by_user = defaultdict(list)
+    for post in posts:
+        posts_by_user[post["user_id"]].append(post)
+    return 2
+
+def measure(load: Callable[..., int], runs: int, *args) -> Tuple[int, float]:
+    """(query count, median wall-clock ms) over `runs` calls of load(*args)."""
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        query_count = load(*args)
+        samples.append((time.perf_counter() - start) * 1000)
+    return query_count, statistics.median(samples)
+
 @app.get("/users-with-posts", response_model=List[UserWithPosts])
 def get_users_with_posts_optimized():
     """
@@ -72,6 +142,8 @@ def get_users_with_posts_optimized():
     - Query 2: Get ALL posts at once
     - Group posts by user_id in memory (no additional queries!)
     - Total: Only 2 queries instead of N+1
+    - Rows are sent as-is (TrustedJSONResponse): no Post / UserWithPosts
+      objects and no second validation pass against response_model
     """
     start_time = time.time()
     query_count = 0
@@ -97,11 +169,7 @@ def get_users_with_posts_optimized():
     result = []
     for user in users:
         user_posts = posts_by_user.get(user["id"], [])
-        result.append(UserWithPosts(
-            id=user["id"],
-            name=user["name"],
-            posts=[Post(**post) for post in user_posts]
-        ))
+        result.append({"id": user["id"], "name": user["name"], "posts": user_posts})
     
     end_time = time.time()
     elapsed_time = (end_time - start_time) * 1000  # Convert to milliseconds
@@ -113,42 +181,147 @@ def get_users_with_posts_optimized():
     print(f"Average time per query: {elapsed_time/query_count:.2f}ms")
     print(f"{'='*60}\n")
     
-    return result
+    return TrustedJSONResponse(result, headers={
+        "X-Query-Count": str(query_count),
+        "X-Elapsed-Ms": f"{elapsed_time:.2f}",
+    })
 
-@app.get("/comparison")
-def get_comparison():
-    """Compare N+1 problem vs solution"""
-    num_users = len(users_db)
-    
-    # Simulate timing for N+1 problem
-    n_plus_1_queries = num_users + 1
-    n_plus_1_time = n_plus_1_queries * 10  # 10ms per query
-    
-    # Simulate timing for optimized solution
-    optimized_queries = 2
-    optimized_time = optimized_queries * 10  # 10ms per query
-    
-    improvement = ((n_plus_1_time - optimized_time) / n_plus_1_time) * 100
+def merge_users_with_posts(users: List[Dict], posts: List[Dict]) -> Iterator[Dict]:
+    """
+    Merge join: users ordered by id, posts ordered by user_id.
+
+    Walks both lists once and yields one user with its posts at a time,
+    so only the current user's posts are ever grouped.
+    """
+    groups = groupby(posts, key=itemgetter("user_id"))
+    group = next(groups, None)
+    for user in users:
+        # skip posts whose user_id has no matching user
+        while group is not None and group[0] < user["id"]:
+            group = next(groups, None)
+        user_posts = []
+        if group is not None and group[0] == user["id"]:
+            user_posts = list(group[1])
+            group = next(groups, None)
+        yield {"id": user["id"], "name": user["name"], "posts": user_posts}
+
+@app.get("/users-with-posts/stream")
+def stream_users_with_posts():
+    """
+    Same 2 queries as /users-with-posts, streamed as NDJSON
+    (one UserWithPosts object per line).
+
+    Nothing is grouped or serialised ahead of time: each user is merged
+    with its posts and encoded only when the client is ready for it, so
+    memory does not grow with the size of the response.
+    """
+    users = get_all_users_ordered()
+    posts = get_all_posts_ordered_by_user()
+
+    def lines():
+        for row in merge_users_with_posts(users, posts):
+            yield dumps(row) + b"\n"
+
+    return StreamingResponse(
+        lines(),
+        media_type="application/x-ndjson",
+        headers={"X-Query-Count": "2"},
+    )
+
+# /comparison runs both strategies for real, so it measures a fixed sample
+# of users (each N+1 query costs QUERY_DELAY_MS), in a background thread,
+# and keeps the result: the data set does not change while the app runs
+COMPARISON_SAMPLE_USERS = int(os.environ.get("N1_COMPARISON_USERS", "5"))
+_comparisons: Dict[int, Dict] = {}  # runs -> result
+_measuring: Dict[int, threading.Thread] = {}  # runs -> thread measuring it
+_comparison_lock = threading.Lock()  # guards the two dicts, never held while measuring
+
+def _measure_comparison(runs: int) -> Dict:
+    sample = min(COMPARISON_SAMPLE_USERS, len(users_db))
+    sample_ids = {user["id"] for user in users_db[:sample]}
+    n_plus_1_queries, n_plus_1_time = measure(load_n_plus_1, runs, sample)
+    optimized_queries, optimized_time = measure(load_batched, runs, sample)
+
+    improvement = ((n_plus_1_time - optimized_time) / n_plus_1_time) * 100 if n_plus_1_time else 0.0
     
     return {
+        "data_set": {
+            "users": len(users_db),
+            "posts": len(posts_db),
+            "query_delay_ms": QUERY_DELAY_SECONDS * 1000,
+            "runs": runs,
+        },
+        "sample": {
+            "users": sample,
+            "posts": sum(1 for post in posts_db if post["user_id"] in sample_ids),
+            "description": f"both strategies load the first {sample} users and their posts",
+        },
         "n_plus_1_problem": {
             "queries": n_plus_1_queries,
-            "estimated_time_ms": n_plus_1_time,
+            "measured_time_ms": round(n_plus_1_time, 2),
             "description": "1 query for users + N queries for each user's posts"
         },
         "optimized_solution": {
             "queries": optimized_queries,
-            "estimated_time_ms": optimized_time,
-            "description": "1 query for users + 1 query for all posts (then group in memory)"
+            "measured_time_ms": round(optimized_time, 2),
+            "description": "1 query for users + 1 query for all their posts (then group in memory)"
         },
         "improvement": {
             "queries_saved": n_plus_1_queries - optimized_queries,
-            "time_saved_ms": n_plus_1_time - optimized_time,
+            "time_saved_ms": round(n_plus_1_time - optimized_time, 2),
             "performance_improvement_percent": f"{improvement:.1f}%"
         },
+        "full_data_set_queries": {
+            "n_plus_1_problem": len(users_db) + 1,
+            "optimized_solution": 2,
+        },
         "note": "As the number of users grows, the performance difference becomes more dramatic!"
     }
 
+def _run_comparison(runs: int) -> None:
+    try:
+        result = _measure_comparison(runs)
+    except Exception as e:  # reported, and the next request starts over
+        print(f"/comparison measurement failed: {e!r}")
+        result = None
+    with _comparison_lock:
+        del _measuring[runs]
+        if result is not None:
+            _comparisons[runs] = result
+
+def _start_comparison(runs: int) -> None:
+    with _comparison_lock:
+        if runs in _comparisons or runs in _measuring:
+            return
+        thread = _measuring[runs] = threading.Thread(
+            target=_run_comparison, args=(runs,), name=f"comparison-{runs}", daemon=True
+        )
+    thread.start()
+
+@app.get("/comparison")
+def get_comparison(runs: int = Query(1, ge=1, le=5, description="Timed runs per strategy (median is reported)")):
+    """
+    Compare N+1 problem vs solution, measured on a fixed sample of the
+    data set (the first N1_COMPARISON_USERS users, default 5).
+
+    Both strategies really run against the fake DB, about
+    (sample + 3) * QUERY_DELAY_MS per run, so the measurement runs in a
+    background thread: until it is done the answer is 202 with a
+    Retry-After estimate, afterwards the kept result. For the whole data
+    set, use benchmark.py / compare_strategies.py.
+    """
+    result = _comparisons.get(runs)
+    if result is not None:
+        return result
+    _start_comparison(runs)
+    sample = min(COMPARISON_SAMPLE_USERS, len(users_db))
+    estimate = (sample + 3) * QUERY_DELAY_SECONDS * runs
+    return JSONResponse(
+        {"status": "measuring", "runs": runs, "sample_users": sample, "estimated_seconds": round(estimate, 1)},
+        status_code=202,
+        headers={"Retry-After": str(max(1, round(estimate)))},
+    )
+
 @app.get("/stats")
 def get_stats():
     """Get database statistics"""
@@ -164,6 +337,7 @@ if __name__ == "__main__":
     import uvicorn
     print("Starting N+1 Query Problem SOLUTION Server...")
     print("Try: http://127.0.0.1:8002/users-with-posts")
+    print("Try: http://127.0.0.1:8002/users-with-posts/stream")
     print("Try: http://127.0.0.1:8002/comparison")
     print("Try: http://127.0.0.1:8002/stats")
     uvicorn.run(app, host="127.0.0.1", port=8002)
@@ -0,0 +1,28 @@
+from collections import Counter
+
+from datagen import generate
+
+
+def test_same_seed_same_data():
+    assert generate(50, 200, skew=1.0, seed=7) == generate(50, 200, skew=1.0, seed=7)
+    assert generate(50, 200, seed=7) != generate(50, 200, seed=8)
+
+
+def test_rows_have_the_demo_shape():
+    users, posts = generate(10, 40)
+    assert [u["id"] for u in users] == list(range(1, 11))
+    assert [p["id"] for p in posts] == list(range(1, 41))
+    assert {p["user_id"] for p in posts} <= {u["id"] for u in users}
+    assert set(posts[0]) == {"id", "user_id", "title", "content"}
+
+
+def test_skew_concentrates_posts_on_few_users():
+    def top_share(skew):
+        _, posts = generate(1000, 5000, skew=skew)
+        return Counter(p["user_id"] for p in posts).most_common(1)[0][1] / len(posts)
+
+    assert top_share(1.0) > 5 * top_share(0.0)
+
+
+def test_no_users_no_posts():
+    assert generate(0, 10) == ([], [])
@@ -0,0 +1,27 @@
+import json
+
+from fastapi.testclient import TestClient
+
+import fast_json
+import solve
+
+
+def test_dumps_matches_compact_json_with_and_without_orjson(monkeypatch):
+    rows = [{"id": 1, "name": "Zoë", "posts": [{"id": 2, "title": "x\"y", "score": 1.5}]}]
+    expected = json.dumps(rows, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    assert json.loads(fast_json.dumps(rows)) == rows
+    monkeypatch.setattr(fast_json, "orjson", None)
+    assert fast_json.dumps(rows) == expected
+
+
+def test_trusted_rows_match_the_response_model(monkeypatch):
+    monkeypatch.setattr(solve, "QUERY_DELAY_SECONDS", 0)
+    body = TestClient(solve.app).get("/users-with-posts").json()
+    assert body == [solve.UserWithPosts(**user).dict() for user in body]
+    assert sum(len(user["posts"]) for user in body) == len(solve.posts_db)
+
+
+def test_openapi_keeps_the_response_model():
+    schema = TestClient(solve.app).get("/openapi.json").json()
+    response = schema["paths"]["/users-with-posts"]["get"]["responses"]["200"]
+    assert response["content"]["application/json"]["schema"]["items"]["$ref"].endswith("UserWithPosts")
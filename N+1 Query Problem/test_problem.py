@@ -0,0 +1,36 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+import problem
+
+
+@pytest.fixture(autouse=True)
+def no_query_delay(monkeypatch):
+    monkeypatch.setattr(problem, "QUERY_DELAY_SECONDS", 0)
+
+
+def test_concurrent_endpoint_returns_the_sequential_result():
+    client = TestClient(problem.app)
+    sequential = client.get("/users-with-posts")
+    concurrent = client.get("/users-with-posts/concurrent", params={"max_concurrency": 2})
+    assert concurrent.json() == sequential.json()
+    assert concurrent.headers["X-Query-Count"] == str(1 + len(problem.users_db))
+
+
+def test_post_queries_stay_within_max_concurrency(monkeypatch):
+    in_flight, peak = 0, 0
+
+    async def tracked_delay():
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+
+    monkeypatch.setattr(problem, "simulate_query_delay_async", tracked_delay)
+    result, query_count = asyncio.run(problem.fetch_users_with_posts_concurrent(2))
+    assert peak == 2
+    assert query_count == 1 + len(result)
+    assert [u["id"] for u in result] == [u["id"] for u in problem.users_db]
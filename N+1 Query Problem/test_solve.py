@@ -0,0 +1,48 @@
+import json
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import solve
+
+
+@pytest.fixture(autouse=True)
+def no_query_delay(monkeypatch):
+    monkeypatch.setattr(solve, "QUERY_DELAY_SECONDS", 0)
+
+
+@pytest.fixture
+def client():
+    return TestClient(solve.app)
+
+
+def test_comparison_answers_202_until_measured(client, monkeypatch):
+    monkeypatch.setattr(solve, "_comparisons", {})
+    first = client.get("/comparison", params={"runs": 2})
+    assert first.status_code == 202
+    assert int(first.headers["Retry-After"]) >= 1
+    deadline = time.monotonic() + 10
+    while (r := client.get("/comparison", params={"runs": 2})).status_code == 202:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    result = r.json()
+    sample = result["sample"]["users"]
+    assert result["n_plus_1_problem"]["queries"] == sample + 1
+    assert result["optimized_solution"]["queries"] == 2
+    assert result["data_set"]["runs"] == 2
+
+
+def test_stream_sends_the_same_users_as_ndjson(client):
+    r = client.get("/users-with-posts/stream")
+    assert r.headers["content-type"] == "application/x-ndjson"
+    assert r.text.endswith("\n")
+    assert [json.loads(line) for line in r.text.splitlines()] == client.get("/users-with-posts").json()
+
+
+def test_merge_join_handles_users_without_posts_and_orphan_posts():
+    users = [{"id": 1, "name": "A"}, {"id": 3, "name": "C"}, {"id": 5, "name": "E"}]
+    posts = [{"id": 10, "user_id": 0}, {"id": 11, "user_id": 1}, {"id": 12, "user_id": 1},
+             {"id": 13, "user_id": 2}, {"id": 14, "user_id": 5}, {"id": 15, "user_id": 6}]
+    merged = list(solve.merge_users_with_posts(users, posts))
+    assert [(u["id"], [p["id"] for p in u["posts"]]) for u in merged] == [(1, [11, 12]), (3, []), (5, [14])]
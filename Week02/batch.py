@@ -0,0 +1,109 @@
+"""
+Request / response format of POST /api/books/batch (v3, v4).
+
+    POST /api/books/batch
+    {
+      "atomic": false,
+      "operations": [
+        {"op": "create", "data": {"title": "A", "author": "B"}},
+        {"op": "update", "id": 1, "data": {"title": "New title"}},
+        {"op": "delete", "id": 2}
+      ]
+    }
+
+Answer: one result per operation, in order, each with its own status
+(201 / 200 / 204 on success, 400 / 404 / 412 on failure). Overall status:
+200 when everything applied, 207 when some items failed, 409 when an
+atomic batch was rolled back (the failed items carry their error, the
+others 424 Failed Dependency), 400 / 413 for an unusable request (an
+atomic batch with an invalid item is rejected before it runs).
+
+The whole batch is one store write: the collection version (and with it
+ETags and the response cache) changes once, not once per item.
+"""
+
+from typing import Dict, List, Optional, Tuple, Union
+
+from Week02.store import VersionConflict
+
+MAX_OPERATIONS = 1000
+
+Parsed = Union[Tuple, str]  # store operation tuple, or the error message
+
+
+def parse_batch(payload, fields: Tuple[str, ...]) -> Tuple[Optional[bool], List[Parsed], Optional[Tuple[Dict, int]]]:
+    """
+    (atomic, items, error): items hold a store operation tuple
+    (op, id, data, None) or, for an invalid item, its error message.
+    `error` is a (body, status) answer when the request as a whole is unusable.
+    """
+    if not isinstance(payload, dict) or not isinstance(payload.get('operations'), list):
+        return None, [], ({'error': 'Expected {"operations": [...]}'}, 400)
+    operations = payload['operations']
+    if not operations:
+        return None, [], ({'error': 'No operations'}, 400)
+    if len(operations) > MAX_OPERATIONS:
+        return None, [], ({'error': f'At most {MAX_OPERATIONS} operations per batch'}, 413)
+
+    items: List[Parsed] = []
+    for item in operations:
+        if not isinstance(item, dict):
+            items.append('Operation must be an object')
+            continue
+        op, book_id, data = item.get('op'), item.get('id'), item.get('data')
+        if op not in ('create', 'update', 'delete'):
+            items.append('op must be create, update or delete')
+        elif op != 'create' and (not isinstance(book_id, int) or isinstance(book_id, bool)):
+            items.append('id required')
+        elif op == 'delete':
+            items.append((op, book_id, None, None))
+        elif not isinstance(data, dict) or not data:
+            items.append('No data provided')
+        elif op == 'create' and not data.get('title'):
+            items.append('Title required')
+        elif op == 'create':
+            items.append((op, None, {'title': data['title'], 'author': data.get('author', 'Unknown')}, None))
+        else:
+            items.append((op, book_id, {k: data[k] for k in fields if k in data}, None))
+    return bool(payload.get('atomic', False)), items, None
+
+
+def apply_batch(books, items: List[Parsed], atomic: bool) -> List:
+    """Run the valid items through BookStore.batch (an atomic batch with invalid items is not run)."""
+    operations = [item for item in items if not isinstance(item, str)]
+    if atomic and len(operations) < len(items):
+        return [None] * len(operations)
+    return books.batch(operations, atomic=atomic) if operations else []
+
+
+def batch_response(items: List[Parsed], outcomes: List, atomic: bool) -> Tuple[Dict, int]:
+    """
+    Merge parse errors (`items`) and store results (`outcomes`, one per
+    valid item, as returned by BookStore.batch) into the response body.
+    """
+    outcomes = iter(outcomes)
+    results = []
+    for item in items:
+        if isinstance(item, str):
+            results.append({'status': 400, 'error': item})
+            continue
+        outcome = next(outcomes)
+        if outcome is None:
+            results.append({'status': 424, 'error': 'Not applied: another operation in the batch failed'})
+        elif isinstance(outcome, VersionConflict):
+            results.append({'status': 412, 'error': 'Precondition failed'})
+        elif isinstance(outcome, KeyError):
+            results.append({'status': 404, 'error': 'Book not found'})
+        elif item[0] == 'delete':
+            results.append({'status': 204, 'id': item[1]})
+        else:
+            results.append({'status': 201 if item[0] == 'create' else 200, 'book': outcome})
+
+    applied = sum(1 for r in results if r['status'] < 300)
+    if applied == len(results):
+        status = 200
+    elif atomic:
+        status = 400 if any(isinstance(item, str) for item in items) else 409
+    else:
+        status = 207
+    return {'atomic': atomic, 'applied': applied, 'results': results}, status
@@ -0,0 +1,70 @@
+"""
+Import throughput: one POST /api/books per record vs POST /api/books/batch.
+
+Imports the same records into a fresh v3 / v4 app through Flask's test
+client (no network, so this understates the per-request saving a real
+client sees from fewer round trips). Run from this folder:
+
+    PYTHONPATH=.. python bench_batch.py
+    PYTHONPATH=.. python bench_batch.py --records 20000 --sizes 1 10 100 1000
+"""
+
+import argparse
+import importlib.util
+import os
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_app(folder):
+    """Import a version's app.py; its folder is importable while it loads, as when run from there."""
+    path = os.path.join(HERE, folder, 'app.py')
+    sys.path.insert(0, os.path.join(HERE, folder))
+    try:
+        spec = importlib.util.spec_from_file_location(f'{folder}_app', path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    finally:
+        sys.path.remove(os.path.join(HERE, folder))
+    return module
+
+
+def import_records(client, records, batch_size):
+    """Seconds to create `records`; batch_size 0 = one POST /api/books each."""
+    start = time.perf_counter()
+    if batch_size == 0:
+        for record in records:
+            assert client.post('/api/books', json=record).status_code == 201
+    else:
+        for i in range(0, len(records), batch_size):
+            operations = [{'op': 'create', 'data': r} for r in records[i:i + batch_size]]
+            assert client.post('/api/books/batch', json={'operations': operations}).status_code == 200
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--records', type=int, default=5_000)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000])
+    args = parser.parse_args()
+
+    records = [{'title': f'Imported {i}', 'author': f'Author {i % 50}'} for i in range(args.records)]
+    print(f'{args.records:,} records\n')
+    print(f"{'app':<4} {'mode':<12} {'requests':>9} {'records/s':>11} {'speedup':>8}")
+    for label, folder in (('v3', 'v3_uniform_interface'), ('v4', 'v4_cache')):
+        app = load_app(folder)
+        baseline = None
+        for size in [0] + args.sizes:
+            app.books = type(app.books)(versioned=app.books.versioned)
+            seconds = import_records(app.app.test_client(), records, size)
+            rate = args.records / seconds
+            baseline = baseline or rate
+            mode = 'single POST' if size == 0 else f'batch {size}'
+            requests = args.records if size == 0 else -(-args.records // size)
+            print(f'{label:<4} {mode:<12} {requests:>9,} {rate:>11,.0f} {rate / baseline:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
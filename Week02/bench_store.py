@@ -0,0 +1,141 @@
+"""
+Multithreaded benchmark: BookStore vs the stores the apps used before.
+
+- list scan:   module-level list, linear lookup, id = len(books) + 1 (no lock)
+- coarse lock: id -> dict behind one lock taken by every read and write
+- BookStore:   store.py (lock-free reads, striped writes, monotonic ids)
+
+Each thread runs a read-heavy mix (90% get, 2% list, 6% update, 2% create)
+against the same starting catalogue. The "dup ids" column counts books
+that ended up sharing an id. Run from this folder:
+
+    python bench_store.py
+    python bench_store.py --books 10000 --ops 20000 --threads 1 2 4 8
+"""
+
+import argparse
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+from store import BookStore
+
+
+class ListScanStore:
+    """The original pattern from the v1-v4 apps."""
+
+    def __init__(self, books):
+        self.books = [dict(b) for b in books]
+
+    def get(self, book_id):
+        return next((b for b in self.books if b["id"] == book_id), None)
+
+    def list(self):
+        return self.books
+
+    def create(self, fields):
+        book = {"id": len(self.books) + 1, **fields}
+        self.books.append(book)
+        return book
+
+    def update(self, book_id, changes):
+        book = self.get(book_id)
+        book.update(changes)
+        return book
+
+    def ids(self):
+        return [b["id"] for b in self.books]
+
+
+class CoarseLockStore:
+    def __init__(self, books):
+        self._books = {b["id"]: dict(b) for b in books}
+        self._next_id = max(self._books, default=0) + 1
+        self._lock = threading.Lock()
+
+    def get(self, book_id):
+        with self._lock:
+            return self._books.get(book_id)
+
+    def list(self):
+        with self._lock:
+            return list(self._books.values())
+
+    def create(self, fields):
+        with self._lock:
+            book = {"id": self._next_id, **fields}
+            self._next_id += 1
+            self._books[book["id"]] = book
+            return book
+
+    def update(self, book_id, changes):
+        with self._lock:
+            book = {**self._books[book_id], **changes}
+            self._books[book_id] = book
+            return book
+
+    def ids(self):
+        return list(self._books)
+
+
+def book_store_ids(store):
+    return [b["id"] for b in store.list()]
+
+
+def run(store, n_books, threads, ops, seed=1):
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(index):
+        rnd = random.Random(seed + index)
+        barrier.wait()
+        for _ in range(ops):
+            r = rnd.random()
+            if r < 0.90:
+                store.get(rnd.randint(1, n_books))
+            elif r < 0.92:
+                store.list()
+            elif r < 0.98:
+                store.update(rnd.randint(1, n_books), {"title": f"Updated {index}"})
+            else:
+                store.create({"title": f"New {index}", "author": "bench"})
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for w in workers:
+        w.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for w in workers:
+        w.join()
+    return threads * ops / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--books", type=int, default=10_000)
+    parser.add_argument("--ops", type=int, default=5_000, help="operations per thread")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    # short switch interval: more interleavings, closer to a busy threaded server
+    sys.setswitchinterval(1e-5)
+    seed_books = [{"id": i, "title": f"Book {i}", "author": f"Author {i % 100}"} for i in range(1, args.books + 1)]
+    stores = [
+        ("list scan", ListScanStore, ListScanStore.ids),
+        ("coarse lock", CoarseLockStore, CoarseLockStore.ids),
+        ("BookStore", BookStore, book_store_ids),
+    ]
+
+    print(f"{args.books:,} books, {args.ops:,} ops per thread\n")
+    print(f"{'store':<12} {'threads':>7} {'ops/s':>12} {'dup ids':>8}")
+    for label, factory, ids in stores:
+        for threads in args.threads:
+            store = factory(seed_books)
+            ops_per_sec = run(store, args.books, threads, args.ops)
+            duplicates = sum(count - 1 for count in Counter(ids(store)).values() if count > 1)
+            print(f"{label:<12} {threads:>7} {ops_per_sec:>12,.0f} {duplicates:>8}")
+
+
+if __name__ == "__main__":
+    main()
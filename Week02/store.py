@@ -0,0 +1,208 @@
+"""
+Thread-safe in-memory book store shared by the Week02 apps (v1-v4).
+
+    books = BookStore([{"id": 1, "title": "..."}, ...])
+    book = books.create({"title": "New"})       # id from a monotonic counter
+    books.update(book["id"], {"title": "Renamed"})
+    books.delete(book["id"])
+
+- id -> record dict: O(1) get / update / delete, insertion (= id) order
+- ids are never reused, even after deletes
+- records are replaced, never mutated, so a record handed to a reader
+  stays consistent while writers move on (callers must not mutate them)
+- readers take no lock: get() is one dict lookup, list() returns an
+  immutable snapshot rebuilt at most once per collection version
+- writers lock only the stripe of the record they change, so writes to
+  different books proceed in parallel
+- `version` / `last_modified` change on every write (collection ETags,
+  cache invalidation)
+
+With versioned=True every record also carries an integer "version",
+bumped on each update, for optimistic concurrency (If-Match).
+
+batch() applies many creates / updates / deletes with one version bump,
+optionally all-or-nothing.
+"""
+
+import itertools
+import threading
+import time
+from contextlib import ExitStack, nullcontext
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+
+class VersionConflict(Exception):
+    """The record changed since the version the caller expected."""
+
+
+# (op, book_id, fields, expected_version), see BookStore.batch()
+Operation = Tuple[str, Optional[int], Optional[Dict], Optional[int]]
+BatchResult = Union[Dict, Exception, None]
+
+
+class BookStore:
+    def __init__(self, books: Iterable[Dict] = (), versioned: bool = False, stripes: int = 16):
+        self.versioned = versioned
+        self._books: Dict[int, Dict] = {}
+        for book in books:
+            book = dict(book)
+            if versioned:
+                book.setdefault("version", 1)
+            self._books[book["id"]] = book
+        self._ids = itertools.count(max(self._books, default=0) + 1)
+        self._stripes = [threading.RLock() for _ in range(stripes)]
+
+        self._version_lock = threading.Lock()
+        self._version = 0
+        self._last_modified = time.time()
+        self._snapshot: Tuple[int, Tuple[Dict, ...]] = (-1, ())
+
+    # --- reads: never block -------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self._books)
+
+    def __contains__(self, book_id: int) -> bool:
+        return book_id in self._books
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    @property
+    def last_modified(self) -> datetime:
+        return datetime.fromtimestamp(self._last_modified, timezone.utc)
+
+    def get(self, book_id: int) -> Optional[Dict]:
+        return self._books.get(book_id)
+
+    def list(self) -> Tuple[Dict, ...]:
+        """All records in id order, as an immutable snapshot."""
+        version, books = self._snapshot
+        current = self._version
+        if version == current:
+            return books
+        # tuple(dict.values()) runs in C without releasing the GIL, so it
+        # cannot interleave with a writer: no lock needed
+        books = tuple(self._books.values())
+        self._snapshot = (current, books)
+        return books
+
+    # --- writes -------------------------------------------------------
+
+    def lock_for(self, book_id: int) -> threading.RLock:
+        """The stripe lock guarding one record (re-entrant: update()/delete() take it too)."""
+        return self._stripes[book_id % len(self._stripes)]
+
+    def _changed(self) -> None:
+        with self._version_lock:
+            self._version += 1
+            self._last_modified = time.time()
+
+    def _apply(self, operation: Operation, staged: Dict[int, Optional[Dict]]) -> Dict:
+        """
+        Run one operation against `staged` (id -> new record, None = deleted)
+        layered over the store; the caller holds the record's lock and
+        commits `staged` afterwards.
+        """
+        op, book_id, fields, expected_version = operation
+        if op == "create":
+            book = {"id": next(self._ids), **fields}
+            if self.versioned:
+                book["version"] = 1
+            staged[book["id"]] = book
+            return book
+        current = staged[book_id] if book_id in staged else self._books.get(book_id)
+        if current is None:
+            raise KeyError(book_id)
+        if expected_version is not None and current.get("version") != expected_version:
+            raise VersionConflict(book_id)
+        if op == "delete":
+            staged[book_id] = None
+            return current
+        if op == "update":
+            book = {**current, **fields, "id": book_id}
+            if self.versioned:
+                book["version"] = current["version"] + 1
+            staged[book_id] = book
+            return book
+        raise ValueError(f"unknown operation {op!r}")
+
+    def _commit(self, staged: Dict[int, Optional[Dict]]) -> None:
+        for book_id, book in staged.items():
+            if book is None:
+                self._books.pop(book_id, None)
+            else:
+                self._books[book_id] = book
+
+    def _write(self, operation: Operation) -> Dict:
+        staged: Dict[int, Optional[Dict]] = {}
+        book = self._apply(operation, staged)
+        self._commit(staged)
+        return book
+
+    def create(self, fields: Dict) -> Dict:
+        book = self._write(("create", None, fields, None))
+        self._changed()
+        return book
+
+    def update(self, book_id: int, changes: Dict, expected_version: Optional[int] = None) -> Dict:
+        """
+        Replace the record with `changes` applied. Raises KeyError for an
+        unknown id and VersionConflict when expected_version is stale.
+        """
+        with self.lock_for(book_id):
+            book = self._write(("update", book_id, changes, expected_version))
+        self._changed()
+        return book
+
+    def delete(self, book_id: int, expected_version: Optional[int] = None) -> Dict:
+        with self.lock_for(book_id):
+            book = self._write(("delete", book_id, None, expected_version))
+        self._changed()
+        return book
+
+    def batch(self, operations: List[Operation], atomic: bool = False) -> List[BatchResult]:
+        """
+        Apply (op, book_id, fields, expected_version) tuples in order, op
+        being "create", "update" or "delete" (book_id None for create).
+
+        Returns one result per operation: the new record (for delete: the
+        removed one), or the KeyError / VersionConflict it raised. The
+        collection version is bumped once for the whole batch.
+
+        atomic=True: every record touched is locked for the duration and
+        nothing is applied unless every operation succeeds; on failure the
+        failed operations carry their error and the others None. Readers
+        may still observe a committed batch half-way through (no snapshot
+        isolation), but never a batch that was rolled back.
+        """
+        results: List[BatchResult] = []
+        if atomic:
+            stripes = sorted({book_id % len(self._stripes) for op, book_id, _, _ in operations if op != "create"})
+            staged: Dict[int, Optional[Dict]] = {}
+            with ExitStack() as stack:
+                for stripe in stripes:  # fixed order: no deadlock between batches
+                    stack.enter_context(self._stripes[stripe])
+                for operation in operations:
+                    try:
+                        results.append(self._apply(operation, staged))
+                    except (KeyError, VersionConflict) as e:
+                        results.append(e)
+                failed = any(isinstance(r, Exception) for r in results)
+                if not failed:
+                    self._commit(staged)
+            if failed:
+                return [r if isinstance(r, Exception) else None for r in results]
+        else:
+            for operation in operations:
+                op, book_id = operation[0], operation[1]
+                try:
+                    with (nullcontext() if op == "create" else self.lock_for(book_id)):
+                        results.append(self._write(operation))
+                except (KeyError, VersionConflict) as e:
+                    results.append(e)
+        if any(not isinstance(r, Exception) for r in results):
+            self._changed()
+        return results
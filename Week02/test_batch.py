@@ -0,0 +1,98 @@
+import importlib.util
+import os
+
+import pytest
+
+from Week02.batch import MAX_OPERATIONS, apply_batch, batch_response, parse_batch
+from Week02.store import BookStore, VersionConflict
+
+FIELDS = ("title", "author")
+
+
+@pytest.fixture
+def books():
+    return BookStore([{"id": 1, "title": "A"}, {"id": 2, "title": "B"}], versioned=True)
+
+
+def test_atomic_batch_rolls_back_on_any_failure(books):
+    version = books.version
+    results = books.batch([
+        ("create", None, {"title": "C"}, None),
+        ("update", 1, {"title": "A2"}, None),
+        ("delete", 9, None, None),
+        ("update", 2, {"title": "B2"}, 5),
+    ], atomic=True)
+    assert results[:2] == [None, None]
+    assert isinstance(results[2], KeyError) and isinstance(results[3], VersionConflict)
+    assert [b["title"] for b in books.list()] == ["A", "B"]
+    assert books.version == version
+
+
+def test_atomic_batch_sees_its_own_earlier_operations(books):
+    results = books.batch([
+        ("update", 1, {"title": "A2"}, 1),
+        ("update", 1, {"title": "A3"}, 2),
+        ("delete", 2, None, None),
+    ], atomic=True)
+    assert results[1]["title"] == "A3"
+    assert [(b["id"], b["title"], b["version"]) for b in books.list()] == [(1, "A3", 3)]
+
+
+def test_non_atomic_batch_applies_what_it_can_with_one_version_bump(books):
+    version = books.version
+    results = books.batch([("update", 9, {"title": "x"}, None), ("create", None, {"title": "C"}, None)])
+    assert isinstance(results[0], KeyError) and results[1]["id"] == 3
+    assert books.version == version + 1
+
+
+@pytest.mark.parametrize("payload, status", [
+    (None, 400),
+    ({"operations": "nope"}, 400),
+    ({"operations": []}, 400),
+    ({"operations": [{"op": "delete", "id": 1}] * (MAX_OPERATIONS + 1)}, 413),
+])
+def test_unusable_requests(payload, status):
+    assert parse_batch(payload, FIELDS)[2][1] == status
+
+
+def test_invalid_items_are_reported_per_item():
+    _, items, _ = parse_batch({"operations": [
+        "x", {"op": "move"}, {"op": "update", "id": True, "data": {"title": "t"}},
+        {"op": "create", "data": {"author": "a"}}, {"op": "update", "id": 1, "data": {}},
+        {"op": "update", "id": 1, "data": {"title": "t", "isbn": "ignored"}},
+    ]}, FIELDS)
+    assert items == [
+        "Operation must be an object", "op must be create, update or delete", "id required",
+        "Title required", "No data provided", ("update", 1, {"title": "t"}, None),
+    ]
+
+
+def _run(books, payload):
+    atomic, items, _ = parse_batch(payload, FIELDS)
+    return batch_response(items, apply_batch(books, items, atomic), atomic)
+
+
+def test_statuses(books):
+    body, status = _run(books, {"operations": [{"op": "create", "data": {"title": "C"}}, {"op": "delete", "id": 2}]})
+    assert (status, [r["status"] for r in body["results"]]) == (200, [201, 204])
+    body, status = _run(books, {"operations": [{"op": "delete", "id": 2}, {"op": "delete", "id": 1}]})
+    assert (status, [r["status"] for r in body["results"]]) == (207, [404, 204])
+    body, status = _run(books, {"atomic": True, "operations": [
+        {"op": "create", "data": {"title": "D"}}, {"op": "delete", "id": 1}]})
+    assert (status, [r["status"] for r in body["results"]], body["applied"]) == (409, [424, 404], 0)
+    body, status = _run(books, {"atomic": True, "operations": [{"op": "create", "data": {"title": "D"}}, {"op": "x"}]})
+    assert (status, [r["status"] for r in body["results"]]) == (400, [424, 400])
+    assert [b["title"] for b in books.list()] == ["C"]
+
+
+def test_v3_endpoint():
+    path = os.path.join(os.path.dirname(__file__), "v3_uniform_interface", "app.py")
+    spec = importlib.util.spec_from_file_location("v3_app", path)
+    v3 = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(v3)
+    client = v3.app.test_client()
+    client.get("/api/books")  # cached until the batch invalidates it
+    r = client.post("/api/books/batch", json={"operations": [
+        {"op": "create", "data": {"title": "New"}}, {"op": "update", "id": 1, "data": {"title": "Renamed"}}]})
+    assert (r.status_code, r.json["applied"]) == (200, 2)
+    assert "Renamed" in client.get("/api/books").get_data(as_text=True)
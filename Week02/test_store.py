@@ -0,0 +1,64 @@
+import threading
+
+import pytest
+
+from Week02.store import BookStore, VersionConflict
+
+
+@pytest.fixture
+def books():
+    return BookStore([{"id": 1, "title": "A"}, {"id": 2, "title": "B"}], versioned=True)
+
+
+def test_ids_are_never_reused(books):
+    books.delete(2)
+    assert books.create({"title": "C"})["id"] == 3
+
+
+def test_records_are_replaced_not_mutated(books):
+    before = books.get(1)
+    after = books.update(1, {"title": "A2"})
+    assert before == {"id": 1, "title": "A", "version": 1}
+    assert after == {"id": 1, "title": "A2", "version": 2}
+    assert books.get(1) is after
+
+
+def test_list_is_a_snapshot_rebuilt_once_per_version(books):
+    snapshot = books.list()
+    assert books.list() is snapshot
+    version = books.version
+    books.create({"title": "C"})
+    assert books.version == version + 1
+    assert [b["id"] for b in snapshot] == [1, 2]
+    assert [b["id"] for b in books.list()] == [1, 2, 3]
+
+
+def test_unknown_ids_and_stale_versions_raise(books):
+    with pytest.raises(KeyError):
+        books.update(9, {"title": "x"})
+    with pytest.raises(VersionConflict):
+        books.update(1, {"title": "x"}, expected_version=2)
+    with pytest.raises(VersionConflict):
+        books.delete(1, expected_version=0)
+    assert 1 in books
+
+
+def test_concurrent_writers_lose_no_update():
+    books = BookStore([{"id": i, "n": 0} for i in range(1, 5)], versioned=True)
+    created = []
+
+    def work():
+        for _ in range(200):
+            for book_id in range(1, 5):
+                with books.lock_for(book_id):  # read-modify-write under the record's lock
+                    books.update(book_id, {"n": books.get(book_id)["n"] + 1})
+            created.append(books.create({"n": 0})["id"])
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert [books.get(i)["n"] for i in range(1, 5)] == [800] * 4
+    assert len(set(created)) == len(created) == 800
+    assert len(books) == 804
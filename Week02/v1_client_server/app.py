@@ -2,14 +2,19 @@ from flask import Flask, request, jsonify
 import json
 import os
 
+# common/ and Week02/ resolve from the repo root: run with PYTHONPATH=<repo root> (see common/__init__.py)
+from common.response_cache import ResponseCache
+from Week02.store import BookStore
+
 app = Flask(__name__)
+response_cache = ResponseCache('week02-v1:books')
 
-# In-memory storage
-books = [
+# In-memory storage (thread-safe, see Week02/store.py)
+books = BookStore([
     {"id": 1, "title": "Python Programming", "author": "John Doe", "available": True},
     {"id": 2, "title": "Web Development", "author": "Jane Smith", "available": True},
     {"id": 3, "title": "Data Science", "author": "Bob Johnson", "available": False}
-]
+])
 
 # Simple Client-Server Demo
 @app.route('/')
@@ -39,12 +44,14 @@ def home():
     '''
 
 @app.route('/books', methods=['GET'])
+@response_cache.flask()
 def get_books():
-    return jsonify(books)
+    return jsonify(books.list())
 
 @app.route('/books/<int:book_id>', methods=['GET'])
+@response_cache.flask()
 def get_book(book_id):
-    book = next((b for b in books if b['id'] == book_id), None)
+    book = books.get(book_id)
     if book:
         return jsonify(book)
     return jsonify({"error": "Book not found"}), 404
@@ -52,13 +59,12 @@ def get_book(book_id):
 @app.route('/books', methods=['POST'])
 def add_book():
     data = request.json
-    new_book = {
-        "id": len(books) + 1,
+    new_book = books.create({
         "title": data.get('title'),
         "author": data.get('author'),
         "available": True
-    }
-    books.append(new_book)
+    })
+    response_cache.invalidate()
     return jsonify(new_book), 201
 
 if __name__ == '__main__':
@@ -2,13 +2,19 @@ from flask import Flask, request, jsonify
 import jwt
 from datetime import datetime, timedelta
 
+# common/ and Week02/ resolve from the repo root: run with PYTHONPATH=<repo root> (see common/__init__.py)
+from common.jwt_cache import TokenCache
+from common.response_cache import ResponseCache
+from Week02.store import BookStore
+
 app = Flask(__name__)
 SECRET_KEY = 'demo-secret-2024'
+response_cache = ResponseCache('week02-v2:books')
 
-books = [
+books = BookStore([
     {"id": 1, "title": "Python Programming", "author": "John Doe"},
     {"id": 2, "title": "Web Development", "author": "Jane Smith"},
-]
+])
 
 users = {"admin": "pass123", "user": "pass456"}
 
@@ -18,9 +24,13 @@ def create_token(username):
         'exp': datetime.utcnow() + timedelta(hours=1)
     }, SECRET_KEY, algorithm='HS256')
 
+# still stateless: the cache only remembers that a token's signature
+# checked out, until the token's own exp
+verified_tokens = TokenCache(lambda token: jwt.decode(token, SECRET_KEY, algorithms=['HS256']))
+
 def verify_token(token):
     try:
-        return jwt.decode(token, SECRET_KEY, algorithms=['HS256'])
+        return verified_tokens.decode(token)
     except:
         return None
 
@@ -92,7 +102,15 @@ def login():
         return jsonify({'token': token, 'user': user})
     return jsonify({'error': 'Invalid credentials'}), 401
 
+def cache_scope(req):
+    # cache per verified user; None (no/invalid token) skips the cache so
+    # the view still answers 401
+    auth = req.headers.get('Authorization', '')
+    payload = verify_token(auth[7:]) if auth.startswith('Bearer ') else None
+    return payload['user'] if payload else None
+
 @app.route('/books', methods=['GET'])
+@response_cache.flask(vary_on=cache_scope)  # the body names the caller
 def get_books():
     auth = request.headers.get('Authorization')
     if not auth or not auth.startswith('Bearer '):
@@ -103,7 +121,7 @@ def get_books():
     if not payload:
         return jsonify({'error': 'Invalid token'}), 401
     
-    return jsonify({'books': books, 'user': payload['user']})
+    return jsonify({'books': books.list(), 'user': payload['user']})
 
 @app.route('/books', methods=['POST'])
 def add_book():
@@ -117,12 +135,11 @@ def add_book():
         return jsonify({'error': 'Invalid token'}), 401
     
     data = request.json
-    new_book = {
-        'id': len(books) + 1,
+    new_book = books.create({
         'title': data.get('title'),
         'author': data.get('author')
-    }
-    books.append(new_book)
+    })
+    response_cache.invalidate()
     return jsonify({'book': new_book, 'created_by': payload['user']}), 201
 
 if __name__ == '__main__':
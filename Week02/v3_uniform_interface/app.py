@@ -1,11 +1,17 @@
 from flask import Flask, request, jsonify
 
+# common/ and Week02/ resolve from the repo root: run with PYTHONPATH=<repo root> (see common/__init__.py)
+from common.response_cache import ResponseCache
+from Week02.batch import apply_batch, batch_response, parse_batch
+from Week02.store import BookStore
+
 app = Flask(__name__)
+response_cache = ResponseCache('week02-v3:books')
 
-books = [
+books = BookStore([
     {"id": 1, "title": "Python Programming", "author": "John Doe"},
     {"id": 2, "title": "Web Development", "author": "Jane Smith"},
-]
+])
 
 @app.route('/')
 def home():
@@ -25,6 +31,7 @@ def home():
     <button onclick="addBook()">POST New Book</button>
     <button onclick="updateBook(1)">PUT Update #1</button>
     <button onclick="deleteBook(2)">DELETE Book #2</button>
+    <button onclick="batchBooks()">POST Batch</button>
     
     <div id="result" style="margin-top:20px; padding:10px; background:#f0f0f0;"></div>
     
@@ -79,17 +86,37 @@ def home():
             result.innerHTML = '<b>Status: ' + r.status + ' (No Content)</b><br>Book deleted successfully';
         });
     }
+    
+    function batchBooks() {
+        fetch('/api/books/batch', {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify({operations: [
+                {op: 'create', data: {title: 'Batch Book A', author: 'Importer'}},
+                {op: 'create', data: {title: 'Batch Book B', author: 'Importer'}},
+                {op: 'update', id: 1, data: {title: 'Updated in batch'}},
+                {op: 'delete', id: 999}
+            ]})
+        })
+        .then(r => { 
+            result.innerHTML = '<b>Status: ' + r.status + '</b>';
+            return r.json(); 
+        })
+        .then(data => result.innerHTML += '<pre>' + JSON.stringify(data, null, 2) + '</pre>');
+    }
     </script>
     '''
 
 @app.route('/api/books', methods=['GET'])
+@response_cache.flask()
 def get_books():
     # Standard GET - returns 200 OK
-    return jsonify({'books': books}), 200
+    return jsonify({'books': books.list()}), 200
 
 @app.route('/api/books/<int:book_id>', methods=['GET'])
+@response_cache.flask()
 def get_book(book_id):
-    book = next((b for b in books if b['id'] == book_id), None)
+    book = books.get(book_id)
     if not book:
         # Standard 404 Not Found
         return jsonify({'error': 'Book not found'}), 404
@@ -102,12 +129,11 @@ def create_book():
         # Standard 400 Bad Request
         return jsonify({'error': 'Title required'}), 400
     
-    new_book = {
-        'id': len(books) + 1,
+    new_book = books.create({
         'title': data.get('title'),
         'author': data.get('author', 'Unknown')
-    }
-    books.append(new_book)
+    })
+    response_cache.invalidate()
     
     # Standard 201 Created with Location header
     response = jsonify(new_book)
@@ -117,32 +143,49 @@ def create_book():
 
 @app.route('/api/books/<int:book_id>', methods=['PUT'])
 def update_book(book_id):
-    book = next((b for b in books if b['id'] == book_id), None)
-    if not book:
+    if book_id not in books:
         return jsonify({'error': 'Book not found'}), 404
     
     data = request.json
     if not data:
         return jsonify({'error': 'No data provided'}), 400
     
-    book['title'] = data.get('title', book['title'])
-    book['author'] = data.get('author', book['author'])
+    # only the fields sent are changed, in one atomic replace of the record
+    changes = {k: data[k] for k in ('title', 'author') if k in data}
+    try:
+        book = books.update(book_id, changes)
+    except KeyError:  # deleted meanwhile
+        return jsonify({'error': 'Book not found'}), 404
+    response_cache.invalidate()
     
     # Standard 200 OK for successful update
     return jsonify(book), 200
 
 @app.route('/api/books/<int:book_id>', methods=['DELETE'])
 def delete_book(book_id):
-    global books
-    book = next((b for b in books if b['id'] == book_id), None)
-    if not book:
+    try:
+        books.delete(book_id)
+    except KeyError:
         return jsonify({'error': 'Book not found'}), 404
-    
-    books = [b for b in books if b['id'] != book_id]
+    response_cache.invalidate()
     
     # Standard 204 No Content for successful delete
     return '', 204
 
+@app.route('/api/books/batch', methods=['POST'])
+def batch_books():
+    # Many creates/updates/deletes in one round trip, one status per item
+    # (format: Week02/batch.py); "atomic": true = all or nothing
+    atomic, items, error = parse_batch(request.get_json(silent=True), fields=('title', 'author'))
+    if error:
+        return jsonify(error[0]), error[1]
+
+    outcomes = apply_batch(books, items, atomic)
+    body, status = batch_response(items, outcomes, atomic)
+    if body['applied']:
+        response_cache.invalidate()  # once per batch, not per item
+    return jsonify(body), status
+
 if __name__ == '__main__':
     print("=== V3: Uniform Interface ===")
     print("Standard HTTP methods, status codes, URIs")
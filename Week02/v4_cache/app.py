@@ -1,16 +1,53 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, json
 from datetime import datetime, timedelta
 import hashlib
+import threading
+
+from conditional import conditional, http_date, parse_etags, quote_etag
+
+# common/ and Week02/ resolve from the repo root: run with PYTHONPATH=<repo root> (see common/__init__.py)
+from common.response_cache import ResponseCache
+from Week02.batch import apply_batch, batch_response, parse_batch
+from Week02.store import BookStore
 
 app = Flask(__name__)
+response_cache = ResponseCache('week02-v4:books')
 
-books = [
+# versioned=True: every record carries an integer version, bumped on each
+# write; its ETag is derived from it instead of hashing the record's content.
+books = BookStore([
     {"id": 1, "title": "Python Programming", "author": "John Doe", "updated": "2024-01-01T10:00:00Z"},
     {"id": 2, "title": "Web Development", "author": "Jane Smith", "updated": "2024-01-02T10:00:00Z"},
-]
+], versioned=True)
+
+def book_etag(book):
+    return quote_etag(f"{book['id']}.{book['version']}")
+
+# @conditional(..., lock=book_lock) checks If-Match and applies the write
+# under the record's stripe lock, so concurrent PUTs cannot both pass.
+def book_lock(book_id):
+    return books.lock_for(book_id)
 
-def generate_etag(data):
-    return hashlib.md5(str(data).encode()).hexdigest()
+# Collection cache: the serialized GET /api/books body + its ETag are built
+# once per store version (bumped by every write) instead of once per request.
+_collection_lock = threading.Lock()
+_collection_cache = None  # (version, body, etag, last_modified)
+
+def get_collection_cache():
+    global _collection_cache
+    cached = _collection_cache
+    if cached is not None and cached[0] == books.version:
+        return cached
+    with _collection_lock:
+        # read the version before serializing: a write that lands meanwhile
+        # bumps it again, so this entry can never outlive the data it saw
+        version = books.version
+        if _collection_cache is not None and _collection_cache[0] == version:
+            return _collection_cache
+        body = json.dumps({'books': books.list()}) + '\n'
+        etag = quote_etag(hashlib.md5(body.encode()).hexdigest())
+        _collection_cache = (version, body, etag, books.last_modified)
+        return _collection_cache
 
 @app.route('/')
 def home():
@@ -78,39 +115,46 @@ def home():
     </script>
     '''
 
+def parse_updated(value):
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+# Validators for @conditional: (ETag, Last-Modified) of the current
+# representation, or None when the resource does not exist.
+def collection_validators():
+    _, _, etag, last_modified = get_collection_cache()
+    return etag, last_modified
+
+def book_validators(book_id):
+    book = books.get(book_id)
+    if not book:
+        return None
+    return book_etag(book), parse_updated(book['updated'])
+
 @app.route('/api/books', methods=['GET'])
+@conditional(collection_validators)
+@response_cache.flask()
 def get_books():
-    # Check ETag for cache validation
-    if_none_match = request.headers.get('If-None-Match')
-    
-    response_data = {'books': books}
-    etag = generate_etag(response_data)
-    
-    # Return 304 if ETag matches (cache is still valid)
-    if if_none_match == etag:
-        return '', 304
-    
-    response = jsonify(response_data)
+    # 304s (If-None-Match / If-Modified-Since) are answered by @conditional
+    # Body and ETag are precomputed per collection version: O(1) per request
+    _, body, etag, last_modified = get_collection_cache()
+
+    response = app.response_class(body, mimetype='application/json')
     response.headers['ETag'] = etag
+    response.headers['Last-Modified'] = http_date(last_modified)
     response.headers['Cache-Control'] = 'public, max-age=300'  # 5 minutes
     return response, 200
 
 @app.route('/api/books/<int:book_id>', methods=['GET'])
+@conditional(book_validators)
+@response_cache.flask()
 def get_book(book_id):
-    book = next((b for b in books if b['id'] == book_id), None)
+    book = books.get(book_id)
     if not book:
         return jsonify({'error': 'Book not found'}), 404
-    
-    # Check cache headers
-    if_none_match = request.headers.get('If-None-Match')
-    etag = generate_etag(book)
-    
-    if if_none_match == etag:
-        return '', 304
-    
+
     response = jsonify(book)
-    response.headers['ETag'] = etag
-    response.headers['Last-Modified'] = book.get('updated', datetime.utcnow().isoformat() + 'Z')
+    response.headers['ETag'] = book_etag(book)
+    response.headers['Last-Modified'] = http_date(parse_updated(book['updated']))
     response.headers['Cache-Control'] = 'public, max-age=600'  # 10 minutes
     return response, 200
 
@@ -120,54 +164,103 @@ def create_book():
     if not data or not data.get('title'):
         return jsonify({'error': 'Title required'}), 400
     
-    new_book = {
-        'id': len(books) + 1,
+    new_book = books.create({
         'title': data.get('title'),
         'author': data.get('author', 'Unknown'),
         'updated': datetime.utcnow().isoformat() + 'Z'
-    }
-    books.append(new_book)
+    })
+    response_cache.invalidate()
     
     response = jsonify(new_book)
     response.status_code = 201
     response.headers['Location'] = f'/api/books/{new_book["id"]}'
+    response.headers['ETag'] = book_etag(new_book)
     return response
 
 @app.route('/api/books/<int:book_id>', methods=['PUT'])
+@conditional(book_validators, lock=book_lock)
 def update_book(book_id):
-    book = next((b for b in books if b['id'] == book_id), None)
-    if not book:
+    if book_id not in books:
         return jsonify({'error': 'Book not found'}), 404
     
     data = request.json
     if not data:
         return jsonify({'error': 'No data provided'}), 400
     
-    # Check If-Match for optimistic locking
-    if_match = request.headers.get('If-Match')
-    current_etag = generate_etag(book)
-    
-    if if_match and if_match != current_etag:
-        return jsonify({'error': 'Resource modified'}), 412
-    
-    book['title'] = data.get('title', book['title'])
-    book['author'] = data.get('author', book['author'])
-    book['updated'] = datetime.utcnow().isoformat() + 'Z'
+    # If-Match (optimistic locking) is checked by @conditional, under the
+    # record's lock, so check + update is one compare-and-swap
+    changes = {k: data[k] for k in ('title', 'author') if k in data}
+    changes['updated'] = datetime.utcnow().isoformat() + 'Z'
+    book = books.update(book_id, changes)
+    response_cache.invalidate()
     
     response = jsonify(book)
-    response.headers['ETag'] = generate_etag(book)
+    response.headers['ETag'] = book_etag(book)
     return response, 200
 
 @app.route('/api/books/<int:book_id>', methods=['DELETE'])
+@conditional(book_validators, lock=book_lock)
 def delete_book(book_id):
-    global books
-    book = next((b for b in books if b['id'] == book_id), None)
-    if not book:
+    try:
+        books.delete(book_id)
+    except KeyError:
         return jsonify({'error': 'Book not found'}), 404
-    
-    books = [b for b in books if b['id'] != book_id]
+    response_cache.invalidate()
     return '', 204
 
+def if_match_version(book_id, if_match):
+    """
+    Record version named by a batch item's "if_match" (its ETag, as from
+    GET /api/books/<id>): None for "*", -1 (never current) for a tag of
+    another book or a weak tag. The store compares it under the record's
+    lock, like If-Match on PUT.
+    """
+    tags = parse_etags(if_match)
+    if tags == ['*']:
+        return None
+    if len(tags) != 1:
+        raise ValueError('if_match takes one entity tag')
+    tag_id, _, version = tags[0].strip('"').partition('.')
+    if tags[0].startswith('W/') or tag_id != str(book_id) or not version.isdigit():
+        return -1
+    return int(version)
+
+@app.route('/api/books/batch', methods=['POST'])
+def batch_books():
+    # Many creates/updates/deletes in one round trip, one status per item
+    # (format: Week02/batch.py); "atomic": true = all or nothing.
+    # Items may carry "if_match": an update/delete then only applies while
+    # the book still has that ETag (412 for the item otherwise).
+    payload = request.get_json(silent=True)
+    atomic, items, error = parse_batch(payload, fields=('title', 'author'))
+    if error:
+        return jsonify(error[0]), error[1]
+
+    now = datetime.utcnow().isoformat() + 'Z'
+    for i, (raw, item) in enumerate(zip(payload['operations'], items)):
+        if isinstance(item, str):
+            continue
+        op, book_id, data, expected_version = item
+        if op != 'delete':
+            data = {**data, 'updated': now}
+        if op != 'create' and isinstance(raw.get('if_match'), str):
+            try:
+                expected_version = if_match_version(book_id, raw['if_match'])
+            except ValueError as e:
+                items[i] = str(e)
+                continue
+        items[i] = (op, book_id, data, expected_version)
+
+    outcomes = apply_batch(books, items, atomic)
+    body, status = batch_response(items, outcomes, atomic)
+    for result in body['results']:
+        if 'book' in result:
+            result['etag'] = book_etag(result['book'])
+    if body['applied']:
+        # one store version bump: the collection ETag and cache change once
+        response_cache.invalidate()
+    return jsonify(body), status
+
 if __name__ == '__main__':
     print("=== V4: Full REST with Cache ===")
     print("V3 + ETag, Cache-Control, 304 Not Modified")
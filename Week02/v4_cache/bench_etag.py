@@ -0,0 +1,65 @@
+"""
+Benchmark: GET /api/books at 100k books, per-request hashing vs the
+versioned collection cache. Run from this folder:
+
+    PYTHONPATH=../.. python bench_etag.py
+    PYTHONPATH=../.. python bench_etag.py --books 10000 --requests 2000
+"""
+
+import argparse
+import hashlib
+import time
+
+import app as v4
+from Week02.store import BookStore
+
+
+def load(n):
+    v4.books = BookStore((
+        {"id": i, "title": f"Book {i}", "author": f"Author {i % 500}", "updated": "2024-01-01T10:00:00Z"}
+        for i in range(1, n + 1)
+    ), versioned=True)
+    v4.response_cache.invalidate()
+
+
+def throughput(client, requests, headers=None, expect=200):
+    start = time.perf_counter()
+    for _ in range(requests):
+        response = client.get("/api/books", headers=headers)
+        assert response.status_code == expect, response.status_code
+    return requests / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--books", type=int, default=100_000)
+    parser.add_argument("--requests", type=int, default=1_000)
+    args = parser.parse_args()
+
+    load(args.books)
+    client = v4.app.test_client()
+
+    # before: every request re-hashed str() of the whole collection
+    legacy_runs = max(1, args.requests // 100)
+    start = time.perf_counter()
+    for _ in range(legacy_runs):
+        hashlib.md5(str({"books": list(v4.books.list())}).encode()).hexdigest()
+    legacy_ms = (time.perf_counter() - start) * 1000 / legacy_runs
+
+    start = time.perf_counter()
+    etag = client.get("/api/books").headers["ETag"]
+    first_ms = (time.perf_counter() - start) * 1000
+
+    print(f"{args.books:,} books")
+    print(f"  per-request md5(str(books)) (old ETag cost): {legacy_ms:8.1f} ms -> max {1000 / legacy_ms:,.0f} req/s")
+    print(f"  first GET after a write (builds the cache):  {first_ms:8.1f} ms")
+    print(f"  GET 200 (cached body):        {throughput(client, args.requests // 10 or 1):>10,.0f} req/s")
+    print(f"  conditional GET 304:          {throughput(client, args.requests, {'If-None-Match': etag}, 304):>10,.0f} req/s")
+
+    client.post("/api/books", json={"title": "New"})
+    stale = client.get("/api/books", headers={"If-None-Match": etag})
+    print(f"  after POST, old ETag ->       {stale.status_code} (new ETag {stale.headers['ETag'][:8]}...)")
+
+
+if __name__ == "__main__":
+    main()
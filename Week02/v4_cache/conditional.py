@@ -0,0 +1,154 @@
+"""
+Conditional requests (RFC 9110, section 13) for Flask views.
+
+    @app.route('/api/books/<int:book_id>', methods=['GET', 'PUT'])
+    @conditional(book_validators)
+    def book(book_id): ...
+
+`book_validators(**view_args)` returns the current (etag, last_modified)
+of the target resource, or None when it does not exist (the view then
+answers 404 as usual: preconditions are ignored for non-2xx outcomes).
+
+Evaluation order (RFC 9110, 13.2.2):
+1. If-Match            strong comparison, "*" = resource exists     -> 412
+2. If-Unmodified-Since only without If-Match                        -> 412
+3. If-None-Match       weak comparison, list and "*" forms          -> 304 (GET/HEAD) / 412
+4. If-Modified-Since   GET/HEAD only, only without If-None-Match    -> 304
+"""
+
+import re
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from functools import wraps
+from typing import Callable, List, Optional, Tuple
+
+from flask import current_app, jsonify, make_response, request
+
+Validators = Tuple[str, datetime]
+
+
+def quote_etag(opaque: str, weak: bool = False) -> str:
+    return f'W/"{opaque}"' if weak else f'"{opaque}"'
+
+
+# one list member: an entity tag (commas allowed inside the quotes) or "*"
+_ETAG = re.compile(r'(?:W/)?"[^"]*"|\*')
+
+
+def parse_etags(header: str) -> List[str]:
+    """Entity tags of an If-Match / If-None-Match header; ['*'] for the wildcard."""
+    return _ETAG.findall(header)
+
+
+def _opaque(etag: str) -> Tuple[str, bool]:
+    """(opaque-tag, is_weak)"""
+    weak = etag.startswith('W/')
+    return (etag[2:] if weak else etag), weak
+
+
+def strong_match(etag: str, candidates: List[str]) -> bool:
+    if candidates == ['*']:
+        return True
+    tag, weak = _opaque(etag)
+    if weak:
+        return False
+    for candidate in candidates:
+        other, other_weak = _opaque(candidate)
+        if not other_weak and other == tag:
+            return True
+    return False
+
+
+def weak_match(etag: str, candidates: List[str]) -> bool:
+    if candidates == ['*']:
+        return True
+    tag = _opaque(etag)[0]
+    return any(_opaque(candidate)[0] == tag for candidate in candidates)
+
+
+def http_date(value: datetime) -> str:
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def parse_http_date(value: Optional[str]) -> Optional[datetime]:
+    """None for a missing or invalid date (the header is then ignored)."""
+    if not value:
+        return None
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def evaluate_preconditions(method: str, etag: str, last_modified: datetime, headers) -> Optional[int]:
+    """Return 304 or 412 when a precondition decides the response, else None."""
+    # HTTP dates have one-second resolution
+    last_modified = last_modified.replace(microsecond=0)
+    safe = method in ('GET', 'HEAD')
+
+    if_match = headers.get('If-Match')
+    if if_match is not None:
+        if not strong_match(etag, parse_etags(if_match)):
+            return 412
+    else:
+        since = parse_http_date(headers.get('If-Unmodified-Since'))
+        if since is not None and last_modified > since:
+            return 412
+
+    if_none_match = headers.get('If-None-Match')
+    if if_none_match is not None:
+        if weak_match(etag, parse_etags(if_none_match)):
+            return 304 if safe else 412
+    elif safe:
+        since = parse_http_date(headers.get('If-Modified-Since'))
+        if since is not None and last_modified <= since:
+            return 304
+    return None
+
+
+def conditional(get_validators: Callable[..., Optional[Validators]], lock=None):
+    """
+    Evaluate preconditions before the view runs; add ETag / Last-Modified
+    to GET responses.
+
+    With `lock` (a lock, or a function of the view args returning one,
+    e.g. a per-record lock), unsafe methods (PUT, DELETE, ...) evaluate
+    their preconditions and run the view while holding it, so If-Match is
+    an atomic compare-and-swap rather than check-then-act.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if lock is not None and request.method not in ('GET', 'HEAD'):
+                with (lock(**kwargs) if callable(lock) else lock):
+                    return evaluate(*args, **kwargs)
+            return evaluate(*args, **kwargs)
+
+        def evaluate(*args, **kwargs):
+            validators = get_validators(**kwargs)
+            if validators is None:
+                return view(*args, **kwargs)
+            etag, last_modified = validators
+
+            status = evaluate_preconditions(request.method, etag, last_modified, request.headers)
+            if status == 304:
+                response = current_app.response_class(status=304)
+                response.headers['ETag'] = etag
+                response.headers['Last-Modified'] = http_date(last_modified)
+                return response
+            if status == 412:
+                return jsonify({'error': 'Precondition failed', 'etag': etag}), 412
+
+            response = make_response(view(*args, **kwargs))
+            if request.method in ('GET', 'HEAD') and response.status_code == 200:
+                response.headers.setdefault('ETag', etag)
+                response.headers.setdefault('Last-Modified', http_date(last_modified))
+            return response
+
+        return wrapper
+
+    return decorator
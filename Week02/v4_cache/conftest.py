@@ -0,0 +1,16 @@
+import pytest
+
+import app as v4
+from Week02.store import BookStore
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """v4 test client over a fresh two-book store."""
+    monkeypatch.setattr(v4, "books", BookStore([
+        {"id": 1, "title": "Python Programming", "author": "John Doe", "updated": "2024-01-01T10:00:00Z"},
+        {"id": 2, "title": "Web Development", "author": "Jane Smith", "updated": "2024-01-02T10:00:00Z"},
+    ], versioned=True))
+    monkeypatch.setattr(v4, "_collection_cache", None)
+    v4.response_cache.invalidate()
+    return v4.app.test_client()
@@ -0,0 +1,84 @@
+"""
+Stress test: concurrent optimistic-concurrency updates to one book.
+
+Every worker thread loops GET -> PUT with If-Match, incrementing a counter
+kept in the book's title and retrying on 412. The test runs the app
+in-process and calls it from real threads. If the If-Match check and
+the write were not one atomic step, two PUTs could pass with the same
+ETag and an increment would be lost. Run from this folder:
+
+    PYTHONPATH=../.. python stress_cas.py
+    PYTHONPATH=../.. python stress_cas.py --threads 16 --increments 500
+"""
+
+import argparse
+import sys
+import threading
+import time
+
+import app as v4
+
+
+def worker(increments, book_id, stats, barrier):
+    client = v4.app.test_client()
+    barrier.wait()
+    done = conflicts = 0
+    while done < increments:
+        current = client.get(f"/api/books/{book_id}")
+        etag = current.headers["ETag"]
+        value = int(current.json["title"])
+        response = client.put(
+            f"/api/books/{book_id}",
+            json={"title": str(value + 1)},
+            headers={"If-Match": etag},
+        )
+        if response.status_code == 200:
+            done += 1
+        elif response.status_code == 412:
+            conflicts += 1
+        else:
+            raise RuntimeError(f"unexpected status {response.status_code}")
+    with stats["lock"]:
+        stats["applied"] += done
+        stats["conflicts"] += conflicts
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--increments", type=int, default=250, help="successful PUTs per thread")
+    args = parser.parse_args()
+
+    # switch threads as often as possible to provoke interleavings
+    sys.setswitchinterval(1e-6)
+
+    client = v4.app.test_client()
+    created = client.post("/api/books", json={"title": "0", "author": "stress"})
+    book_id = created.json["id"]
+
+    stats = {"lock": threading.Lock(), "applied": 0, "conflicts": 0}
+    barrier = threading.Barrier(args.threads)
+    threads = [
+        threading.Thread(target=worker, args=(args.increments, book_id, stats, barrier))
+        for _ in range(args.threads)
+    ]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    final = client.get(f"/api/books/{book_id}").json
+    expected = args.threads * args.increments
+    print(f"{args.threads} threads x {args.increments} increments in {elapsed:.1f} s")
+    print(f"  successful PUTs: {stats['applied']}, 412 retries: {stats['conflicts']}")
+    print(f"  final counter:   {final['title']} (expected {expected}), version {final['version']}")
+    if int(final["title"]) != expected or final["version"] != expected + 1:
+        print("LOST UPDATES")
+        sys.exit(1)
+    print("OK: no lost updates")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from conditional import evaluate_preconditions, http_date, parse_etags, strong_match, weak_match
+
+ETAG = '"1.3"'
+MODIFIED = datetime(2024, 1, 2, 10, 0, 0, 500000, tzinfo=timezone.utc)
+EARLIER = http_date(datetime(2024, 1, 1, tzinfo=timezone.utc))
+SAME = http_date(MODIFIED)
+
+
+def test_parse_etags_keeps_commas_inside_quotes():
+    assert parse_etags('"a,b", W/"c" ,"d"') == ['"a,b"', 'W/"c"', '"d"']
+    assert parse_etags("*") == ["*"]
+    assert parse_etags("") == []
+
+
+def test_weak_tags_match_only_in_weak_comparison():
+    assert weak_match('"x"', ['W/"x"'])
+    assert not strong_match('"x"', ['W/"x"'])
+    assert not strong_match('W/"x"', ['W/"x"'])
+    assert strong_match('"x"', ['"y"', '"x"'])
+    assert strong_match('W/"x"', ["*"])
+
+
+@pytest.mark.parametrize("method, headers, status", [
+    ("GET", {}, None),
+    ("GET", {"If-None-Match": '"0.1", W/"1.3"'}, 304),
+    ("GET", {"If-None-Match": "*"}, 304),
+    ("GET", {"If-None-Match": '"1.2"'}, None),
+    ("PUT", {"If-None-Match": ETAG}, 412),
+    ("GET", {"If-Modified-Since": SAME}, 304),  # second resolution: same second is not modified
+    ("GET", {"If-Modified-Since": EARLIER}, None),
+    ("GET", {"If-Modified-Since": "not a date"}, None),
+    ("GET", {"If-None-Match": '"other"', "If-Modified-Since": SAME}, None),  # If-None-Match wins
+    ("PUT", {"If-Modified-Since": SAME}, None),  # GET/HEAD only
+    ("PUT", {"If-Match": ETAG}, None),
+    ("PUT", {"If-Match": 'W/"1.3"'}, 412),
+    ("PUT", {"If-Match": '"1.2"'}, 412),
+    ("PUT", {"If-Unmodified-Since": EARLIER}, 412),
+    ("PUT", {"If-Unmodified-Since": SAME}, None),
+    ("PUT", {"If-Match": ETAG, "If-Unmodified-Since": EARLIER}, None),  # If-Match wins
+])
+def test_evaluation_order(method, headers, status):
+    assert evaluate_preconditions(method, ETAG, MODIFIED, headers) == status
+
+
+def test_book_revalidation_through_the_app(client):
+    r = client.get("/api/books/1")
+    etag, modified = r.headers["ETag"], r.headers["Last-Modified"]
+    assert client.get("/api/books/1", headers={"If-None-Match": f'"x", W/{etag}'}).status_code == 304
+    assert client.get("/api/books/1", headers={"If-Modified-Since": modified}).status_code == 304
+    assert client.get("/api/books/9", headers={"If-None-Match": "*"}).status_code == 404
@@ -0,0 +1,83 @@
+import threading
+
+import pytest
+
+import app as v4
+
+
+def test_collection_body_and_etag_are_built_once_per_version(client):
+    first = v4.get_collection_cache()
+    assert v4.get_collection_cache() is first
+    r = client.get("/api/books")
+    assert r.headers["ETag"] == first[2]
+    assert r.get_data(as_text=True) == first[1]
+
+    client.post("/api/books", json={"title": "New"})
+    assert v4.get_collection_cache() is not first
+    assert client.get("/api/books").headers["ETag"] != first[2]
+
+
+def test_collection_revalidates_to_304(client):
+    etag = client.get("/api/books").headers["ETag"]
+    r = client.get("/api/books", headers={"If-None-Match": etag})
+    assert (r.status_code, r.data) == (304, b"")
+    client.delete("/api/books/2")
+    assert client.get("/api/books", headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_put_with_the_current_etag_bumps_the_version(client):
+    etag = client.get("/api/books/1").headers["ETag"]
+    assert etag == '"1.1"'
+    r = client.put("/api/books/1", json={"title": "Renamed"}, headers={"If-Match": etag})
+    assert (r.status_code, r.json["version"], r.headers["ETag"]) == (200, 2, '"1.2"')
+    stale = client.put("/api/books/1", json={"title": "Lost update"}, headers={"If-Match": etag})
+    assert stale.status_code == 412
+    assert client.get("/api/books/1").json["title"] == "Renamed"
+
+
+def test_concurrent_puts_with_one_etag_apply_once(client):
+    barrier = threading.Barrier(8)
+    statuses = []
+
+    def put(i):
+        own = v4.app.test_client()
+        barrier.wait()
+        statuses.append(own.put("/api/books/2", json={"title": f"t{i}"}, headers={"If-Match": '"2.1"'}).status_code)
+
+    threads = [threading.Thread(target=put, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(statuses) == [200] + [412] * 7
+    assert v4.books.get(2)["version"] == 2
+
+
+def test_delete_honours_if_match(client):
+    assert client.delete("/api/books/1", headers={"If-Match": '"1.9"'}).status_code == 412
+    assert client.delete("/api/books/1", headers={"If-Match": '"1.1"'}).status_code == 204
+
+
+@pytest.mark.parametrize("if_match, version", [
+    ("*", None),
+    ('"1.4"', 4),
+    ('W/"1.4"', -1),  # weak tags never match If-Match
+    ('"2.4"', -1),    # another book's tag
+    ('"1.x"', -1),
+])
+def test_batch_if_match_to_expected_version(if_match, version):
+    assert v4.if_match_version(1, if_match) == version
+
+
+def test_batch_if_match_takes_one_tag():
+    with pytest.raises(ValueError):
+        v4.if_match_version(1, '"1.1", "1.2"')
+
+
+def test_batch_items_carry_etags_and_honour_if_match(client):
+    r = client.post("/api/books/batch", json={"operations": [
+        {"op": "update", "id": 1, "data": {"title": "A"}, "if_match": '"1.1"'},
+        {"op": "update", "id": 2, "data": {"title": "B"}, "if_match": '"2.7"'},
+    ]})
+    assert r.status_code == 207
+    assert [(x["status"], x.get("etag")) for x in r.json["results"]] == [(200, '"1.2"'), (412, None)]
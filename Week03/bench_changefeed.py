@@ -0,0 +1,177 @@
+"""
+Change feed under write load (changefeed.py, /api/changes*).
+
+1. in process: cost of a stock write with and without the change log
+   listening, and ChangeLog.read throughput
+2. over HTTP: extensibility.py under uvicorn with a small retention
+   (CHANGEFEED_MAX_ENTRIES), a writer sending bulk stock deltas, and
+   - `--streams` SSE consumers reading as fast as they can
+   - one long-poll consumer following `next`
+   - one stalled SSE consumer: stops reading after its first event
+     until the writer is done, then drains
+   Fast consumers must see every sequence number exactly once, in order.
+   The server stops reading the log for the stalled one once its socket
+   buffers are full (nothing is queued for it in the server); when it
+   resumes, the log has moved past it and it gets a `reset` event.
+
+Run from this folder (needs uvicorn):
+
+    PYTHONPATH=.. python bench_changefeed.py
+    PYTHONPATH=.. python bench_changefeed.py --writes 200000 --retention 50000 --streams 8
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+
+import extensibility as api
+from changefeed import ChangeLog
+
+PORT = 8010
+BASE = f"http://127.0.0.1:{PORT}"
+
+
+def in_process(n):
+    api._load(api._InternalBook(id=i, title=f"Book {i}", author="A", price_amount=10.0, stock=0)
+              for i in range(1, 1001))
+    api._change_listeners.remove(api._changes.append)
+
+    def writes():
+        start = time.perf_counter()
+        with api._write_lock:
+            for i in range(n):
+                b = api._DB[i % 1000 + 1]
+                api._write_fields(b, {"stock": b.stock + 1}, "patch")
+        return (time.perf_counter() - start) / n * 1e6
+
+    without = writes()
+    log = ChangeLog(max_entries=n)
+    api._change_listeners.append(log.append)
+    with_log = writes()
+    start, since, read = time.perf_counter(), log.last - len(log), 0
+    while since < log.last:
+        entries, since = log.read(since, 500)
+        read += len(entries)
+    reads = read / (time.perf_counter() - start)
+    api._change_listeners.remove(log.append)
+    api._change_listeners.append(api._changes.append)
+    print(f"in process, {n:,} stock writes")
+    print(f"  write without change log   {without:>8.2f} us")
+    print(f"  write with change log      {with_log:>8.2f} us")
+    print(f"  ChangeLog.read             {reads:>12,.0f} records/s")
+
+
+def start_server(retention):
+    env = {**os.environ, "CHANGEFEED_MAX_ENTRIES": str(retention)}
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "extensibility:app", "--port", str(PORT), "--log-level", "warning"],
+        cwd=os.path.dirname(os.path.abspath(__file__)), env=env,
+    )
+    deadline = time.time() + 15
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", PORT), timeout=0.2).close()
+            return process
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("server did not start")
+
+
+async def sse(client, since, result, done, stall=False):
+    """Collect sequence numbers from the stream until `done` and caught up, or a reset."""
+    async with client.stream("GET", f"{BASE}/api/changes/stream", params={"since": since}) as r:
+        event = None
+        async for line in r.aiter_lines():
+            if line.startswith("event: "):
+                event = line[7:]
+            elif line.startswith("data: ") and event == "reset":
+                result["reset"] = json.loads(line[6:])["next"]
+                return
+            elif line.startswith("id: "):
+                result["seqs"].append(int(line[4:]))
+                if stall:
+                    await done.wait()
+                    stall = False
+                if done.is_set() and result["seqs"][-1] >= result["last"]:
+                    return
+
+
+async def long_poll(client, since, result, done):
+    while not (done.is_set() and since >= result["last"]):
+        r = await client.get(f"{BASE}/api/changes", params={"since": since, "limit": 5000, "timeout": 5})
+        body = r.json()
+        result["seqs"].extend(change["seq"] for change in body["changes"])
+        since = body["next"]
+        result["polls"] += 1
+
+
+async def over_http(args):
+    async with httpx.AsyncClient(timeout=60) as client:
+        since = (await client.get(f"{BASE}/api/changes", params={"timeout": 0})).json()["next"]
+        done = asyncio.Event()
+        fast = [{"seqs": [], "last": None} for _ in range(args.streams)]
+        poller = {"seqs": [], "last": None, "polls": 0}
+        stalled = {"seqs": [], "last": None}
+        consumers = [asyncio.create_task(sse(client, since, result, done)) for result in fast]
+        consumers.append(asyncio.create_task(long_poll(client, since, poller, done)))
+        consumers.append(asyncio.create_task(sse(client, since, stalled, done, stall=True)))
+
+        start = time.perf_counter()
+        for offset in range(0, args.writes, args.bulk_size):
+            updates = [{"id": 1 + (offset + i) % 2, "delta": 1} for i in range(min(args.bulk_size, args.writes - offset))]
+            r = await client.patch(f"{BASE}/api/v2/books/stock", json={"updates": updates})
+            assert r.status_code == 200, r.text
+        written = time.perf_counter() - start
+        # one more write, announced first: every consumer sees an event after `done`
+        last = (await client.get(f"{BASE}/api/changes", params={"timeout": 0})).json()["next"] + 1
+        for result in fast + [poller, stalled]:
+            result["last"] = last
+        done.set()
+        await client.patch(f"{BASE}/api/v2/books/stock", json={"updates": [{"id": 1, "delta": 1}]})
+        await asyncio.wait_for(asyncio.gather(*consumers), 120)
+        delivered = time.perf_counter() - start
+
+    expected = list(range(since + 1, last + 1))
+    print(f"\nHTTP, {args.writes:,} stock writes in bulk calls of {args.bulk_size:,}, "
+          f"retention {args.retention:,}")
+    print(f"  writes                     {args.writes / written:>12,.0f} /s")
+    print(f"  all consumers caught up    {delivered:>12.2f} s after the first write")
+    for i, result in enumerate(fast):
+        ok = result["seqs"] == expected
+        print(f"  SSE consumer {i}             {len(result['seqs']):>12,} records, in order, no gaps: {ok}")
+        assert ok
+    ok = poller["seqs"] == expected
+    print(f"  long-poll consumer         {len(poller['seqs']):>12,} records in {poller['polls']:,} polls, "
+          f"in order, no gaps: {ok}")
+    assert ok
+    print(f"  stalled SSE consumer       {len(stalled['seqs']):>12,} records (buffered before the stall), then "
+          + (f"reset: resync, continue from {stalled['reset']}" if "reset" in stalled else "no reset"))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--writes", type=int, default=100_000)
+    parser.add_argument("--bulk-size", type=int, default=5_000)
+    parser.add_argument("--retention", type=int, default=50_000)
+    parser.add_argument("--streams", type=int, default=4)
+    args = parser.parse_args()
+
+    in_process(args.writes)
+    process = start_server(args.retention)
+    try:
+        asyncio.run(over_http(args))
+    finally:
+        process.kill()
+        process.wait()
+
+
+if __name__ == "__main__":
+    main()
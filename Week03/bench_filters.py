@@ -0,0 +1,102 @@
+"""
+GET /api/v2/books filtering: the per-row loop (_filter_v2) vs the numpy
+column index (column_index.py), on N books.
+
+For each query both paths run, their results must be the same books in
+the same order, and the best of a few runs is reported. The queries
+cover:
+- a price range + currency, wide (full mask pass) and narrow (sorted
+  price index)
+- a currency alone, a title/author search alone, and everything at once
+
+Also timed: building the index from the store, upsert() per write, and
+the narrow queries again after 1,000 price writes (served from the
+sorted index plus the written rows, without re-sorting).
+
+    PYTHONPATH=.. python bench_filters.py
+    PYTHONPATH=.. python bench_filters.py --books 1000000
+"""
+
+import argparse
+import random
+import time
+
+import extensibility as api
+from column_index import BookColumns
+
+CURRENCIES = ["USD", "EUR", "VND", "JPY"]
+WORDS = ["code", "clean", "design", "python", "data", "systems", "patterns", "web", "api", "cloud"]
+
+QUERIES = [
+    ("wide range + currency", dict(currency="EUR", min_price=20, max_price=60)),
+    ("narrow range + currency", dict(currency="USD", min_price=42, max_price=42.5)),
+    ("narrow range", dict(min_price=10, max_price=10.2)),
+    ("min_price only", dict(min_price=70)),
+    ("currency only", dict(currency="JPY")),
+    ("q (common word)", dict(q="Python")),
+    ("q (rare author)", dict(q="author 4242")),
+    ("q + range + currency", dict(q="data", currency="VND", min_price=5, max_price=30)),
+]
+
+
+def make_books(n, seed=1):
+    rnd = random.Random(seed)
+    return [
+        api._InternalBook(
+            id=i, title=f"{rnd.choice(WORDS).title()} {rnd.choice(WORDS)} {i}", author=f"Author {i % 5000}",
+            price_amount=round(rnd.uniform(5, 80), 2), currency=rnd.choice(CURRENCIES),
+            published_year=rnd.randint(1950, 2024), stock=rnd.randint(0, 100),
+        )
+        for i in range(1, n + 1)
+    ]
+
+
+def best(fn, runs=3):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--books", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    books = make_books(args.books)
+    build, _ = best(lambda: BookColumns().rebuild(books), runs=1)
+    columns = BookColumns()
+    columns.rebuild(books)
+
+    print(f"{args.books:,} books, index built in {build:.2f} s")
+    print(f"{'query':<26} {'matches':>9} {'loop ms':>9} {'index ms':>9} {'speedup':>8}")
+    for label, query in QUERIES:
+        params = {"q": None, "currency": None, "min_price": None, "max_price": None, **query}
+        loop, expected = best(lambda: api._filter_v2(books, **params))
+        index, found = best(lambda: columns.matching(**params))
+        assert [b.id for b in found] == [b.id for b in expected], label
+        print(f"{label:<26} {len(found):>9,} {loop * 1e3:>9.1f} {index * 1e3:>9.1f} {loop / index:>7.0f}x")
+
+    # price writes: the sorted index keeps serving, written rows are checked aside
+    rnd = random.Random(3)
+    written = []
+    for i in rnd.sample(range(len(books)), 1000):
+        b = books[i]
+        books[i] = api._InternalBook(id=b.id, title=b.title, author=b.author, price_amount=round(rnd.uniform(5, 80), 2),
+                                     currency=b.currency, published_year=b.published_year, stock=b.stock,
+                                     version=b.version + 1)
+        written.append(books[i])
+    write, _ = best(lambda: [columns.upsert(b) for b in written], runs=1)
+    print(f"\nupsert                     {write / len(written) * 1e6:>9.1f} us / write")
+    print("after 1,000 price writes")
+    for label, query in QUERIES[:3]:
+        params = {"q": None, "currency": None, "min_price": None, "max_price": None, **query}
+        loop, expected = best(lambda: api._filter_v2(books, **params))
+        index, found = best(lambda: columns.matching(**params))
+        assert [b.id for b in found] == [b.id for b in expected], label
+        print(f"{label:<26} {len(found):>9,} {loop * 1e3:>9.1f} {index * 1e3:>9.1f} {loop / index:>7.0f}x")
+
+if __name__ == "__main__":
+    main()
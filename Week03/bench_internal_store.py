@@ -0,0 +1,143 @@
+"""
+Memory and list throughput: pydantic _InternalBook vs the slotted record
+and its compiled v2 projection (projections.py).
+
+- memory: traced allocations of N internal records
+- projection: build the GET /api/v2/books body for all N records
+  * pydantic: _to_v2 -> BookV2(PriceV2), jsonable_encoder, json.dumps
+    (what the endpoint did before, minus response_model validation)
+  * cold:     compiled projection -> dict -> JSON, every record encoded
+  * cached:   the same call again: every fragment is current, the body
+    is a join of cached bytes
+  * 1% dirty: after 1% of the records got a new version
+- HTTP: GET /api/v2/books through the test client, for a smaller store
+  (both paths, response cache invalidated before every call)
+
+    PYTHONPATH=.. python bench_internal_store.py
+    PYTHONPATH=.. python bench_internal_store.py --books 1000000 --http-books 100000
+"""
+
+import argparse
+import json
+import random
+import time
+import tracemalloc
+from typing import List, Optional
+
+from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+import extensibility as api
+
+
+# --- the previous representation --------------------------------------------
+
+class PydanticBook(BaseModel):
+    id: int
+    title: str
+    author: str
+    price_amount: float
+    currency: str = "USD"
+    published_year: Optional[int] = None
+    stock: int = 0
+
+
+def legacy_to_v2(b: PydanticBook) -> api.BookV2:
+    return api.BookV2(
+        id=b.id, title=b.title, author=b.author,
+        price=api.PriceV2(amount=b.price_amount, currency=b.currency),
+        published_year=b.published_year, stock=b.stock,
+    )
+
+
+legacy_app = FastAPI()
+legacy_db = {}
+
+
+@legacy_app.get("/api/v2/books", response_model=List[api.BookV2])
+def legacy_list_v2():
+    return [legacy_to_v2(b) for b in legacy_db.values()]
+
+
+# --- harness --------------------------------------------------------------
+
+CURRENCIES = ["USD", "EUR", "VND", "JPY"]
+
+
+def rows(n, seed=1):
+    rnd = random.Random(seed)
+    for i in range(1, n + 1):
+        yield dict(
+            id=i, title=f"Book {i}", author=f"Author {i % 5000}",
+            price_amount=round(rnd.uniform(5, 80), 2),
+            # a fresh str per record, as parsed from a request body
+            currency="".join(rnd.choice(CURRENCIES)),
+            published_year=rnd.randint(1950, 2024), stock=rnd.randint(0, 100),
+        )
+
+
+def build(factory, n):
+    tracemalloc.start()
+    db = {r["id"]: factory(**r) for r in rows(n)}
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return db, size
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--books", type=int, default=1_000_000)
+    parser.add_argument("--http-books", type=int, default=100_000)
+    args = parser.parse_args()
+
+    print(f"{args.books:,} books")
+    legacy, legacy_bytes = build(PydanticBook, args.books)
+    legacy_body = timed(lambda: json.dumps(jsonable_encoder([legacy_to_v2(b) for b in legacy.values()])))
+    del legacy
+    slots, slots_bytes = build(api._InternalBook, args.books)
+    tracemalloc.start()
+    api._V2.encode_many(slots.values())
+    fragment_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    api._V2.clear()
+    cold = timed(lambda: api._V2.encode_many(slots.values()))
+    cached = timed(lambda: api._V2.encode_many(slots.values()))
+    for book in random.Random(2).sample(list(slots.values()), args.books // 100):
+        book.version += 1
+    dirty = timed(lambda: api._V2.encode_many(slots.values()))
+    del slots
+    api._V2.clear()
+
+    print(f"{'':<22} {'pydantic':>12} {'slots':>12}")
+    print(f"{'memory (MB)':<22} {legacy_bytes / 2**20:>12,.0f} {slots_bytes / 2**20:>12,.0f}")
+    print(f"{'  + v2 fragments (MB)':<22} {'':>12} {fragment_bytes / 2**20:>12,.0f}")
+    print(f"{'bytes / book':<22} {legacy_bytes / args.books:>12,.0f} {slots_bytes / args.books:>12,.0f}")
+    print(f"\nv2 list body, {args.books:,} books")
+    for label, seconds in (("pydantic", legacy_body), ("cold", cold), ("cached", cached), ("1% dirty", dirty)):
+        print(f"  {label:<20} {seconds:>8.2f} s {args.books / seconds:>14,.0f} books/s")
+
+    n = args.http_books
+    legacy_db.update((r["id"], PydanticBook(**r)) for r in rows(n))
+    api._load(api._InternalBook(**r) for r in rows(n))
+    legacy_client, client = TestClient(legacy_app), TestClient(api.app)
+
+    def new_call():
+        api._response_cache.invalidate()
+        assert len(client.get("/api/v2/books").content) > n
+
+    legacy_http = min(timed(lambda: legacy_client.get("/api/v2/books")) for _ in range(3))
+    new_http = min(timed(new_call) for _ in range(3))
+    print(f"\nGET /api/v2/books, {n:,} books (best of 3)")
+    print(f"{'  latency (s)':<22} {legacy_http:>12.2f} {new_http:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Stock-only updates, as the inventory sync sends them:
+
+- store level: the previous PATCH path (validate a BookV2UpdatePATCH,
+  rebuild the whole record from it, store it) vs the field-level write
+  (_v2_patch_fields + _write_fields: only the changed fields compared
+  and copied over, the new version swapped in, a change record); best
+  of 2 runs each
+- HTTP: N single PATCH /api/v2/books/{id} calls vs PATCH
+  /api/v2/books/stock with the same N deltas in bulk calls
+
+    PYTHONPATH=.. python bench_patch.py
+    PYTHONPATH=.. python bench_patch.py --books 100000 --updates 200000 --http-updates 5000
+"""
+
+import argparse
+import itertools
+import random
+import time
+
+from fastapi.testclient import TestClient
+
+import extensibility as api
+
+
+def legacy_apply_v2_patch(existing, patch):
+    """The PATCH path before field-level writes: a new record per update."""
+    return api._InternalBook(
+        id=existing.id,
+        version=existing.version + 1,
+        title=patch.title if patch.title is not None else existing.title,
+        author=patch.author if patch.author is not None else existing.author,
+        price_amount=patch.price.amount if (patch.price and patch.price.amount is not None) else existing.price_amount,
+        currency=patch.price.currency if (patch.price and patch.price.currency is not None) else existing.currency,
+        published_year=patch.published_year if patch.published_year is not None else existing.published_year,
+        stock=patch.stock if patch.stock is not None else existing.stock,
+    )
+
+
+def load(n):
+    rnd = random.Random(1)
+    api._load(
+        api._InternalBook(id=i, title=f"Book {i}", author=f"Author {i % 5000}",
+                          price_amount=round(rnd.uniform(5, 80), 2), stock=rnd.randint(0, 100))
+        for i in range(1, n + 1)
+    )
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--books", type=int, default=100_000)
+    parser.add_argument("--updates", type=int, default=200_000)
+    parser.add_argument("--http-updates", type=int, default=5_000)
+    parser.add_argument("--bulk-size", type=int, default=5_000)
+    args = parser.parse_args()
+
+    load(args.books)
+    rnd = random.Random(2)
+    updates = [(rnd.randint(1, args.books), rnd.randint(0, 100)) for _ in range(args.updates)]
+    changes = itertools.count()
+
+    def count_change(change):
+        next(changes)
+
+    api._change_listeners.append(count_change)
+
+    def legacy():
+        for book_id, stock in updates:
+            patch = api.BookV2UpdatePATCH(stock=stock)
+            book = legacy_apply_v2_patch(api._DB[book_id], patch)
+            api._DB[book_id] = book
+            api._columns.upsert(book)
+            api._response_cache.invalidate()
+
+    def field_level():
+        for book_id, stock in updates:
+            api._update(book_id, api._v2_patch_fields(api.BookV2UpdatePATCH(stock=stock)), "patch")
+
+    def field_level_bulk():
+        with api._write_lock:
+            for book_id, stock in updates:
+                api._write_fields(api._DB[book_id], {"stock": stock}, "patch")
+        api._response_cache.invalidate()
+
+    print(f"{args.books:,} books, {args.updates:,} stock-only updates")
+    print(f"{'store level':<34} {'updates/s':>12} {'us/update':>10}")
+    for label, fn in (("rebuild record (previous PATCH)", legacy),
+                      ("field-level, per PATCH", field_level),
+                      ("field-level, bulk (no pydantic)", field_level_bulk)):
+        seconds = min(timed(fn) for _ in range(2))
+        print(f"{label:<34} {args.updates / seconds:>12,.0f} {seconds / args.updates * 1e6:>10.2f}")
+    print(f"change records emitted: {next(changes):,}")
+    api._change_listeners.remove(count_change)
+
+    client = TestClient(api.app)
+    http = updates[:args.http_updates]
+    single = timed(lambda: [client.patch(f"/api/v2/books/{book_id}", json={"stock": stock}) for book_id, stock in http])
+
+    def bulk():
+        for start in range(0, len(http), args.bulk_size):
+            chunk = [{"id": book_id, "delta": 1} for book_id, _ in http[start:start + args.bulk_size]]
+            r = client.patch("/api/v2/books/stock", json={"updates": chunk})
+            assert r.status_code == 200, r.text
+
+    bulk_seconds = timed(bulk)
+    print(f"\nHTTP, {len(http):,} stock updates")
+    print(f"{'  single PATCH calls':<34} {len(http) / single:>12,.0f} updates/s")
+    print(f"{'  PATCH /api/v2/books/stock':<34} {len(http) / bulk_seconds:>12,.0f} updates/s "
+          f"({args.bulk_size:,} per call, {single / bulk_seconds:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Append-only, in-process log of the store's change records, for caches,
+search indexes and replicas that sync incrementally instead of polling
+full lists.
+
+    changes = ChangeLog()
+    _change_listeners.append(changes.append)   # every write, in order
+
+    with changes.subscriber():
+        entries, last = changes.read(since=cursor, limit=500)   # JSON bytes
+        await changes.wait(since=last, timeout=25)               # until there is more
+
+Every record gets a sequence number one above the previous one.
+Sequence numbers start at the log's creation time in microseconds, so
+a cursor from before a restart is always below the log (as is 0, a
+consumer with no cursor yet).
+
+Retention is bounded: the log keeps the newest `max_entries` records
+(CHANGEFEED_MAX_ENTRIES, default 100,000). A cursor whose successors were
+dropped, or that the log never issued, raises ChangesGone: the consumer
+resyncs from the full list, then continues from `ChangesGone.last`.
+
+Back-pressure: consumers pull by cursor from the shared log, in batches
+of at most `limit`, so nothing is buffered per consumer. A slow consumer
+does not slow writers or hold memory; once it falls behind retention it
+gets ChangesGone. Concurrent consumers (open streams, pending long
+polls) are capped at `max_subscribers` (CHANGEFEED_MAX_SUBSCRIBERS,
+default 64); past that, subscriber() raises TooManySubscribers.
+check_subscriber() answers the same without taking a slot, for callers
+that can only hold one later (a streaming body may never be started).
+
+Records are encoded to JSON once, on append. append() is called from the
+writing thread; wait() runs on an asyncio loop and is woken thread-safely.
+"""
+
+import asyncio
+import contextlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+try:  # orjson is optional; the fallback matches JSONResponse's compact output
+    import orjson
+
+    def _dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj)
+except ImportError:
+    def _dumps(obj: Any) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class ChangesGone(Exception):
+    """The cursor is outside the retained log; resync, then continue from `last`."""
+
+    def __init__(self, last: int):
+        super().__init__(f"changes no longer retained; resync and continue from {last}")
+        self.last = last
+
+
+class TooManySubscribers(Exception):
+    pass
+
+
+def _wake(future: "asyncio.Future") -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class ChangeLog:
+    def __init__(self, max_entries: Optional[int] = None, max_subscribers: Optional[int] = None, clock=time.time):
+        if max_entries is None:
+            max_entries = int(os.environ.get("CHANGEFEED_MAX_ENTRIES", "100000"))
+        if max_subscribers is None:
+            max_subscribers = int(os.environ.get("CHANGEFEED_MAX_SUBSCRIBERS", "64"))
+        self.max_entries = max_entries
+        self.max_subscribers = max_subscribers
+        self._subscribers = 0
+        self._lock = threading.Lock()
+        self._entries: List[bytes] = []  # JSON records; _entries[_head] has sequence number _first
+        self._head = 0
+        self._last = int(clock() * 1_000_000)  # sequence number of the newest record
+        self._first = self._last + 1
+        self._waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+
+    @property
+    def last(self) -> int:
+        return self._last
+
+    def __len__(self) -> int:
+        return len(self._entries) - self._head
+
+    def append(self, change: Dict[str, Any]) -> int:
+        """Add a change record; returns its sequence number."""
+        with self._lock:
+            seq = self._last + 1
+            self._entries.append(_dumps({"seq": seq, **change}))
+            self._last = seq
+            while len(self._entries) - self._head > self.max_entries:
+                self._entries[self._head] = None
+                self._head += 1
+                self._first += 1
+                if self._head >= self.max_entries:  # amortised O(1) compaction
+                    del self._entries[:self._head]
+                    self._head = 0
+            waiters, self._waiters = self._waiters, []
+        for loop, future in waiters:
+            try:
+                loop.call_soon_threadsafe(_wake, future)
+            except RuntimeError:  # that consumer's loop is already closed
+                pass
+        return seq
+
+    def read(self, since: int, limit: int = 500) -> Tuple[List[bytes], int]:
+        """
+        Up to `limit` records after sequence number `since`, oldest first,
+        and the sequence number of the last one returned (`since` when
+        there are none yet). Raises ChangesGone for a cursor outside the log.
+        """
+        with self._lock:
+            if since < self._first - 1 or since > self._last:
+                raise ChangesGone(self._last)
+            start = self._head + (since + 1 - self._first)
+            entries = self._entries[start:start + limit]
+            return entries, since + len(entries)
+
+    def check_subscriber(self) -> None:
+        """Raise TooManySubscribers if subscriber() would, without taking a slot."""
+        if self._subscribers >= self.max_subscribers:
+            raise TooManySubscribers(f"at most {self.max_subscribers} concurrent consumers")
+
+    @contextlib.contextmanager
+    def subscriber(self):
+        """Hold one of the `max_subscribers` consumer slots."""
+        with self._lock:
+            if self._subscribers >= self.max_subscribers:
+                raise TooManySubscribers(f"at most {self.max_subscribers} concurrent consumers")
+            self._subscribers += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._subscribers -= 1
+
+    async def wait(self, since: int, timeout: float) -> None:
+        """Return once there are records after `since`, or after `timeout` seconds."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        waiter = (loop, future)
+        with self._lock:
+            if self._last > since:
+                return
+            self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with self._lock:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
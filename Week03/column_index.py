@@ -0,0 +1,314 @@
+"""
+Column index for the GET /api/v2/books filters (q, currency, min_price,
+max_price).
+
+    columns = BookColumns()
+    columns.upsert(book)                                  # after every write
+    columns.replace(book)     # a new version whose filterable fields are unchanged
+    books = columns.matching(q=None, currency="USD", min_price=10, max_price=20)
+
+The store's records stay the source of truth; the index mirrors the
+filterable fields column-wise, one row per book in insertion order:
+
+- price amounts in a float64 array
+- currency as categorical codes (int32) plus a code table, so
+  `currency == "USD"` is one integer comparison over the column
+- "title author", lowered once per write instead of per row and request
+
+A price-range + currency query is one boolean-mask pass over the arrays.
+For narrow ranges a price-sorted row order finds the rows by binary
+search and only those are checked for currency. Rows whose price was
+written since the sort are kept aside and checked directly, so writes
+do not re-sort; the sort is redone lazily once too many piled up.
+
+`q` is matched against the lowered column: rare terms by str.find() over
+all rows joined into one string (C speed, work proportional to the
+hits), common ones with `in` over the rows the other filters left.
+Results keep the store's insertion order.
+
+Readers never take the lock. Every write publishes a new immutable
+snapshot with one attribute swap under the writers' lock, and
+matching() works on whichever snapshot it read first. A snapshot holds
+the row count, the columns and the rows written since the columns were
+last copied. Appends fill rows past every published row count, so they
+share the columns. Writes to existing rows go into the snapshot's
+`patched` map (row -> record), which readers check row by row, and every
+PATCHED_ROWS such writes the columns are copied with those rows folded
+in. The price sort and the joined text are built lazily by the first
+reader that needs them and cached on its snapshot. Two readers racing on
+that build the same value, and later writes carry it forward while it is
+still valid.
+
+numpy is optional: without it `np` is None and callers keep their
+per-row loop.
+"""
+
+import threading
+from bisect import bisect_right
+from itertools import islice
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency
+    np = None
+
+# a price range matching at most this share of the rows goes through the
+# sorted index; wider ranges are cheaper as a full mask pass
+NARROW_RANGE = 0.1
+
+# written rows a snapshot checks one by one before the columns are copied
+# with them folded in: bounds the per-query loop, amortizes the copy
+PATCHED_ROWS = 256
+
+_SEPARATOR = "\x00"
+
+
+def _search_text(book) -> str:
+    return f"{book.title} {book.author}".lower()
+
+
+class _PriceSort(NamedTuple):
+    rows: "np.ndarray"        # rows sorted by price
+    prices: "np.ndarray"      # their prices
+    moved: FrozenSet[int]     # rows added / repriced in the columns since the sort
+
+
+class _Snapshot:
+    """One published state of the index. Never changed after publishing,
+    except for filling in the lazily built `sort` and `text`."""
+
+    __slots__ = ("n", "books", "price", "currency", "codes", "search", "patched", "sort", "text")
+
+    def __init__(self, n, books, price, currency, codes, search, patched,
+                 sort: Optional[_PriceSort] = None,
+                 text: Optional[Tuple[str, List[int]]] = None):
+        self.n = n                # rows 0..n-1 are valid; the columns may be longer
+        self.books = books
+        self.price = price
+        self.currency = currency
+        self.codes = codes        # currency -> code; only ever grows
+        self.search = search      # row -> lowered "title author" (may be longer than n)
+        self.patched = patched    # row -> record written since the columns were copied
+        self.sort = sort
+        self.text = text          # (search joined by _SEPARATOR, row -> offset)
+
+
+class BookColumns:
+    def __init__(self, capacity: int = 1024):
+        self._lock = threading.Lock()  # serializes writers only
+        self._row: Dict[int, int] = {}  # book id -> row
+        self._books = np.empty(capacity, object)  # row -> record
+        self._price = np.empty(capacity, np.float64)
+        self._currency = np.empty(capacity, np.int32)
+        self._codes: Dict[str, int] = {}  # currency -> code
+        self._search: List[str] = []      # row -> lowered "title author"
+        self._n = 0
+        self._snapshot = self._publish({}, None, None)
+
+    def __len__(self) -> int:
+        return self._snapshot.n
+
+    def rebuild(self, books) -> None:
+        """Replace the whole index with `books` (in store order)."""
+        books = list(books)
+        n = len(books)
+        with self._lock:
+            self._row = {b.id: row for row, b in enumerate(books)}
+            self._books = np.empty(n, object)
+            self._books[:] = books
+            self._price = np.fromiter((b.price_amount for b in books), np.float64, n)
+            self._currency = np.fromiter((self._code(b.currency) for b in books), np.int32, n)
+            self._search = [_search_text(b) for b in books]
+            self._n = n
+            self._snapshot = self._publish({}, None, None)
+
+    def upsert(self, book) -> None:
+        """Index a new book or re-index a written one."""
+        with self._lock:
+            current = self._snapshot
+            code = self._code(book.currency)
+            row = self._row.get(book.id)
+            if row is not None:
+                self._patch(current, row, book)
+                return
+            # a new row lies past every published n: no reader looks at it
+            row = self._row[book.id] = self._n
+            if row == len(self._price):
+                self._grow()
+            self._books[row] = book
+            self._price[row] = book.price_amount
+            self._currency[row] = code
+            self._search.append(_search_text(book))
+            self._n += 1
+            self._snapshot = self._publish(current.patched, _moved(current.sort, [row], self._n), None)
+
+    def replace(self, book) -> None:
+        """Point an indexed book's row at its new record (no filterable field changed)."""
+        with self._lock:
+            self._patch(self._snapshot, self._row[book.id], book)
+
+    def matching(self, q: Optional[str] = None, currency: Optional[str] = None,
+                 min_price: Optional[float] = None, max_price: Optional[float] = None) -> List:
+        """Books passing every given filter, in store order (same semantics as the per-row loop)."""
+        snap = self._snapshot
+        n = snap.n
+        if not n:
+            return []
+        code = None
+        if currency:
+            code = snap.codes.get(currency)
+            if code is None:
+                return []
+        rows = None
+        if min_price is not None or max_price is not None:
+            rows = _price_rows(snap, min_price, max_price)
+        if rows is None:
+            mask = np.ones(n, bool)
+            if code is not None:
+                mask &= snap.currency[:n] == code
+            if min_price is not None:
+                mask &= snap.price[:n] >= min_price
+            if max_price is not None:
+                mask &= snap.price[:n] <= max_price
+            rows = np.flatnonzero(mask)
+        else:
+            if code is not None:
+                rows = rows[snap.currency[rows] == code]
+            rows.sort()
+        patched = snap.patched
+        if patched:
+            # the columns are stale for patched rows: check their records instead
+            rows = rows[~np.isin(rows, np.fromiter(patched, np.int64, len(patched)))]
+        if q:
+            q = q.lower()
+            rows = _text_rows(snap, q, rows)
+        if not patched:
+            return snap.books[rows].tolist()
+        hits = sorted(row for row, b in patched.items()
+                      if (not q or q in _search_text(b))
+                      and (not currency or b.currency == currency)
+                      and (min_price is None or b.price_amount >= min_price)
+                      and (max_price is None or b.price_amount <= max_price))
+        if not hits:
+            return snap.books[rows].tolist()
+        hits = np.array(hits, np.int64)
+        rows = np.sort(np.concatenate((rows, hits)))  # disjoint: patched rows were dropped above
+        books = snap.books[rows]
+        books[np.searchsorted(rows, hits)] = [patched[row] for row in hits.tolist()]
+        return books.tolist()
+
+    # --- writer internals (called with the lock held) --------------------
+
+    def _publish(self, patched, sort: Optional[_PriceSort], text) -> _Snapshot:
+        return _Snapshot(self._n, self._books, self._price, self._currency,
+                         self._codes, self._search, patched, sort, text)
+
+    def _patch(self, current: _Snapshot, row: int, book) -> None:
+        patched = dict(current.patched)
+        patched[row] = book
+        if len(patched) <= PATCHED_ROWS:
+            self._snapshot = self._publish(patched, current.sort, current.text)
+            return
+        # fold the written rows into fresh copies of the columns
+        n = self._n
+        self._books = self._books[:n].copy()
+        self._price = self._price[:n].copy()
+        self._currency = self._currency[:n].copy()
+        self._search = self._search[:n]
+        text = current.text
+        for row, book in patched.items():
+            self._books[row] = book
+            self._price[row] = book.price_amount
+            self._currency[row] = self._codes[book.currency]
+            search = _search_text(book)
+            if search != self._search[row]:
+                self._search[row] = search
+                text = None
+        self._snapshot = self._publish({}, _moved(current.sort, patched, n), text)
+
+    def _code(self, currency: str) -> int:
+        code = self._codes.get(currency)
+        if code is None:
+            code = self._codes[currency] = len(self._codes)
+        return code
+
+    def _grow(self) -> None:
+        capacity = max(2 * len(self._price), 1024)
+        for name in ("_books", "_price", "_currency"):
+            old = getattr(self, name)
+            new = np.empty(capacity, old.dtype)
+            new[:self._n] = old[:self._n]
+            setattr(self, name, new)
+
+
+def _moved(sort: Optional[_PriceSort], rows, n: int) -> Optional[_PriceSort]:
+    """`sort` with `rows` marked as moved, or None once too many have."""
+    if sort is None:
+        return None
+    moved = sort.moved.union(rows)
+    if len(moved) > max(1024, n // 64):
+        return None  # re-sort on the next narrow query
+    return sort._replace(moved=moved)
+
+
+# --- reader internals (work on one snapshot, no lock) ----------------------
+
+def _price_rows(snap: _Snapshot, min_price, max_price):
+    """Unsorted rows in [min_price, max_price], or None when a mask pass is cheaper."""
+    n = snap.n
+    sort = snap.sort
+    if sort is None:
+        by_price = np.argsort(snap.price[:n], kind="stable")
+        sort = snap.sort = _PriceSort(by_price, snap.price[by_price], frozenset())
+    prices = sort.prices
+    lo = 0 if min_price is None else int(np.searchsorted(prices, min_price, "left"))
+    hi = len(prices) if max_price is None else int(np.searchsorted(prices, max_price, "right"))
+    moved = sort.moved
+    if hi - lo + len(moved) > n * NARROW_RANGE:
+        return None
+    rows = sort.rows[lo:max(lo, hi)]
+    if not moved:
+        return rows.copy()
+    # sorted positions of moved rows are stale: take them all and
+    # check every candidate against its current price
+    rows = np.union1d(rows, np.fromiter(moved, np.int64, len(moved)))
+    price = snap.price[rows]
+    keep = np.ones(len(rows), bool)
+    if min_price is not None:
+        keep &= price >= min_price
+    if max_price is not None:
+        keep &= price <= max_price
+    return rows[keep]
+
+
+def _text_rows(snap: _Snapshot, q: str, rows: "np.ndarray") -> "np.ndarray":
+    search = snap.search
+    n = snap.n
+    if _SEPARATOR not in q:  # otherwise a hit could span rows in the joined text
+        if snap.text is None:
+            starts, offset = [], 0
+            for text in islice(search, n):
+                starts.append(offset)
+                offset += len(text) + 1
+            snap.text = (_SEPARATOR.join(islice(search, n)), starts)
+        text, starts = snap.text
+        # rare terms: visit only the hits, giving up once they are too
+        # many to beat testing every remaining row
+        limit = len(rows) // 64
+        hits = []
+        find = text.find
+        pos = find(q)
+        while pos != -1 and len(hits) <= limit:
+            row = bisect_right(starts, pos) - 1
+            hits.append(row)
+            if row + 1 >= n:
+                pos = -1
+                break
+            pos = find(q, starts[row + 1])  # one hit per row is enough
+        if pos == -1:
+            hits = np.array(hits, np.int64)
+            return hits if len(rows) == n else np.intersect1d(rows, hits, assume_unique=True)
+    if len(rows) == n:
+        return np.flatnonzero(np.fromiter((q in text for text in islice(search, n)), bool, n))
+    return rows[np.fromiter((q in search[row] for row in rows.tolist()), bool, len(rows))]
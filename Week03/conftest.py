@@ -0,0 +1,14 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import extensibility as api
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """Test client over a freshly seeded two-book store."""
+    monkeypatch.setattr(api, "_NEXT_ID", 1)
+    api._load([])
+    api._seed()
+    with TestClient(api.app) as client:
+        yield client
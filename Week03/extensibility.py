@@ -4,16 +4,29 @@
 # - v1: price = float, year
 # - v2: price = {amount, currency}, published_year, stock
 # - Methods: GET, POST, PUT, PATCH (UPDATE)
+# - Change feed: GET /api/changes (long-poll), /api/changes/stream (SSE)
 # - Lưu trữ in-memory (demo)
 # ===========================================
 
-from typing import List, Optional, Dict
-from fastapi import FastAPI, HTTPException, Path, Query
-from fastapi.responses import RedirectResponse
+import sys
+import threading
+from typing import Any, Callable, List, Optional, Dict
+from fastapi import Body, FastAPI, HTTPException, Path, Query, Request
+from fastapi.responses import JSONResponse, RedirectResponse, Response, StreamingResponse
 from pydantic import BaseModel, Field
 
+# common/ resolves from the repo root: run with PYTHONPATH=<repo root> (see common/__init__.py)
+from common.response_cache import ResponseCache
+from changefeed import ChangeLog, ChangesGone, TooManySubscribers
+from column_index import BookColumns, np
+from projections import ProjectionRegistry
+
 app = FastAPI(title="Book Management API (v1 & v2)", version="1.0.0")
 
+# Server-side cache for the list endpoints; v1 and v2 share the store,
+# so any write invalidates both
+_response_cache = ResponseCache("week03:books")
+
 
 # Small root endpoint to avoid 404 at GET /
 @app.get("/", include_in_schema=False)
@@ -24,20 +37,41 @@ def root():
 # -----------------------------
 # Internal canonical model (v2-like)
 # -----------------------------
-class _InternalBook(BaseModel):
-    id: int
-    title: str
-    author: str
-    price_amount: float
-    currency: str = "USD"
-    published_year: Optional[int] = None
-    stock: int = 0
+class _InternalBook:
+    """
+    Plain slotted record, not a pydantic model: input is validated by the
+    v1/v2 schemas before it gets here, so the store only holds values.
+    No per-instance __dict__ and interned currency codes keep a record at
+    ~1/4 of a pydantic model's footprint.
+
+    `version` counts the record's writes (cached JSON fragments are
+    checked against it). A stored record is never modified: PUT / PATCH
+    build a new one under _write_lock and swap it into _DB in a single
+    assignment (see _write_fields), so a reader always sees a whole
+    version of the book.
+    """
+    __slots__ = ("id", "title", "author", "price_amount", "currency", "published_year", "stock", "version")
+
+    def __init__(self, id: int, title: str, author: str, price_amount: float, currency: str = "USD",
+                 published_year: Optional[int] = None, stock: int = 0, version: int = 1):
+        self.id = id
+        self.title = title
+        self.author = author
+        self.price_amount = price_amount
+        self.currency = sys.intern(currency)
+        self.published_year = published_year
+        self.stock = stock
+        self.version = version
 
 
 # In-memory "database"
 _DB: Dict[int, _InternalBook] = {}
 _NEXT_ID = 1
 
+# Column-wise mirror of the filterable fields for the list endpoints
+# (column_index.py); None without numpy, the endpoints then filter row by row
+_columns = BookColumns() if np is not None else None
+
 
 def _next_id() -> int:
     global _NEXT_ID
@@ -46,6 +80,89 @@ def _next_id() -> int:
     return nid
 
 
+# Writers take this lock (ids, read-modify-write of stock); readers never do
+_write_lock = threading.RLock()
+
+# fields a write can set, and those the column index filters on
+_FIELDS = ("title", "author", "price_amount", "currency", "published_year", "stock")
+_INDEXED = frozenset(("title", "author", "price_amount", "currency"))
+
+# Change records, one per write that changed something:
+#   {"op": "create" | "put" | "patch", "id": 1, "version": 3, "fields": {"stock": 7}}
+# `fields` holds the internal fields the write set (all of them on create).
+# Consumers subscribe with _change_listeners.append(callback); callbacks
+# run in the writing request, under _write_lock, and must not block.
+_change_listeners: List[Callable[[Dict[str, Any]], None]] = []
+
+# ... one of them the change feed's log (changefeed.py, endpoints at the end)
+_changes = ChangeLog()
+_change_listeners.append(_changes.append)
+
+
+def _emit_change(op: str, b: _InternalBook, fields: Dict[str, Any]) -> None:
+    change = {"op": op, "id": b.id, "version": b.version, "fields": fields}
+    for listener in _change_listeners:
+        listener(change)
+
+
+def _save(b: _InternalBook) -> None:
+    """Store a new record: the dict, the column index, the change record and the list cache."""
+    with _write_lock:
+        _DB[b.id] = b
+        if _columns is not None:
+            _columns.upsert(b)
+        _emit_change("create", b, {name: getattr(b, name) for name in _FIELDS})
+    _response_cache.invalidate()
+
+
+def _write_fields(b: _InternalBook, fields: Dict[str, Any], op: str) -> _InternalBook:
+    """
+    Copy-on-write: store a new version of `b` with `fields` (internal
+    name -> already validated value) written over it. Returns the stored
+    record, `b` itself when no value differed (no new version, no change
+    record). Call with _write_lock held.
+    """
+    changed = {name: value for name, value in fields.items() if getattr(b, name) != value}
+    if not changed:
+        return b
+    if "currency" in changed:
+        changed["currency"] = sys.intern(changed["currency"])
+    values = {name: getattr(b, name) for name in _FIELDS}
+    values.update(changed)
+    new = _InternalBook(id=b.id, version=b.version + 1, **values)
+    _DB[b.id] = new  # one assignment: readers get the old record or the new one
+    if _columns is not None:
+        if _INDEXED.isdisjoint(changed):
+            _columns.replace(new)
+        else:
+            _columns.upsert(new)
+    _emit_change(op, new, changed)
+    return new
+
+
+def _update(book_id: int, fields: Dict[str, Any], op: str) -> _InternalBook:
+    """PUT / PATCH one record; returns the stored version, list cache invalidated when something changed."""
+    with _write_lock:
+        b = _DB.get(book_id)
+        if not b:
+            raise HTTPException(status_code=404, detail="Book not found")
+        new = _write_fields(b, fields, op)
+    if new is not b:
+        _response_cache.invalidate()
+    return new
+
+
+def _load(books) -> None:
+    """Replace the whole store (bulk loads, benchmarks)."""
+    with _write_lock:
+        _DB.clear()
+        _DB.update((b.id, b) for b in books)
+        if _columns is not None:
+            _columns.rebuild(_DB.values())
+        _projections.clear()  # fragments of the replaced records
+    _response_cache.invalidate()
+
+
 # -----------------------------
 # v1 Schemas (projection)
 # -----------------------------
@@ -113,16 +230,40 @@ class BookV2UpdatePATCH(BaseModel):
 
 
 # -----------------------------
-# Mapping helpers v1 <-> internal, v2 <-> internal
+# Projections internal -> v1 / v2, compiled once (see projections.py).
+# GET endpoints send their cached JSON fragments (re-encoded only when
+# the record's version changed); _to_v1 / _to_v2 give the same shape as
+# a dict, for the write endpoints' response_model
+# -----------------------------
+_projections = ProjectionRegistry()
+_V1 = _projections.register("v1", {
+    "id": "id",
+    "title": "title",
+    "author": "author",
+    "price": "price_amount",
+    "year": "published_year",
+})
+_V2 = _projections.register("v2", {
+    "id": "id",
+    "title": "title",
+    "author": "author",
+    "price": {"amount": "price_amount", "currency": "currency"},
+    "published_year": "published_year",
+    "stock": "stock",
+})
+_to_v1 = _V1.to_dict
+_to_v2 = _V2.to_dict
+
+
+def _json(body: bytes) -> Response:
+    return Response(body, media_type="application/json")
+
+
+# -----------------------------
+# Mapping helpers v1 -> internal, v2 -> internal
+# PUT / PATCH map the (already validated) payload to the internal fields
+# it sets; _update stores a new version of the record with those written over it
 # -----------------------------
-def _to_v1(b: _InternalBook) -> BookV1:
-    return BookV1(
-        id=b.id,
-        title=b.title,
-        author=b.author,
-        price=b.price_amount,
-        year=b.published_year
-    )
 
 def _from_v1_create(payload: BookV1Create) -> _InternalBook:
     return _InternalBook(
@@ -135,37 +276,23 @@ def _from_v1_create(payload: BookV1Create) -> _InternalBook:
         stock=0                              # v1 không có stock, mặc định 0
     )
 
-def _apply_v1_put(existing: _InternalBook, payload: BookV1UpdatePUT) -> _InternalBook:
-    return _InternalBook(
-        id=existing.id,
-        title=payload.title,
-        author=payload.author,
-        price_amount=payload.price,
-        currency=existing.currency,          # giữ nguyên currency
-        published_year=payload.year,
-        stock=existing.stock                 # v1 không thao tác stock
-    )
-
-def _apply_v1_patch(existing: _InternalBook, patch: BookV1UpdatePATCH) -> _InternalBook:
-    return _InternalBook(
-        id=existing.id,
-        title=patch.title if patch.title is not None else existing.title,
-        author=patch.author if patch.author is not None else existing.author,
-        price_amount=patch.price if patch.price is not None else existing.price_amount,
-        currency=existing.currency,
-        published_year=patch.year if patch.year is not None else existing.published_year,
-        stock=existing.stock
-    )
-
-def _to_v2(b: _InternalBook) -> BookV2:
-    return BookV2(
-        id=b.id,
-        title=b.title,
-        author=b.author,
-        price=PriceV2(amount=b.price_amount, currency=b.currency),
-        published_year=b.published_year,
-        stock=b.stock
-    )
+def _v1_put_fields(payload: BookV1UpdatePUT) -> Dict[str, Any]:
+    # giữ nguyên currency, v1 không thao tác stock
+    return {
+        "title": payload.title,
+        "author": payload.author,
+        "price_amount": payload.price,
+        "published_year": payload.year,
+    }
+
+def _v1_patch_fields(patch: BookV1UpdatePATCH) -> Dict[str, Any]:
+    fields = {
+        "title": patch.title,
+        "author": patch.author,
+        "price_amount": patch.price,
+        "published_year": patch.year,
+    }
+    return {name: value for name, value in fields.items() if value is not None}
 
 def _from_v2_create(payload: BookV2Create) -> _InternalBook:
     return _InternalBook(
@@ -178,27 +305,27 @@ def _from_v2_create(payload: BookV2Create) -> _InternalBook:
         stock=payload.stock
     )
 
-def _apply_v2_put(existing: _InternalBook, payload: BookV2UpdatePUT) -> _InternalBook:
-    return _InternalBook(
-        id=existing.id,
-        title=payload.title,
-        author=payload.author,
-        price_amount=payload.price.amount,
-        currency=payload.price.currency,
-        published_year=payload.published_year,
-        stock=payload.stock
-    )
-
-def _apply_v2_patch(existing: _InternalBook, patch: BookV2UpdatePATCH) -> _InternalBook:
-    return _InternalBook(
-        id=existing.id,
-        title=patch.title if patch.title is not None else existing.title,
-        author=patch.author if patch.author is not None else existing.author,
-        price_amount=patch.price.amount if (patch.price and patch.price.amount is not None) else existing.price_amount,
-        currency=patch.price.currency if (patch.price and patch.price.currency is not None) else existing.currency,
-        published_year=patch.published_year if patch.published_year is not None else existing.published_year,
-        stock=patch.stock if patch.stock is not None else existing.stock
-    )
+def _v2_put_fields(payload: BookV2UpdatePUT) -> Dict[str, Any]:
+    return {
+        "title": payload.title,
+        "author": payload.author,
+        "price_amount": payload.price.amount,
+        "currency": payload.price.currency,
+        "published_year": payload.published_year,
+        "stock": payload.stock,
+    }
+
+def _v2_patch_fields(patch: BookV2UpdatePATCH) -> Dict[str, Any]:
+    fields = {
+        "title": patch.title,
+        "author": patch.author,
+        "published_year": patch.published_year,
+        "stock": patch.stock,
+    }
+    if patch.price:
+        fields["price_amount"] = patch.price.amount
+        fields["currency"] = patch.price.currency
+    return {name: value for name, value in fields.items() if value is not None}
 
 
 # -----------------------------
@@ -210,8 +337,8 @@ def _seed():
         return
     s1 = _InternalBook(id=_next_id(), title="Clean Code", author="Robert C. Martin", price_amount=25.5, currency="USD", published_year=2008, stock=10)
     s2 = _InternalBook(id=_next_id(), title="Design Patterns", author="Erich Gamma", price_amount=30.0, currency="USD", published_year=1994, stock=5)
-    _DB[s1.id] = s1
-    _DB[s2.id] = s2
+    _save(s1)
+    _save(s2)
 
 _seed()
 
@@ -220,64 +347,55 @@ _seed()
 # API v1 - Books (price = float, year)
 # =============================================================================
 
-@app.get("/api/v1/books", response_model=List[BookV1], tags=["Books (v1)"])
+@app.get("/api/v1/books", responses={200: {"model": List[BookV1]}}, tags=["Books (v1)"])
+@_response_cache.fastapi(version="v1")
 def list_books_v1(
     q: Optional[str] = Query(None, description="Tìm theo title/author (chứa chuỗi)")
 ):
-    result = []
-    for b in _DB.values():
-        if q:
-            text = f"{b.title} {b.author}".lower()
-            if q.lower() not in text:
-                continue
-        result.append(_to_v1(b))
-    return result
+    if _columns is not None:
+        result = _columns.matching(q=q)
+    else:
+        result = []
+        for b in _DB.values():
+            if q:
+                text = f"{b.title} {b.author}".lower()
+                if q.lower() not in text:
+                    continue
+            result.append(b)
+    # cached BookV1-shaped fragments: no per-item model or validation
+    return _json(_V1.encode_many(result))
 
 @app.get("/api/v1/books/{book_id}", response_model=BookV1, tags=["Books (v1)"])
 def get_book_v1(book_id: int = Path(..., ge=1)):
     b = _DB.get(book_id)
     if not b:
         raise HTTPException(status_code=404, detail="Book not found")
-    return _to_v1(b)
+    return _json(_V1.encode(b))
 
 @app.post("/api/v1/books", response_model=BookV1, status_code=201, tags=["Books (v1)"])
 def create_book_v1(payload: BookV1Create):
-    b = _from_v1_create(payload)
-    _DB[b.id] = b
+    with _write_lock:
+        b = _from_v1_create(payload)
+        _save(b)
     return _to_v1(b)
 
 @app.put("/api/v1/books/{book_id}", response_model=BookV1, tags=["Books (v1)"])
 def update_book_put_v1(book_id: int, payload: BookV1UpdatePUT):
-    existing = _DB.get(book_id)
-    if not existing:
-        raise HTTPException(status_code=404, detail="Book not found")
-    updated = _apply_v1_put(existing, payload)
-    _DB[book_id] = updated
-    return _to_v1(updated)
+    return _to_v1(_update(book_id, _v1_put_fields(payload), "put"))
 
 @app.patch("/api/v1/books/{book_id}", response_model=BookV1, tags=["Books (v1)"])
 def update_book_patch_v1(book_id: int, patch: BookV1UpdatePATCH):
-    existing = _DB.get(book_id)
-    if not existing:
-        raise HTTPException(status_code=404, detail="Book not found")
-    updated = _apply_v1_patch(existing, patch)
-    _DB[book_id] = updated
-    return _to_v1(updated)
+    return _to_v1(_update(book_id, _v1_patch_fields(patch), "patch"))
 
 
 # =============================================================================
 # API v2 - Books (price = {amount, currency}, published_year, stock)
 # =============================================================================
 
-@app.get("/api/v2/books", response_model=List[BookV2], tags=["Books (v2)"])
-def list_books_v2(
-    q: Optional[str] = Query(None, description="Tìm theo title/author (chứa chuỗi)"),
-    min_price: Optional[float] = Query(None, ge=0, description="Lọc giá tối thiểu (amount)"),
-    max_price: Optional[float] = Query(None, ge=0, description="Lọc giá tối đa (amount)"),
-    currency: Optional[str] = Query(None, min_length=3, max_length=3, description="Mã tiền tệ ISO (ví dụ USD, VND)")
-):
+def _filter_v2(books, q, currency, min_price, max_price) -> List[_InternalBook]:
+    """Row-by-row filter for list_books_v2 (without numpy)."""
     result = []
-    for b in _DB.values():
+    for b in books:
         if q:
             text = f"{b.title} {b.author}".lower()
             if q.lower() not in text:
@@ -288,36 +406,179 @@ def list_books_v2(
             continue
         if max_price is not None and b.price_amount > max_price:
             continue
-        result.append(_to_v2(b))
+        result.append(b)
     return result
 
+@app.get("/api/v2/books", responses={200: {"model": List[BookV2]}}, tags=["Books (v2)"])
+@_response_cache.fastapi(version="v2")
+def list_books_v2(
+    q: Optional[str] = Query(None, description="Tìm theo title/author (chứa chuỗi)"),
+    min_price: Optional[float] = Query(None, ge=0, description="Lọc giá tối thiểu (amount)"),
+    max_price: Optional[float] = Query(None, ge=0, description="Lọc giá tối đa (amount)"),
+    currency: Optional[str] = Query(None, min_length=3, max_length=3, description="Mã tiền tệ ISO (ví dụ USD, VND)")
+):
+    if _columns is not None:
+        # one mask pass over the price / currency columns (see column_index.py)
+        result = _columns.matching(q=q, currency=currency, min_price=min_price, max_price=max_price)
+    else:
+        result = _filter_v2(_DB.values(), q, currency, min_price, max_price)
+    # cached BookV2-shaped fragments: no per-item model or validation
+    return _json(_V2.encode_many(result))
+
 @app.get("/api/v2/books/{book_id}", response_model=BookV2, tags=["Books (v2)"])
 def get_book_v2(book_id: int = Path(..., ge=1)):
     b = _DB.get(book_id)
     if not b:
         raise HTTPException(status_code=404, detail="Book not found")
-    return _to_v2(b)
+    return _json(_V2.encode(b))
 
 @app.post("/api/v2/books", response_model=BookV2, status_code=201, tags=["Books (v2)"])
 def create_book_v2(payload: BookV2Create):
-    b = _from_v2_create(payload)
-    _DB[b.id] = b
+    with _write_lock:
+        b = _from_v2_create(payload)
+        _save(b)
     return _to_v2(b)
 
 @app.put("/api/v2/books/{book_id}", response_model=BookV2, tags=["Books (v2)"])
 def update_book_put_v2(book_id: int, payload: BookV2UpdatePUT):
-    existing = _DB.get(book_id)
-    if not existing:
-        raise HTTPException(status_code=404, detail="Book not found")
-    updated = _apply_v2_put(existing, payload)
-    _DB[book_id] = updated
-    return _to_v2(updated)
+    return _to_v2(_update(book_id, _v2_put_fields(payload), "put"))
+
+# Bulk stock deltas for inventory sync: one call, one lock, one cache
+# invalidation for thousands of updates. Items are checked by hand (ids and
+# deltas only) instead of through a pydantic model per item.
+MAX_STOCK_UPDATES = 10_000
+
+def _stock_delta(item) -> Optional[str]:
+    """Why a stock update item is invalid, or None."""
+    if not isinstance(item, dict):
+        return "Update must be an object"
+    book_id, delta = item.get("id"), item.get("delta")
+    if not isinstance(book_id, int) or isinstance(book_id, bool) or book_id < 1:
+        return "id must be a positive integer"
+    if not isinstance(delta, int) or isinstance(delta, bool):
+        return "delta must be an integer"
+    return None
+
+@app.patch("/api/v2/books/stock", tags=["Books (v2)"])
+def patch_stock_v2(payload: Any = Body(..., example={"updates": [{"id": 1, "delta": -2}, {"id": 2, "delta": 5}]})):
+    """
+    Apply stock deltas: `{"updates": [{"id": 1, "delta": -2}, ...]}` (at most
+    MAX_STOCK_UPDATES). Each update applies on its own, in order; one
+    result per update: 200 with the new stock and version, 400 invalid
+    item, 404 unknown book, 409 when stock would go below zero. Overall
+    200 when all applied, 207 otherwise.
+    """
+    updates = payload.get("updates") if isinstance(payload, dict) else None
+    if not isinstance(updates, list) or not updates:
+        return JSONResponse({"detail": 'Expected {"updates": [{"id": ..., "delta": ...}, ...]}'}, status_code=400)
+    if len(updates) > MAX_STOCK_UPDATES:
+        return JSONResponse({"detail": f"At most {MAX_STOCK_UPDATES} updates per call"}, status_code=413)
+
+    results, applied = [], 0
+    with _write_lock:
+        for item in updates:
+            error = _stock_delta(item)
+            if error:
+                results.append({"status": 400, "error": error})
+                continue
+            book_id = item["id"]
+            b = _DB.get(book_id)
+            if b is None:
+                results.append({"id": book_id, "status": 404, "error": "Book not found"})
+                continue
+            stock = b.stock + item["delta"]
+            if stock < 0:
+                results.append({"id": book_id, "status": 409, "error": "Stock would go below zero", "stock": b.stock})
+                continue
+            new = _write_fields(b, {"stock": stock}, "patch")
+            applied += new is not b
+            results.append({"id": book_id, "status": 200, "stock": stock, "version": new.version})
+    if applied:
+        _response_cache.invalidate()
+    failed = any(r["status"] != 200 for r in results)
+    return JSONResponse({"results": results}, status_code=207 if failed else 200)
 
 @app.patch("/api/v2/books/{book_id}", response_model=BookV2, tags=["Books (v2)"])
 def update_book_patch_v2(book_id: int, patch: BookV2UpdatePATCH):
-    existing = _DB.get(book_id)
-    if not existing:
-        raise HTTPException(status_code=404, detail="Book not found")
-    updated = _apply_v2_patch(existing, patch)
-    _DB[book_id] = updated
-    return _to_v2(updated)
+    return _to_v2(_update(book_id, _v2_patch_fields(patch), "patch"))
+
+
+# =============================================================================
+# Change feed: every create / PUT / PATCH as a change record with a sequence
+# number (changefeed.py). A consumer without a cursor asks for one
+# (GET /api/changes?timeout=0), loads the full list, then follows from it;
+# 410 Gone means it fell behind retention (or the server restarted):
+# reload, then continue from the `next` in the answer.
+# =============================================================================
+_HEARTBEAT = 15  # seconds between SSE keep-alive comments
+
+def _busy(error: TooManySubscribers) -> JSONResponse:
+    return JSONResponse({"detail": str(error)}, status_code=503, headers={"Retry-After": "1"})
+
+@app.get("/api/changes", tags=["Changes"])
+async def poll_changes(
+    since: Optional[int] = Query(None, description="Sequence number of the last change seen (`next` of the previous answer); omitted: from now"),
+    limit: int = Query(500, ge=1, le=5000, description="Most changes per answer"),
+    timeout: float = Query(25, ge=0, le=60, description="Seconds to wait when there is nothing new"),
+):
+    """Long-poll: `{"changes": [...], "next": N}`, waiting up to `timeout` for the first change after `since`."""
+    if since is None:
+        since = _changes.last
+    try:
+        with _changes.subscriber():
+            entries, last = _changes.read(since, limit)
+            if not entries and timeout:
+                await _changes.wait(since, timeout)
+                entries, last = _changes.read(since, limit)
+    except ChangesGone as gone:
+        return JSONResponse({"detail": str(gone), "next": gone.last}, status_code=410)
+    except TooManySubscribers as error:
+        return _busy(error)
+    return _json(b'{"changes":[' + b",".join(entries) + b'],"next":%d}' % last)
+
+@app.get("/api/changes/stream", tags=["Changes"])
+async def stream_changes(
+    request: Request,
+    since: Optional[int] = Query(None, description="Sequence number of the last change seen; omitted: from now"),
+):
+    """
+    Server-Sent Events: one `change` event per record, its sequence number
+    as the event id (a reconnecting EventSource resumes from Last-Event-ID).
+    A cursor outside the log gets one `reset` event with the `next` cursor
+    and the stream ends. Records are read from the shared log at the
+    client's pace; nothing is queued per client.
+    """
+    last_event_id = request.headers.get("last-event-id", "")
+    if last_event_id.isdigit():
+        since = int(last_event_id)
+    if since is None:
+        since = _changes.last
+    try:
+        _changes.check_subscriber()  # the slot itself is held by the body, only while it runs
+    except TooManySubscribers as error:
+        return _busy(error)
+
+    async def events():
+        yield b"retry: 3000\n\n"
+        try:
+            with _changes.subscriber():
+                cursor = since
+                while True:
+                    try:
+                        entries, last = _changes.read(cursor, 500)
+                    except ChangesGone as gone:
+                        yield b'event: reset\ndata: {"next":%d}\n\n' % gone.last
+                        return
+                    if entries:
+                        yield b"".join(b"id: %d\nevent: change\ndata: %s\n\n" % (seq, entry)
+                                       for seq, entry in zip(range(cursor + 1, last + 1), entries))
+                        cursor = last
+                        continue
+                    await _changes.wait(cursor, _HEARTBEAT)
+                    if _changes.last == cursor:
+                        yield b": keep-alive\n\n"
+        except TooManySubscribers:
+            return  # slots filled up since the check: the client reconnects after `retry`
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
@@ -0,0 +1,90 @@
+import asyncio
+import json
+import threading
+
+import pytest
+
+import extensibility as api
+from changefeed import ChangeLog, ChangesGone, TooManySubscribers
+
+
+def _log(**kwargs):
+    return ChangeLog(clock=lambda: 1.0, **kwargs)
+
+
+def test_sequence_numbers_count_up_from_the_creation_time():
+    log = _log()
+    assert log.last == 1_000_000
+    assert [log.append({"op": "create", "id": i}) for i in (1, 2)] == [1_000_001, 1_000_002]
+    entries, last = log.read(1_000_000)
+    assert [json.loads(entry) for entry in entries] == [
+        {"seq": 1_000_001, "op": "create", "id": 1}, {"seq": 1_000_002, "op": "create", "id": 2},
+    ]
+    assert last == 1_000_002
+    assert log.read(1_000_002) == ([], 1_000_002)
+    assert log.read(1_000_000, limit=1)[1] == 1_000_001
+
+
+@pytest.mark.parametrize("since", [0, 1_000_001, 1_000_006])
+def test_cursors_outside_the_retained_log_are_gone(since):
+    log = _log(max_entries=3)
+    for i in range(5):
+        log.append({"id": i})
+    assert len(log) == 3
+    with pytest.raises(ChangesGone) as gone:
+        log.read(since)
+    assert gone.value.last == 1_000_005
+    assert [json.loads(e)["id"] for e in log.read(1_000_002)[0]] == [2, 3, 4]
+
+
+def test_subscriber_slots_are_capped_and_released():
+    log = _log(max_subscribers=1)
+    with log.subscriber():
+        with pytest.raises(TooManySubscribers):
+            log.check_subscriber()
+        with pytest.raises(TooManySubscribers):
+            with log.subscriber():
+                pass
+    log.check_subscriber()
+
+
+def test_wait_wakes_on_an_append_from_another_thread():
+    log = _log()
+
+    async def main():
+        threading.Timer(0.05, log.append, [{"id": 1}]).start()
+        await asyncio.wait_for(log.wait(log.last, timeout=5), 2)
+
+    asyncio.run(main())
+    assert log.last == 1_000_001
+    asyncio.run(log.wait(0, timeout=5))  # already behind: returns at once
+
+
+def test_long_poll_returns_the_writes_after_the_cursor(client):
+    since = client.get("/api/changes", params={"timeout": 0}).json()["next"]
+    client.patch("/api/v2/books/1", json={"stock": 3})
+    client.post("/api/v1/books", json={"title": "New", "author": "A", "price": 1})
+    body = client.get("/api/changes", params={"since": since, "timeout": 0}).json()
+    assert [(c["seq"], c["op"], c["id"]) for c in body["changes"]] == [(since + 1, "patch", 1), (since + 2, "create", 3)]
+    assert body["changes"][0]["fields"] == {"stock": 3}
+    assert body["next"] == since + 2
+    assert client.get("/api/changes", params={"since": body["next"], "timeout": 0}).json()["changes"] == []
+
+
+def test_a_stale_cursor_gets_410_with_the_cursor_to_resume_from(client):
+    r = client.get("/api/changes", params={"since": 0, "timeout": 0})
+    assert r.status_code == 410
+    assert r.json()["next"] == api._changes.last
+
+
+def test_a_stale_stream_cursor_gets_one_reset_event(client):
+    r = client.get("/api/changes/stream", headers={"Last-Event-ID": "0"})
+    assert r.headers["content-type"].startswith("text/event-stream")
+    assert r.text == 'retry: 3000\n\nevent: reset\ndata: {"next":%d}\n\n' % api._changes.last
+
+
+def test_consumers_past_the_cap_get_503(client, monkeypatch):
+    monkeypatch.setattr(api._changes, "max_subscribers", 0)
+    for path in ("/api/changes", "/api/changes/stream"):
+        r = client.get(path, params={"timeout": 0})
+        assert (r.status_code, r.headers["Retry-After"]) == (503, "1")
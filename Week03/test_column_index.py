@@ -0,0 +1,108 @@
+import copy
+import random
+import threading
+
+import pytest
+
+pytest.importorskip("numpy")
+
+import column_index
+import extensibility as api
+from column_index import BookColumns
+
+WORDS = ["ab", "Ba", "İx", "c d", "ÆØ", "zz"]
+
+
+def _book(rnd, book_id, version=1):
+    return api._InternalBook(id=book_id, title=rnd.choice(WORDS) + rnd.choice(WORDS), author=rnd.choice(WORDS),
+                             price_amount=rnd.choice([1, 2, 2.5, 3, 10, 50]),
+                             currency=rnd.choice(["USD", "EUR", "VND"]), version=version)
+
+
+@pytest.mark.parametrize("patched_rows", [1, 4, 256])
+def test_matching_equals_the_per_row_filter(monkeypatch, patched_rows):
+    monkeypatch.setattr(column_index, "PATCHED_ROWS", patched_rows)
+    rnd = random.Random(patched_rows)
+    for trial in range(40):
+        columns, db = BookColumns(capacity=rnd.choice([1, 4, 1024])), {}
+        if trial % 2:
+            db = {i: _book(rnd, i) for i in range(1, 40)}
+            columns.rebuild(db.values())
+        for _ in range(150):
+            if rnd.random() < 0.4:
+                book_id = rnd.randint(1, 60)
+                old = db.get(book_id)
+                db[book_id] = _book(rnd, book_id, old.version + 1 if old else 1)
+                columns.upsert(db[book_id])
+                if old and rnd.random() < 0.3:  # new version, same filterable fields
+                    new = copy.copy(db[book_id])
+                    new.version += 1
+                    db[book_id] = new
+                    columns.replace(new)
+                continue
+            query = (rnd.choice([None, "", "a", "b d", "i̇x", "zz zz", "q"]), rnd.choice([None, "USD", "EUR", "JPY"]),
+                     rnd.choice([None, 0, 2, 2.5, 3]), rnd.choice([None, 2, 2.5, 3, 100]))
+            expected = api._filter_v2(db.values(), *query)
+            assert columns.matching(*query) == expected, query
+
+
+def test_narrow_ranges_see_repriced_rows(monkeypatch):
+    monkeypatch.setattr(column_index, "NARROW_RANGE", 1.0)  # always through the price sort
+    books = [api._InternalBook(id=i, title="t", author="a", price_amount=float(i)) for i in range(1, 101)]
+    columns = BookColumns()
+    columns.rebuild(books)
+    assert [b.id for b in columns.matching(min_price=10, max_price=12)] == [10, 11, 12]
+    columns.upsert(api._InternalBook(id=50, title="t", author="a", price_amount=11.5, version=2))
+    columns.upsert(api._InternalBook(id=11, title="t", author="a", price_amount=99.0, version=2))
+    assert [b.id for b in columns.matching(min_price=10, max_price=12)] == [10, 12, 50]
+
+
+def test_readers_do_not_wait_for_writers():
+    columns = BookColumns()
+    book = api._InternalBook(id=1, title="Clean Code", author="Martin", price_amount=25.5)
+    columns.upsert(book)
+    with columns._lock:  # a writer in progress
+        result = []
+        reader = threading.Thread(target=lambda: result.append(columns.matching(q="clean")))
+        reader.start()
+        reader.join(timeout=5)
+    assert result == [[book]]
+
+
+def test_concurrent_writes_publish_whole_snapshots(monkeypatch):
+    monkeypatch.setattr(column_index, "PATCHED_ROWS", 8)
+    columns = BookColumns(capacity=1)
+    columns.rebuild(api._InternalBook(id=i, title="t", author="a", price_amount=1.0) for i in range(1, 51))
+    done, errors = threading.Event(), []
+
+    def write():
+        for version in range(2, 300):
+            for book_id in (version % 50 + 1, 50 + version):
+                columns.upsert(api._InternalBook(id=book_id, title="t", author="a",
+                                                 price_amount=float(version % 2), version=version))
+        done.set()
+
+    def read():
+        while not done.is_set():
+            books = columns.matching(min_price=0)
+            if len(set(b.id for b in books)) != len(books) or len(books) < 50:
+                errors.append(len(books))
+
+    threads = [threading.Thread(target=write)] + [threading.Thread(target=read) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert len(columns.matching()) == 50 + 298
+
+
+def test_v2_list_filters_through_the_index(client):
+    client.post("/api/v2/books", json={"title": "Refactoring", "author": "Fowler",
+                                       "price": {"amount": 40, "currency": "EUR"}})
+    ids = lambda **params: [b["id"] for b in client.get("/api/v2/books", params=params).json()]
+    assert ids(currency="EUR") == [3]
+    assert ids(min_price=26) == [2, 3]
+    assert ids(q="martin", max_price=30) == [1]
+    client.patch("/api/v2/books/1", json={"price": {"amount": 45, "currency": "EUR"}})
+    assert ids(currency="EUR", min_price=41) == [1]
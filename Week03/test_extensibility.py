@@ -0,0 +1,98 @@
+import sys
+
+import extensibility as api
+
+
+def test_records_are_slotted_with_interned_currency():
+    book = api._InternalBook(id=1, title="T", author="A", price_amount=1.0, currency="".join(["V", "ND"]))
+    assert not hasattr(book, "__dict__")
+    assert book.currency is sys.intern("VND")
+    assert book.version == 1
+
+
+def test_v1_and_v2_project_the_same_record(client):
+    assert client.get("/api/v1/books/1").json() == {
+        "id": 1, "title": "Clean Code", "author": "Robert C. Martin", "price": 25.5, "year": 2008,
+    }
+    assert client.get("/api/v2/books/1").json() == {
+        "id": 1, "title": "Clean Code", "author": "Robert C. Martin",
+        "price": {"amount": 25.5, "currency": "USD"}, "published_year": 2008, "stock": 10,
+    }
+    assert client.get("/api/v1/books/3").status_code == 404
+
+
+def test_v1_create_defaults_the_v2_only_fields(client):
+    r = client.post("/api/v1/books", json={"title": "Refactoring", "author": "Fowler", "price": 40})
+    assert (r.status_code, r.json()["id"]) == (201, 3)
+    assert client.get("/api/v2/books/3").json()["price"] == {"amount": 40.0, "currency": "USD"}
+    assert client.get("/api/v2/books/3").json()["stock"] == 0
+    assert [b["id"] for b in client.get("/api/v1/books").json()] == [1, 2, 3]
+
+
+def test_replacing_the_store_drops_cached_fragments(client):
+    assert client.get("/api/v1/books/1").json()["title"] == "Clean Code"
+    api._load([api._InternalBook(id=1, title="Other", author="B", price_amount=1.0)])
+    assert client.get("/api/v1/books/1").json()["title"] == "Other"  # same id and version
+
+
+def test_patch_stores_a_new_version_and_leaves_the_read_record_alone(client):
+    before = api._DB[1]
+    r = client.patch("/api/v2/books/1", json={"stock": 7})
+    assert (r.status_code, r.json()["stock"]) == (200, 7)
+    after = api._DB[1]
+    assert after is not before
+    assert (before.stock, before.version) == (10, 1)
+    assert (after.stock, after.version, after.title) == (7, 2, "Clean Code")
+
+
+def test_write_without_a_change_keeps_the_record(client):
+    before = api._DB[2]
+    seen = []
+    api._change_listeners.append(seen.append)
+    try:
+        client.patch("/api/v2/books/2", json={"stock": 5})
+        client.put("/api/v1/books/2", json={"title": "Design Patterns", "author": "Erich Gamma",
+                                            "price": 30.0, "year": 1994})
+    finally:
+        api._change_listeners.remove(seen.append)
+    assert api._DB[2] is before
+    assert seen == []
+
+
+def test_put_reports_only_the_changed_fields(client):
+    seen = []
+    api._change_listeners.append(seen.append)
+    try:
+        r = client.put("/api/v2/books/1", json={"title": "Clean Code", "author": "Robert C. Martin",
+                                                "price": {"amount": 20, "currency": "EUR"}, "stock": 10})
+    finally:
+        api._change_listeners.remove(seen.append)
+    assert r.json()["price"] == {"amount": 20.0, "currency": "EUR"}
+    assert seen == [{"op": "put", "id": 1, "version": 2,
+                     "fields": {"price_amount": 20.0, "currency": "EUR", "published_year": None}}]
+    assert client.patch("/api/v1/books/9", json={"price": 1}).status_code == 404
+
+
+def test_bulk_stock_deltas_report_each_update(client):
+    r = client.patch("/api/v2/books/stock", json={"updates": [
+        {"id": 1, "delta": -3}, {"id": 2, "delta": -6}, {"id": 9, "delta": 1}, {"id": "1", "delta": 1},
+        {"id": 1, "delta": 0},
+    ]})
+    assert r.status_code == 207
+    assert r.json()["results"] == [
+        {"id": 1, "status": 200, "stock": 7, "version": 2},
+        {"id": 2, "status": 409, "error": "Stock would go below zero", "stock": 5},
+        {"id": 9, "status": 404, "error": "Book not found"},
+        {"status": 400, "error": "id must be a positive integer"},
+        {"id": 1, "status": 200, "stock": 7, "version": 2},
+    ]
+    assert client.get("/api/v2/books/1").json()["stock"] == 7
+
+
+def test_bulk_stock_rejects_malformed_and_oversized_calls(client, monkeypatch):
+    assert client.patch("/api/v2/books/stock", json={"updates": []}).status_code == 400
+    assert client.patch("/api/v2/books/stock", json=[{"id": 1, "delta": 1}]).status_code == 400
+    monkeypatch.setattr(api, "MAX_STOCK_UPDATES", 1)
+    updates = [{"id": 1, "delta": 1}, {"id": 2, "delta": 1}]
+    assert client.patch("/api/v2/books/stock", json={"updates": updates}).status_code == 413
+    assert client.patch("/api/v2/books/stock", json={"updates": updates[:1]}).status_code == 200
@@ -0,0 +1,64 @@
+import pytest
+
+from projections import ProjectionRegistry
+
+
+class Record:
+    def __init__(self, id, title, amount, currency="USD", version=1):
+        self.id, self.title, self.amount, self.currency, self.version = id, title, amount, currency, version
+
+
+@pytest.fixture
+def v2():
+    return ProjectionRegistry().register("v2", {
+        "id": "id",
+        "title": "title",
+        "price": {"amount": "amount", "currency": "currency"},
+    })
+
+
+def test_to_dict_follows_the_shape_including_nested_levels(v2):
+    assert v2.to_dict(Record(1, "Clean Code", 25.5)) == {
+        "id": 1, "title": "Clean Code", "price": {"amount": 25.5, "currency": "USD"},
+    }
+
+
+def test_single_field_levels_project_too():
+    flat = ProjectionRegistry().register("ids", {"id": "id"})
+    nested = ProjectionRegistry().register("cost", {"cost": {"amount": "amount"}})
+    book = Record(7, "T", 3.0)
+    assert (flat.to_dict(book), nested.to_dict(book)) == ({"id": 7}, {"cost": {"amount": 3.0}})
+
+
+def test_fragments_are_reused_until_the_version_changes(v2):
+    book = Record(1, "Clean Code", 25.5)
+    fragment = v2.encode(book)
+    assert fragment == b'{"id":1,"title":"Clean Code","price":{"amount":25.5,"currency":"USD"}}'
+    book.title = "Changed"
+    assert v2.encode(book) is fragment  # same version: cached
+    book.version = 2
+    assert b'"Changed"' in v2.encode(book)
+
+
+def test_encode_many_joins_fragments_into_an_array(v2):
+    assert v2.encode_many([]) == b"[]"
+    body = v2.encode_many([Record(1, "A", 1.0), Record(2, "B", 2.0)])
+    assert body.startswith(b'[{"id":1,') and b'},{"id":2,' in body and body.endswith(b"}]")
+
+
+def test_forget_and_clear_drop_fragments():
+    registry = ProjectionRegistry()
+    v1 = registry.register("v1", {"id": "id", "title": "title"})
+    old = Record(1, "Old", 1.0)
+    v1.encode(old)
+    registry.forget(1)
+    assert v1.encode(Record(1, "New", 1.0)) == b'{"id":1,"title":"New"}'
+    registry.clear()
+    assert v1.encode(Record(1, "Replaced", 1.0)) == b'{"id":1,"title":"Replaced"}'
+    assert registry["v1"] is v1
+
+
+@pytest.mark.parametrize("source", ["price.amount", "__import__('os')", ""])
+def test_sources_must_be_attribute_names(source):
+    with pytest.raises(ValueError, match="not an attribute name"):
+        ProjectionRegistry().register("bad", {"id": "id", "x": {"y": source}})
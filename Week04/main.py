@@ -1,10 +1,13 @@
 from fastapi import FastAPI, HTTPException, Depends, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Optional
 import jwt
 from datetime import datetime, timedelta
 
+# common/ resolves from the repo root: run with PYTHONPATH=<repo root> (see common/__init__.py)
+from common.jwt_cache import TokenCache
+
 # JWT Configuration
 SECRET_KEY = "your-secret-key-change-in-production"
 ALGORITHM = "HS256"
@@ -63,12 +66,15 @@ users_db = {
     "user": "user123"
 }
 
-# Fake books database
-books_db = [
-    Book(id=1, title="Python Programming", author="John Doe", year=2023, isbn="978-0123456789"),
-    Book(id=2, title="Web Development", author="Jane Smith", year=2024, isbn="978-0987654321"),
-    Book(id=3, title="Data Science", author="Bob Johnson", year=2023, isbn="978-1122334455")
-]
+# Fake books database: id -> Book (dict giữ thứ tự chèn)
+books_db: Dict[int, Book] = {
+    b.id: b for b in [
+        Book(id=1, title="Python Programming", author="John Doe", year=2023, isbn="978-0123456789"),
+        Book(id=2, title="Web Development", author="Jane Smith", year=2024, isbn="978-0987654321"),
+        Book(id=3, title="Data Science", author="Bob Johnson", year=2023, isbn="978-1122334455")
+    ]
+}
+_next_book_id = max(books_db) + 1
 
 # ------------------------
 # JWT Helper Functions
@@ -80,10 +86,13 @@ def create_access_token(data: dict):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+# Token đã verify được cache đến khi hết hạn (exp): HMAC chỉ chạy 1 lần/token
+access_tokens = TokenCache(lambda token: jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]))
+
 def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
     try:
         token = credentials.credentials
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = access_tokens.decode(token)
         username: str = payload.get("sub")
         if username is None:
             raise HTTPException(
@@ -139,7 +148,7 @@ def get_books(username: str = Depends(verify_token)):
     
     **Yêu cầu:** JWT token trong header Authorization: Bearer <token>
     """
-    return books_db
+    return list(books_db.values())
 
 @app.get("/books/{book_id}", response_model=Book, summary="2. Lấy thông tin một cuốn sách")
 def get_book(book_id: int, username: str = Depends(verify_token)):
@@ -148,10 +157,10 @@ def get_book(book_id: int, username: str = Depends(verify_token)):
     
     **Yêu cầu:** JWT token trong header Authorization: Bearer <token>
     """
-    for book in books_db:
-        if book.id == book_id:
-            return book
-    raise HTTPException(status_code=404, detail="Book not found")
+    book = books_db.get(book_id)
+    if book is None:
+        raise HTTPException(status_code=404, detail="Book not found")
+    return book
 
 @app.post("/books", response_model=Book, status_code=status.HTTP_201_CREATED, summary="3. Thêm sách mới")
 def create_book(book: BookCreate, username: str = Depends(verify_token)):
@@ -160,7 +169,9 @@ def create_book(book: BookCreate, username: str = Depends(verify_token)):
     
     **Yêu cầu:** JWT token trong header Authorization: Bearer <token>
     """
-    new_id = max([b.id for b in books_db], default=0) + 1
+    global _next_book_id
+    new_id = _next_book_id
+    _next_book_id += 1
     new_book = Book(
         id=new_id,
         title=book.title,
@@ -168,7 +179,7 @@ def create_book(book: BookCreate, username: str = Depends(verify_token)):
         year=book.year,
         isbn=book.isbn
     )
-    books_db.append(new_book)
+    books_db[new_id] = new_book
     return new_book
 
 @app.put("/books/{book_id}", response_model=Book, summary="4. Cập nhật thông tin sách")
@@ -178,14 +189,14 @@ def update_book(book_id: int, book: BookUpdate, username: str = Depends(verify_t
     
     **Yêu cầu:** JWT token trong header Authorization: Bearer <token>
     """
-    for idx, existing_book in enumerate(books_db):
-        if existing_book.id == book_id:
-            updated_data = existing_book.dict()
-            update_data = book.dict(exclude_unset=True)
-            updated_data.update(update_data)
-            books_db[idx] = Book(**updated_data)
-            return books_db[idx]
-    raise HTTPException(status_code=404, detail="Book not found")
+    existing_book = books_db.get(book_id)
+    if existing_book is None:
+        raise HTTPException(status_code=404, detail="Book not found")
+    updated_data = existing_book.dict()
+    update_data = book.dict(exclude_unset=True)
+    updated_data.update(update_data)
+    books_db[book_id] = Book(**updated_data)
+    return books_db[book_id]
 
 @app.delete("/books/{book_id}", status_code=status.HTTP_204_NO_CONTENT, summary="5. Xóa sách")
 def delete_book(book_id: int, username: str = Depends(verify_token)):
@@ -194,12 +205,8 @@ def delete_book(book_id: int, username: str = Depends(verify_token)):
     
     **Yêu cầu:** JWT token trong header Authorization: Bearer <token>
     """
-    global books_db
-    for idx, book in enumerate(books_db):
-        if book.id == book_id:
-            books_db.pop(idx)
-            return
-    raise HTTPException(status_code=404, detail="Book not found")
+    if books_db.pop(book_id, None) is None:
+        raise HTTPException(status_code=404, detail="Book not found")
 
 # Chạy ứng dụng với: uvicorn main:app --reload
 if __name__ == '__main__':
@@ -0,0 +1,35 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(main, "books_db", dict(main.books_db))
+    monkeypatch.setattr(main, "_next_book_id", main._next_book_id)
+    client = TestClient(main.app)
+    token = client.post("/login", json={"username": "admin", "password": "admin123"}).json()["access_token"]
+    client.headers["Authorization"] = f"Bearer {token}"
+    return client
+
+
+def test_get_update_delete_by_id(client):
+    assert client.get("/books/2").json()["title"] == "Web Development"
+    assert client.put("/books/2", json={"year": 2025}).json()["year"] == 2025
+    assert [b["id"] for b in client.get("/books").json()] == [1, 2, 3]  # updated in place
+    assert client.delete("/books/2").status_code == 204
+    assert client.get("/books/2").status_code == 404
+    assert [b["id"] for b in client.get("/books").json()] == [1, 3]
+
+
+@pytest.mark.parametrize("method", ["get", "put", "delete"])
+def test_unknown_id_is_a_404(client, method):
+    kwargs = {"json": {"title": "x"}} if method == "put" else {}
+    assert getattr(client, method)("/books/99", **kwargs).status_code == 404
+
+
+def test_ids_are_not_reused_after_a_delete(client):
+    client.delete("/books/3")
+    created = client.post("/books", json={"title": "New", "author": "A"}).json()
+    assert created["id"] == 4
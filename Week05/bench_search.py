@@ -0,0 +1,78 @@
+"""
+Benchmark: `q` search latency vs catalogue size.
+
+Compares the old linear substring scan with the inverted index used by
+`list_books`. Run from this folder:
+
+    python bench_search.py                 # 1k, 10k, 100k books
+    python bench_search.py 1000 300000     # custom sizes
+"""
+
+import itertools
+import random
+import sys
+import time
+
+from indexes import InvertedIndex
+
+COMMON_WORDS = (
+    "python data design pattern clean code pragmatic programmer web api rest "
+    "cloud distributed system database query cache network security machine "
+    "learning deep neural graph algorithm structure compiler runtime memory"
+).split()
+
+QUERIES = ["python", "clean code", "distrib sys", "neural graph algorithm", "zzz"]
+
+
+def make_vocabulary(size, seed=7):
+    rnd = random.Random(seed)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    rare = {"".join(rnd.choices(letters, k=rnd.randint(4, 10))) for _ in range(size)}
+    return COMMON_WORDS + sorted(rare)
+
+
+def make_catalogue(n, seed=42):
+    """Titles/descriptions drawn from a Zipf-like vocabulary, like real text."""
+    rnd = random.Random(seed)
+    vocabulary = make_vocabulary(max(1_000, n // 2))
+    cum_weights = list(itertools.accumulate(1 / rank for rank in range(1, len(vocabulary) + 1)))
+    books = []
+    for i in range(1, n + 1):
+        title = " ".join(rnd.choices(vocabulary, cum_weights=cum_weights, k=4)).title()
+        description = " ".join(rnd.choices(vocabulary, cum_weights=cum_weights, k=12))
+        books.append((i, title, description))
+    return books
+
+
+def linear_search(books, q):
+    qlow = q.lower()
+    return [b for b in books if qlow in b[1].lower() or (b[2] and qlow in b[2].lower())]
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main(sizes):
+    print(f"{'books':>10} {'query':<24} {'linear ms':>10} {'index ms':>10} {'speedup':>8}")
+    for n in sizes:
+        books = make_catalogue(n)
+        index = InvertedIndex()
+        build_start = time.perf_counter()
+        for doc_id, title, description in books:
+            index.add(doc_id, title, description)
+        build_ms = (time.perf_counter() - build_start) * 1000
+
+        repeat = max(1, 200_000 // n)
+        for q in QUERIES:
+            linear_ms = timed(lambda: linear_search(books, q), repeat)
+            index_ms = timed(lambda: index.search(q), repeat)
+            print(f"{n:>10} {q:<24} {linear_ms:>10.3f} {index_ms:>10.3f} {linear_ms / index_ms:>7.1f}x")
+        print(f"{n:>10} (index build: {build_ms:.0f} ms, {len(index._vocabulary)} tokens)\n")
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [1_000, 10_000, 100_000])
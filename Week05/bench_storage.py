@@ -0,0 +1,108 @@
+"""
+Benchmark: in-memory vs SQLite repository.
+
+Loads the same synthetic catalogue into both engines and times the
+queries `list_books` / `get_book` issue. Run from this folder:
+
+    python bench_storage.py                  # 1,000,000 books
+    python bench_storage.py --books 100000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from repository import InMemoryBookRepository
+from sqlite_repository import SQLiteBookRepository
+
+WORDS = (
+    "python data design pattern clean code pragmatic programmer web api rest "
+    "cloud distributed system database query cache network security machine "
+    "learning deep neural graph algorithm structure compiler runtime memory "
+    "concurrency async stream event server client mobile testing refactoring"
+).split()
+
+N_CATEGORIES = 50
+N_AUTHORS = 1_000
+
+
+def make_rows(n, seed=42):
+    rnd = random.Random(seed)
+    for i in range(1, n + 1):
+        yield {
+            "title": " ".join(rnd.choices(WORDS, k=3)).title() + f" {i}",
+            "isbn": f"978-{i:010d}",
+            "publish_year": rnd.randint(1950, 2025),
+            "category_id": rnd.randint(1, N_CATEGORIES),
+            "description": " ".join(rnd.choices(WORDS, k=10)),
+            "authors": rnd.sample(range(1, N_AUTHORS + 1), k=rnd.randint(1, 3)),
+        }
+
+
+def load(repo, n):
+    for c in range(N_CATEGORIES):
+        repo.add_category(f"Category {c + 1}")
+    for a in range(N_AUTHORS):
+        repo.add_author(f"Author {a + 1}")
+    start = time.perf_counter()
+    repo.add_books(make_rows(n))
+    return time.perf_counter() - start
+
+
+def walk_cursor(repo, pages, **filters):
+    cursor = None
+    for _ in range(pages):
+        _, cursor = repo.list_books(cursor=cursor, per_page=20, **filters)
+        if not cursor:
+            break
+
+
+def scenarios(n):
+    rnd = random.Random(7)
+    deep_page = max(1, n // 20 - 1)
+    return [
+        ("get_book (random id)", lambda r: r.get_book(rnd.randint(1, n))),
+        ("isbn filter", lambda r: r.list_books(isbn=f"978-{rnd.randint(1, n):010d}")),
+        ("category + year filter", lambda r: r.list_books(category_id=rnd.randint(1, N_CATEGORIES), publish_year=2001)),
+        ("sort=title page 1", lambda r: r.list_books(sort="title", per_page=20)),
+        (f"sort=title page {deep_page}", lambda r: r.list_books(sort="title", page=deep_page, per_page=20)),
+        ("sort=title cursor, 50 pages", lambda r: walk_cursor(r, 50, sort="title")),
+        ("q=neural graph (ranked)", lambda r: r.list_books(q="neural graph")),
+        ("q=compil + sort=publish_year", lambda r: r.list_books(q="compil", sort="publish_year")),
+    ]
+
+
+def measure(fn, repo, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(repo)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--books", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp()
+    engines = {
+        "memory": InMemoryBookRepository(),
+        "sqlite": SQLiteBookRepository(os.path.join(tmpdir, "bench.db")),
+    }
+    for name, repo in engines.items():
+        print(f"loading {args.books:,} books into {name}: {load(repo, args.books):.1f} s")
+
+    print(f"\n{'query (median ms)':<32} {'memory':>10} {'sqlite':>10}")
+    for label, fn in scenarios(args.books):
+        timings = [measure(fn, repo, args.repeat) for repo in engines.values()]
+        print(f"{label:<32} {timings[0]:>10.3f} {timings[1]:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
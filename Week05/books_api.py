@@ -1,32 +1,76 @@
 from typing import Optional, List
-from datetime import datetime
-
-from fastapi import FastAPI, HTTPException, Query
-from pydantic import BaseModel, Field
-
-app = FastAPI(title="Books API (in-memory, search & pagination)")
-
-
-class Book(BaseModel):
-    id: int
-    title: str
-    isbn: Optional[str] = None
-    publish_year: Optional[int] = None
-    category_id: Optional[int] = None
-    description: Optional[str] = None
-    authors: List[int] = Field(default_factory=list)
-    created_at: datetime = Field(default_factory=datetime.utcnow)
-
-
-# In-memory "database"
-_books_db: List[Book] = []
-_next_id = 1
+import asyncio
+import logging
+import os
+import sys
+
+from fastapi import Depends, FastAPI, HTTPException, Query, Response
+from starlette.concurrency import run_in_threadpool
+
+from dataloader import DataLoader
+from models import Author, Book, BookCreate, BookDetail, Review, ReviewCreate
+from repository import (
+    BookRepository,
+    DuplicateKeyError,
+    InMemoryBookRepository,
+    InvalidCursorError,
+    RepositoryError,
+)
+
+# common/ resolves from the repo root: run with PYTHONPATH=<repo root> (see common/__init__.py)
+from common.response_cache import ResponseCache
+
+app = FastAPI(title="Books API (search & pagination)")
+
+
+def _make_repository() -> BookRepository:
+    """
+    Pick the storage engine:
+    - BOOKS_STORE=memory (default): in-process dict + indexes, lost on restart
+    - BOOKS_STORE=sqlite: SQLite file at BOOKS_DB_PATH, shared by all workers
+    """
+    if os.environ.get("BOOKS_STORE", "memory") == "sqlite":
+        from sqlite_repository import SQLiteBookRepository
+
+        return SQLiteBookRepository(
+            os.environ.get("BOOKS_DB_PATH", "books.db"),
+            pool_size=int(os.environ.get("BOOKS_DB_POOL_SIZE", "8")),
+        )
+    return InMemoryBookRepository()
+
+
+logger = logging.getLogger(__name__)
+
+_repo = _make_repository()
+# GET /books pages. The SQLite store is shared by all workers, but an
+# in-process LRU only sees its own worker's invalidations: other workers
+# would serve stale pages until the TTL. So with BOOKS_STORE=sqlite the
+# list cache needs RESPONSE_CACHE_REDIS_URL (one cache for all workers)
+# and is off without it.
+_response_cache = ResponseCache("week05:books")
+_list_cache_enabled = not (
+    os.environ.get("BOOKS_STORE", "memory") == "sqlite" and not os.environ.get("RESPONSE_CACHE_REDIS_URL")
+)
+if not _list_cache_enabled:
+    logger.warning("BOOKS_STORE=sqlite without RESPONSE_CACHE_REDIS_URL: GET /books is not cached")
+
+
+def _list_cache_scope(request) -> Optional[str]:
+    return "" if _list_cache_enabled else None  # None: bypass the cache
 
 
 def _seed():
-    global _next_id
-    if _books_db:
-        return
+    categories = [
+        {"name": "Software Design", "description": "Architecture and design patterns."},
+        {"name": "Software Engineering", "description": "Craft and practice of programming."},
+    ]
+    authors = [
+        {"name": "Erich Gamma"},
+        {"name": "Richard Helm"},
+        {"name": "Robert C. Martin"},
+        {"name": "Andrew Hunt"},
+        {"name": "David Thomas"},
+    ]
     samples = [
         {
             "title": "Design Patterns",
@@ -53,11 +97,51 @@ def _seed():
             "authors": [4, 5],
         },
     ]
-    for s in samples:
-        global _next_id
-        b = Book(id=_next_id, **s)
-        _books_db.append(b)
-        _next_id += 1
+    readers = [
+        {"name": "Alice", "email": "alice@example.com"},
+        {"name": "Bob", "email": "bob@example.com"},
+    ]
+    reviews = [
+        {"book_id": 1, "reader_id": 1, "rating": 5, "comment": "Timeless."},
+        {"book_id": 2, "reader_id": 1, "rating": 4, "comment": "Changed how I name things."},
+        {"book_id": 2, "reader_id": 2, "rating": 5, "comment": "Great book!"},
+    ]
+    _repo.seed(categories, authors, samples, readers=readers, reviews=reviews)
+
+
+class Loaders:
+    """
+    DataLoaders for one request (created per request via Depends).
+    Every relationship is fetched with one batched backend call, no matter
+    how many books are in the response.
+    """
+
+    def __init__(self, repo: BookRepository):
+        self.authors = DataLoader(repo.get_authors)
+        self.reviews = DataLoader(repo.get_reviews_for_books, default=[])
+
+    @property
+    def round_trips(self) -> int:
+        return self.authors.batch_count + self.reviews.batch_count
+
+
+def get_loaders() -> Loaders:
+    return Loaders(_repo)
+
+
+async def _expand(books: List[Book], loaders: Loaders) -> List[BookDetail]:
+    async def expand_one(b: Book) -> BookDetail:
+        authors, reviews = await asyncio.gather(
+            loaders.authors.load_many(b.authors),
+            loaders.reviews.load(b.id),
+        )
+        return BookDetail(
+            **b.dict(exclude={"authors"}),
+            authors=[Author(**a) for a in authors if a is not None],
+            reviews=[Review(**r) for r in reviews],
+        )
+
+    return list(await asyncio.gather(*(expand_one(b) for b in books)))
 
 
 @app.on_event("startup")
@@ -65,72 +149,104 @@ def startup_event():
     _seed()
 
 
-@app.get("/books", response_model=List[Book])
+@app.get("/books", responses={200: {"model": List[Book]}})
+@_response_cache.fastapi(vary_on=_list_cache_scope)
 def list_books(
-    q: Optional[str] = Query(None, description="Full-text search on title and description"),
+    response: Response,
+    q: Optional[str] = Query(None, description="Full-text search on title and description (ranked, prefix matching)"),
     isbn: Optional[str] = Query(None),
     publish_year: Optional[int] = Query(None),
     category_id: Optional[int] = Query(None),
     sort: Optional[str] = Query(None, description="field to sort by: title, publish_year, created_at"),
     page: int = Query(1, ge=1),
     per_page: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Keyset cursor from the X-Next-Cursor header; replaces page"),
 ):
-    results = _books_db
-
-    # filters
-    if q:
-        qlow = q.lower()
-        results = [b for b in results if qlow in b.title.lower() or (b.description and qlow in b.description.lower())]
-    if isbn:
-        results = [b for b in results if b.isbn == isbn]
-    if publish_year:
-        results = [b for b in results if b.publish_year == publish_year]
-    if category_id:
-        results = [b for b in results if b.category_id == category_id]
-
-    # sorting
-    if sort:
-        reverse = False
-        key = None
-        if sort == "title":
-            key = lambda b: b.title
-        elif sort == "publish_year":
-            key = lambda b: (b.publish_year or 0)
-        elif sort == "created_at":
-            key = lambda b: b.created_at
-        if key:
-            results = sorted(results, key=key, reverse=reverse)
-
-    # pagination
-    total = len(results)
-    start = (page - 1) * per_page
-    end = start + per_page
-    page_items = results[start:end]
-
-    return page_items
+    try:
+        books, next_cursor = _repo.list_books(
+            q=q,
+            isbn=isbn,
+            publish_year=publish_year,
+            category_id=category_id,
+            sort=sort,
+            page=page,
+            per_page=per_page,
+            cursor=cursor,
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return books
+
+
+@app.get("/books/expanded", response_model=List[BookDetail])
+async def list_books_expanded(
+    response: Response,
+    q: Optional[str] = Query(None, description="Full-text search on title and description (ranked, prefix matching)"),
+    isbn: Optional[str] = Query(None),
+    publish_year: Optional[int] = Query(None),
+    category_id: Optional[int] = Query(None),
+    sort: Optional[str] = Query(None, description="field to sort by: title, publish_year, created_at"),
+    page: int = Query(1, ge=1),
+    per_page: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Keyset cursor from the X-Next-Cursor header; replaces page"),
+    loaders: Loaders = Depends(get_loaders),
+):
+    """Like GET /books, with authors and reviews embedded: 3 backend round trips per page."""
+    books = await run_in_threadpool(
+        list_books, response, q, isbn, publish_year, category_id, sort, page, per_page, cursor
+    )
+    result = await _expand(books, loaders)
+    response.headers["X-Backend-Round-Trips"] = str(1 + loaders.round_trips)
+    return result
 
 
 @app.get("/books/{book_id}", response_model=Book)
 def get_book(book_id: int):
-    for b in _books_db:
-        if b.id == book_id:
-            return b
-    raise HTTPException(status_code=404, detail="Book not found")
-
-
-class BookCreate(BaseModel):
-    title: str
-    isbn: Optional[str] = None
-    publish_year: Optional[int] = None
-    category_id: Optional[int] = None
-    description: Optional[str] = None
-    authors: List[int] = Field(default_factory=list)
+    b = _repo.get_book(book_id)
+    if b is None:
+        raise HTTPException(status_code=404, detail="Book not found")
+    return b
 
 
 @app.post("/books", response_model=Book, status_code=201)
 def create_book(payload: BookCreate):
-    global _next_id
-    b = Book(id=_next_id, **payload.dict())
-    _books_db.append(b)
-    _next_id += 1
-    return b
+    try:
+        book = _repo.add_book(payload.dict())
+    except DuplicateKeyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except RepositoryError as e:  # unknown reference, failed constraint
+        raise HTTPException(status_code=422, detail=str(e))
+    _response_cache.invalidate()
+    return book
+
+
+@app.get("/books/{book_id}/reviews", response_model=List[Review])
+def list_book_reviews(book_id: int):
+    if _repo.get_book(book_id) is None:
+        raise HTTPException(status_code=404, detail="Book not found")
+    return _repo.get_reviews_for_books([book_id])[book_id]
+
+
+@app.post("/books/{book_id}/reviews", response_model=Review, status_code=201)
+def create_book_review(book_id: int, payload: ReviewCreate):
+    if _repo.get_book(book_id) is None:
+        raise HTTPException(status_code=404, detail="Book not found")
+    try:
+        return _repo.add_review(book_id, **payload.dict())
+    except RepositoryError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+@app.get("/authors/{author_id}/books", response_model=List[BookDetail])
+async def list_author_books(
+    author_id: int,
+    response: Response,
+    loaders: Loaders = Depends(get_loaders),
+):
+    """Books by one author, with co-authors and reviews embedded."""
+    books = await run_in_threadpool(_repo.list_books_by_author, author_id)
+    result = await _expand(books, loaders)
+    response.headers["X-Backend-Round-Trips"] = str(1 + loaders.round_trips)
+    return result
@@ -0,0 +1,58 @@
+"""
+Per-request DataLoader: the N+1 fix from `N+1 Query Problem/solve.py`,
+applied to relationship lookups.
+
+Handlers call `loader.load(key)` for every related object they need.
+Keys requested in the same event-loop tick are collected and resolved
+with ONE call to the batch function; every key is memoized for the rest
+of the request, so repeated keys never reach the backend twice.
+"""
+
+import asyncio
+from typing import Any, Callable, Dict, Hashable, Iterable, List
+
+from starlette.concurrency import run_in_threadpool
+
+
+class DataLoader:
+    def __init__(self, batch_fn: Callable[[List[Hashable]], Dict[Hashable, Any]], default: Any = None):
+        """
+        batch_fn: sync function keys -> {key: value}, run in the threadpool.
+        default: value for keys missing from the batch result.
+        """
+        self._batch_fn = batch_fn
+        self._default = default
+        self._cache: Dict[Hashable, asyncio.Future] = {}
+        self._queue: List[Hashable] = []
+        self.batch_count = 0  # backend round trips made by this loader
+
+    def load(self, key: Hashable) -> "asyncio.Future":
+        future = self._cache.get(key)
+        if future is not None:
+            return future
+        loop = asyncio.get_running_loop()
+        future = self._cache[key] = loop.create_future()
+        if not self._queue:
+            # runs after every task that is already scheduled has queued its keys
+            loop.call_soon(lambda: asyncio.ensure_future(self._dispatch()))
+        self._queue.append(key)
+        return future
+
+    async def load_many(self, keys: Iterable[Hashable]) -> List[Any]:
+        return list(await asyncio.gather(*(self.load(k) for k in keys)))
+
+    async def _dispatch(self):
+        keys, self._queue = self._queue, []
+        self.batch_count += 1
+        try:
+            results = await run_in_threadpool(self._batch_fn, keys)
+        except Exception as e:
+            for key in keys:
+                future = self._cache.pop(key)
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for key in keys:
+            future = self._cache[key]
+            if not future.done():
+                future.set_result(results.get(key, self._default))
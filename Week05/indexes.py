@@ -0,0 +1,234 @@
+"""
+In-memory index structures for the Books API.
+
+Every index is updated incrementally when a book is inserted, so read
+endpoints never have to scan or re-normalise the whole catalogue.
+"""
+
+import math
+import re
+from bisect import bisect_left, bisect_right, insort
+from itertools import islice
+from typing import Any, Dict, FrozenSet, Hashable, Iterator, List, Optional, Set, Tuple
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Split text into lowercase word tokens."""
+    if not text:
+        return []
+    return _TOKEN_RE.findall(text.lower())
+
+
+class InvertedIndex:
+    """
+    Token-level inverted index over (id, text...) documents.
+
+    - postings: token -> {doc_id: term frequency}
+    - vocabulary: sorted list of tokens, used for prefix matching with bisect
+
+    A query is answered by intersecting the posting lists of its tokens,
+    smallest first, and ranking the survivors with a tf-idf score.
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._vocabulary: List[str] = []
+        self._doc_count = 0
+
+    def __len__(self) -> int:
+        return self._doc_count
+
+    def add(self, doc_id: int, *texts: Optional[str]) -> None:
+        """Index a new document. Called once per inserted book."""
+        for text in texts:
+            for token in tokenize(text):
+                postings = self._postings.get(token)
+                if postings is None:
+                    postings = self._postings[token] = {}
+                    insort(self._vocabulary, token)
+                postings[doc_id] = postings.get(doc_id, 0) + 1
+        self._doc_count += 1
+
+    def _expand(self, token: str, prefix: bool) -> List[str]:
+        """Return the indexed tokens matched by a query token."""
+        if not prefix:
+            return [token] if token in self._postings else []
+        lo = bisect_left(self._vocabulary, token)
+        hi = bisect_left(self._vocabulary, token + "\uffff", lo)
+        return self._vocabulary[lo:hi]
+
+    def _weighted_terms(self, token: str, prefix: bool) -> List[Tuple[Dict[int, int], float]]:
+        """[(postings, weight)] for every indexed token matched by a query token."""
+        weighted = []
+        for term in self._expand(token, prefix):
+            postings = self._postings[term]
+            idf = math.log(1 + self._doc_count / len(postings))
+            # exact token hits rank above prefix completions
+            weighted.append((postings, idf if term == token else idf * 0.5))
+        return weighted
+
+    def search(self, query: str, prefix: bool = True) -> List[Tuple[int, float]]:
+        """
+        Return [(doc_id, score)] for documents containing every query token,
+        best match first. With prefix=True each query token also matches
+        indexed tokens that start with it ("prag" -> "pragmatic").
+        """
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return []
+        groups = []
+        for token in tokens:
+            weighted = self._weighted_terms(token, prefix)
+            if not weighted:
+                return []
+            groups.append(weighted)
+
+        if len(groups) == 1 and len(groups[0]) == 1:
+            postings, weight = groups[0][0]
+            ranked = [(doc_id, tf * weight) for doc_id, tf in postings.items()]
+            ranked.sort(key=lambda item: (-item[1], item[0]))
+            return ranked
+
+        # intersect the smallest posting lists first, score only the survivors
+        doc_sets = []
+        for weighted in groups:
+            if len(weighted) == 1:
+                doc_sets.append(weighted[0][0].keys())
+            else:
+                doc_sets.append(set().union(*(postings.keys() for postings, _ in weighted)))
+        doc_sets.sort(key=len)
+        candidates: Set[int] = set(doc_sets[0])
+        for docs in doc_sets[1:]:
+            candidates.intersection_update(docs)
+            if not candidates:
+                return []
+
+        ranked = []
+        for doc_id in candidates:
+            score = 0.0
+            for weighted in groups:
+                for postings, weight in weighted:
+                    tf = postings.get(doc_id)
+                    if tf:
+                        score += tf * weight
+            ranked.append((doc_id, score))
+        ranked.sort(key=lambda item: (-item[1], item[0]))
+        return ranked
+
+
+_EMPTY: FrozenSet[int] = frozenset()
+
+
+class HashIndex:
+    """Equality index: field value -> set of ids."""
+
+    def __init__(self):
+        self._ids: Dict[Hashable, Set[int]] = {}
+
+    def add(self, value: Hashable, doc_id: int) -> None:
+        if value is None:
+            return
+        ids = self._ids.get(value)
+        if ids is None:
+            ids = self._ids[value] = set()
+        ids.add(doc_id)
+
+    def lookup(self, value: Hashable) -> Set[int]:
+        return self._ids.get(value, _EMPTY)
+
+
+class UniqueIndex:
+    """Equality index for unique fields: field value -> id."""
+
+    def __init__(self):
+        self._ids: Dict[Hashable, int] = {}
+
+    def __contains__(self, value: Hashable) -> bool:
+        return value in self._ids
+
+    def add(self, value: Hashable, doc_id: int) -> None:
+        if value is None:
+            return
+        if value in self._ids:
+            raise KeyError(value)
+        self._ids[value] = doc_id
+
+    def get(self, value: Hashable) -> Optional[int]:
+        return self._ids.get(value)
+
+    def lookup(self, value: Hashable) -> Set[int]:
+        doc_id = self._ids.get(value)
+        return _EMPTY if doc_id is None else {doc_id}
+
+
+def intersect(id_sets: List[Set[int]]) -> Set[int]:
+    """
+    Intersect id sets, starting from the smallest one.
+    The result may be one of the inputs: treat it as read-only.
+    """
+    id_sets = sorted(id_sets, key=len)
+    result = id_sets[0]
+    for ids in id_sets[1:]:
+        if not result:
+            break
+        result = result & ids
+    return result
+
+
+class SortedIndex:
+    """
+    Order index: (sort key, id) entries kept sorted on insert.
+
+    Entries live in a list of sorted buckets (at most 2 * BUCKET_SIZE
+    each) plus the list of bucket maxima, so an insert is two bisects and
+    a memmove bounded by the bucket size rather than by the catalogue.
+    Keyset cursors are located with the same bisects, so reading a page
+    costs O(log N + page size).
+    """
+
+    BUCKET_SIZE = 1000
+
+    def __init__(self):
+        self._buckets: List[List[Tuple[Any, int]]] = []
+        self._maxes: List[Tuple[Any, int]] = []
+        self._len = 0
+
+    def __len__(self) -> int:
+        return self._len
+
+    def add(self, key: Any, doc_id: int) -> None:
+        entry = (key, doc_id)
+        self._len += 1
+        if not self._buckets:
+            self._buckets.append([entry])
+            self._maxes.append(entry)
+            return
+        i = bisect_left(self._maxes, entry)
+        if i == len(self._maxes):
+            # keys that only grow (ids, created_at) always land here
+            i -= 1
+            self._buckets[i].append(entry)
+            self._maxes[i] = entry
+        else:
+            insort(self._buckets[i], entry)
+        bucket = self._buckets[i]
+        if len(bucket) > 2 * self.BUCKET_SIZE:
+            half = len(bucket) // 2
+            self._buckets[i:i + 1] = [bucket[:half], bucket[half:]]
+            self._maxes[i:i + 1] = [bucket[half - 1], bucket[-1]]
+
+    def position_after(self, key: Any, doc_id: int) -> Tuple[int, int]:
+        """(bucket, offset) of the first entry strictly after (key, doc_id)."""
+        entry = (key, doc_id)
+        i = bisect_right(self._maxes, entry)
+        if i == len(self._buckets):
+            return i, 0
+        return i, bisect_right(self._buckets[i], entry)
+
+    def iter_from(self, position: Tuple[int, int] = (0, 0)) -> Iterator[Tuple[Any, int]]:
+        bucket, offset = position
+        for i in range(bucket, len(self._buckets)):
+            yield from islice(self._buckets[i], offset, None)
+            offset = 0
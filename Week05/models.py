@@ -0,0 +1,51 @@
+from typing import Optional, List
+from datetime import datetime
+
+from pydantic import BaseModel, Field
+
+
+class Book(BaseModel):
+    id: int
+    title: str
+    isbn: Optional[str] = None
+    publish_year: Optional[int] = None
+    category_id: Optional[int] = None
+    description: Optional[str] = None
+    authors: List[int] = Field(default_factory=list)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class BookCreate(BaseModel):
+    title: str
+    isbn: Optional[str] = None
+    publish_year: Optional[int] = None
+    category_id: Optional[int] = None
+    description: Optional[str] = None
+    authors: List[int] = Field(default_factory=list)
+
+
+class Author(BaseModel):
+    id: int
+    name: str
+    biography: Optional[str] = None
+
+
+class Review(BaseModel):
+    id: int
+    book_id: int
+    reader_id: int
+    rating: int
+    comment: Optional[str] = None
+    created_at: datetime
+
+
+class ReviewCreate(BaseModel):
+    reader_id: int
+    rating: int = Field(..., ge=1, le=5)
+    comment: Optional[str] = None
+
+
+class BookDetail(Book):
+    """Book with its relationships resolved (authors as objects, reviews)."""
+    authors: List[Author] = Field(default_factory=list)
+    reviews: List[Review] = Field(default_factory=list)
@@ -0,0 +1,321 @@
+"""
+Storage layer for the Books API.
+
+`books_api` only talks to a `BookRepository`; which engine backs it is a
+deployment choice (see `books_api._make_repository`):
+
+- InMemoryBookRepository: dict store + the indexes in `indexes.py`
+- SQLiteBookRepository (sqlite_repository.py): the `data-model.sql` schema
+
+Known difference: SQLite enforces the schema's foreign keys, so a book
+whose category_id or author ids do not exist, or a review by an unknown
+reader, is rejected there (UnknownReferenceError, 422). The in-memory
+engine keeps the original API's behaviour and stores them as given; the
+API has no endpoints to create categories, authors or readers. Both
+engines reject reviews of unknown books and duplicate ISBNs.
+"""
+
+import base64
+import json
+from abc import ABC, abstractmethod
+from bisect import bisect_right
+from datetime import datetime
+from itertools import islice
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from indexes import HashIndex, InvertedIndex, SortedIndex, UniqueIndex, intersect
+from models import Book
+
+class RepositoryError(Exception):
+    """A write the store refused; every engine reports its failures as one of these."""
+
+
+class DuplicateKeyError(RepositoryError):
+    """A UNIQUE column (e.g. Book.isbn) already holds this value."""
+
+
+class UnknownReferenceError(RepositoryError):
+    """A foreign key (category, author) points to a missing row."""
+
+
+class ConstraintError(RepositoryError):
+    """Any other integrity constraint (CHECK, NOT NULL) failed."""
+
+
+def unknown_reference(kind: str, ids: Iterable[int]) -> UnknownReferenceError:
+    """The error both engines raise for missing `kind` rows (same message)."""
+    return UnknownReferenceError(f"Unknown {kind}: {', '.join(str(i) for i in ids)}")
+
+
+class InvalidCursorError(ValueError):
+    """A keyset cursor is malformed or was issued for another sort."""
+
+
+def encode_cursor(order: str, key: Any, doc_id: int) -> str:
+    if isinstance(key, datetime):
+        key = key.isoformat()
+    raw = json.dumps([order, key, doc_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+# sort -> type of its cursor key (created_at travels as an ISO string)
+_CURSOR_KEY_TYPES = {"title": str, "publish_year": int, "created_at": str, "id": int}
+
+
+def _is_int(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def decode_cursor(cursor: str, order: str) -> Tuple[Any, int]:
+    try:
+        cursor_order, key, doc_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise InvalidCursorError("Invalid cursor")
+    if cursor_order != order:
+        raise InvalidCursorError("Cursor does not match the requested sort")
+    # a well-formed cursor with the wrong types would reach the sort
+    # comparison (bisect / SQL) instead of being rejected
+    key_type = _CURSOR_KEY_TYPES.get(order)
+    key_ok = _is_int(key) if key_type is int else key_type is None or isinstance(key, key_type)
+    if not key_ok or not _is_int(doc_id):
+        raise InvalidCursorError("Invalid cursor")
+    if order == "created_at":
+        try:
+            datetime.fromisoformat(key)
+        except ValueError:
+            raise InvalidCursorError("Invalid cursor")
+    return key, doc_id
+
+
+class BookRepository(ABC):
+    """Interface shared by the storage engines; add_books and seed are built on the rest."""
+
+    @abstractmethod
+    def add_category(self, name: str, description: Optional[str] = None) -> int:
+        raise NotImplementedError
+
+    @abstractmethod
+    def add_author(self, name: str, biography: Optional[str] = None) -> int:
+        raise NotImplementedError
+
+    @abstractmethod
+    def add_reader(self, name: str, email: Optional[str] = None) -> int:
+        raise NotImplementedError
+
+    @abstractmethod
+    def add_book(self, data: Dict) -> Book:
+        raise NotImplementedError
+
+    @abstractmethod
+    def add_review(self, book_id: int, reader_id: int, rating: int, comment: Optional[str] = None) -> Dict:
+        raise NotImplementedError
+
+    def add_books(self, rows: Iterable[Dict]) -> int:
+        """Bulk insert; returns the number of books added."""
+        count = 0
+        for data in rows:
+            self.add_book(data)
+            count += 1
+        return count
+
+    @abstractmethod
+    def get_book(self, book_id: int) -> Optional[Book]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def count_books(self) -> int:
+        raise NotImplementedError
+
+    @abstractmethod
+    def list_books(
+        self,
+        q: Optional[str] = None,
+        isbn: Optional[str] = None,
+        publish_year: Optional[int] = None,
+        category_id: Optional[int] = None,
+        sort: Optional[str] = None,
+        page: int = 1,
+        per_page: int = 10,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[Book], Optional[str]]:
+        """Return (page of books, cursor for the next page or None)."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def list_books_by_author(self, author_id: int) -> List[Book]:
+        raise NotImplementedError
+
+    # Batch lookups: one backend round trip for any number of keys.
+    # These back the per-request DataLoaders in books_api.
+
+    @abstractmethod
+    def get_authors(self, author_ids: List[int]) -> Dict[int, Dict]:
+        """author_id -> author row, for the ids that exist."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_reviews_for_books(self, book_ids: List[int]) -> Dict[int, List[Dict]]:
+        """book_id -> reviews of that book (possibly empty), oldest first."""
+        raise NotImplementedError
+
+    def seed(self, categories: List[Dict], authors: List[Dict], books: List[Dict],
+             readers: List[Dict] = (), reviews: List[Dict] = ()) -> None:
+        """Load sample data into an empty store."""
+        if self.count_books():
+            return
+        for c in categories:
+            self.add_category(**c)
+        for a in authors:
+            self.add_author(**a)
+        for r in readers:
+            self.add_reader(**r)
+        self.add_books(books)
+        for r in reviews:
+            self.add_review(**r)
+
+
+class InMemoryBookRepository(BookRepository):
+    """id -> Book dict (insertion-ordered) plus incrementally maintained indexes."""
+
+    _SORT_KEYS = {
+        "title": lambda b: b.title,
+        "publish_year": lambda b: (b.publish_year or 0),
+        "created_at": lambda b: b.created_at,
+        "id": lambda b: b.id,
+    }
+
+    def __init__(self):
+        self._books: Dict[int, Book] = {}
+        self._categories: Dict[int, Dict] = {}
+        self._authors: Dict[int, Dict] = {}
+        self._readers: Dict[int, Dict] = {}
+        self._reviews_by_book: Dict[int, List[Dict]] = {}
+        self._next_id = 1
+        self._next_review_id = 1
+
+        self._text_index = InvertedIndex()  # title + description tokens
+        self._isbn_index = UniqueIndex()  # isbn -> id
+        self._year_index = HashIndex()  # publish_year -> {id}
+        self._category_index = HashIndex()  # category_id -> {id}
+        self._author_index = HashIndex()  # author_id -> {id}
+        # pre-sorted views for sort= and keyset pagination
+        self._sort_indexes = {name: SortedIndex() for name in self._SORT_KEYS}
+
+    def add_category(self, name: str, description: Optional[str] = None) -> int:
+        category_id = len(self._categories) + 1
+        self._categories[category_id] = {"category_id": category_id, "name": name, "description": description}
+        return category_id
+
+    def add_author(self, name: str, biography: Optional[str] = None) -> int:
+        author_id = len(self._authors) + 1
+        self._authors[author_id] = {"id": author_id, "name": name, "biography": biography}
+        return author_id
+
+    def add_reader(self, name: str, email: Optional[str] = None) -> int:
+        reader_id = len(self._readers) + 1
+        self._readers[reader_id] = {"id": reader_id, "name": name, "email": email}
+        return reader_id
+
+    def add_book(self, data: Dict) -> Book:
+        if data.get("isbn") and data["isbn"] in self._isbn_index:
+            raise DuplicateKeyError("A book with this ISBN already exists")
+        b = Book(id=self._next_id, **data)
+        self._next_id += 1
+
+        self._books[b.id] = b
+        self._text_index.add(b.id, b.title, b.description)
+        self._isbn_index.add(b.isbn, b.id)
+        self._year_index.add(b.publish_year, b.id)
+        self._category_index.add(b.category_id, b.id)
+        for author_id in b.authors:
+            self._author_index.add(author_id, b.id)
+        for name, key in self._SORT_KEYS.items():
+            self._sort_indexes[name].add(key(b), b.id)
+        return b
+
+    def add_review(self, book_id: int, reader_id: int, rating: int, comment: Optional[str] = None) -> Dict:
+        if book_id not in self._books:
+            raise unknown_reference("book", [book_id])
+        review = {
+            "id": self._next_review_id,
+            "book_id": book_id,
+            "reader_id": reader_id,
+            "rating": rating,
+            "comment": comment,
+            "created_at": datetime.utcnow(),
+        }
+        self._next_review_id += 1
+        self._reviews_by_book.setdefault(book_id, []).append(review)
+        return review
+
+    def get_book(self, book_id: int) -> Optional[Book]:
+        return self._books.get(book_id)
+
+    def list_books_by_author(self, author_id: int) -> List[Book]:
+        return [self._books[doc_id] for doc_id in sorted(self._author_index.lookup(author_id))]
+
+    def get_authors(self, author_ids: List[int]) -> Dict[int, Dict]:
+        return {a: self._authors[a] for a in author_ids if a in self._authors}
+
+    def get_reviews_for_books(self, book_ids: List[int]) -> Dict[int, List[Dict]]:
+        return {b: self._reviews_by_book.get(b, []) for b in book_ids}
+
+    def count_books(self) -> int:
+        return len(self._books)
+
+    def list_books(self, q=None, isbn=None, publish_year=None, category_id=None,
+                   sort=None, page=1, per_page=10, cursor=None):
+        # equality filters: hash index lookups, intersected smallest set first
+        id_sets = []
+        if isbn:
+            id_sets.append(self._isbn_index.lookup(isbn))
+        if publish_year:
+            id_sets.append(self._year_index.lookup(publish_year))
+        if category_id:
+            id_sets.append(self._category_index.lookup(category_id))
+        matching_ids = intersect(id_sets) if id_sets else None
+
+        order = sort if sort in self._SORT_KEYS else None
+        if q and order is None and cursor is None:
+            # relevance order: posting-list intersection, best match first
+            results = [
+                self._books[doc_id]
+                for doc_id, _ in self._text_index.search(q)
+                if matching_ids is None or doc_id in matching_ids
+            ]
+            start = (page - 1) * per_page
+            return results[start:start + per_page], None
+
+        if q:
+            hits = {doc_id for doc_id, _ in self._text_index.search(q)}
+            matching_ids = hits if matching_ids is None else intersect([hits, matching_ids])
+
+        # walk a pre-sorted view instead of sorting the filtered result
+        order = order or "id"
+        if cursor is not None:
+            after = decode_cursor(cursor, order)
+            if order == "created_at":
+                after = (datetime.fromisoformat(after[0]), after[1])
+            skip = 0
+        else:
+            after = None
+            skip = (page - 1) * per_page
+
+        if matching_ids is not None and len(matching_ids) * 16 < len(self._sort_indexes[order]):
+            # few candidates: sorting them is cheaper than scanning the view
+            key = self._SORT_KEYS[order]
+            entries = sorted((key(self._books[doc_id]), doc_id) for doc_id in matching_ids)
+            position = bisect_right(entries, after) if after else 0
+            candidates = iter(entries[position:])
+        else:
+            index = self._sort_indexes[order]
+            candidates = index.iter_from(index.position_after(*after)) if after else index.iter_from()
+            if matching_ids is not None:
+                candidates = (entry for entry in candidates if entry[1] in matching_ids)
+
+        entries = list(islice(candidates, skip, skip + per_page + 1))
+        next_cursor = None
+        if len(entries) > per_page:
+            entries = entries[:per_page]
+            next_cursor = encode_cursor(order, *entries[-1])
+        return [self._books[doc_id] for _, doc_id in entries], next_cursor
@@ -0,0 +1,544 @@
+"""
+SQLite storage engine for the Books API.
+
+Implements the `data-model.sql` schema (SQLite dialect) and pushes search,
+filters, sorting and pagination down into SQL:
+
+- WAL journal, so readers never block the single writer
+- one bounded connection pool per process (uvicorn workers each get theirs)
+- constant SQL texts with bound parameters: sqlite3 keeps them prepared
+  in each connection's statement cache
+- FTS5 index over title/description for `q`, B-tree indexes on FK,
+  filter and sort columns
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from indexes import tokenize
+from models import Book
+from repository import (
+    BookRepository,
+    ConstraintError,
+    DuplicateKeyError,
+    RepositoryError,
+    UnknownReferenceError,
+    decode_cursor,
+    encode_cursor,
+    unknown_reference,
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS Category (
+    category_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT,
+    description TEXT
+);
+
+CREATE TABLE IF NOT EXISTS Author (
+    author_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT,
+    biography TEXT
+);
+
+CREATE TABLE IF NOT EXISTS Book (
+    book_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title TEXT NOT NULL,
+    isbn TEXT UNIQUE,
+    publish_year INTEGER,
+    category_id INTEGER REFERENCES Category(category_id),
+    description TEXT,
+    created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now'))
+);
+
+CREATE TABLE IF NOT EXISTS BookCopy (
+    copy_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    book_id INTEGER REFERENCES Book(book_id),
+    shelf_location TEXT,
+    status TEXT DEFAULT 'available', -- available, loaned, lost
+    barcode TEXT UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS Book_Author (
+    book_id INTEGER REFERENCES Book(book_id),
+    author_id INTEGER REFERENCES Author(author_id),
+    PRIMARY KEY (book_id, author_id)
+);
+
+CREATE TABLE IF NOT EXISTS Reader (
+    reader_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT,
+    email TEXT UNIQUE,
+    phone TEXT,
+    address TEXT,
+    membership_level TEXT, -- normal, premium, etc.
+    join_date TEXT DEFAULT CURRENT_DATE
+);
+
+CREATE TABLE IF NOT EXISTS Staff (
+    staff_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT,
+    email TEXT UNIQUE,
+    role TEXT -- librarian, admin
+);
+
+CREATE TABLE IF NOT EXISTS Loan (
+    loan_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    reader_id INTEGER REFERENCES Reader(reader_id),
+    copy_id INTEGER REFERENCES BookCopy(copy_id),
+    staff_id INTEGER REFERENCES Staff(staff_id),
+    loan_date TEXT DEFAULT CURRENT_DATE,
+    due_date TEXT,
+    return_date TEXT,
+    status TEXT DEFAULT 'ongoing' -- ongoing, returned, overdue
+);
+
+CREATE TABLE IF NOT EXISTS Review (
+    review_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    reader_id INTEGER REFERENCES Reader(reader_id),
+    book_id INTEGER REFERENCES Book(book_id),
+    rating INTEGER CHECK (rating BETWEEN 1 AND 5),
+    comment TEXT,
+    created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now'))
+);
+
+-- filter columns and FK columns
+CREATE INDEX IF NOT EXISTS idx_book_category ON Book(category_id);
+CREATE INDEX IF NOT EXISTS idx_book_publish_year ON Book(publish_year);
+CREATE INDEX IF NOT EXISTS idx_bookcopy_book ON BookCopy(book_id);
+CREATE INDEX IF NOT EXISTS idx_book_author_author ON Book_Author(author_id);
+CREATE INDEX IF NOT EXISTS idx_loan_reader ON Loan(reader_id);
+CREATE INDEX IF NOT EXISTS idx_loan_copy ON Loan(copy_id);
+CREATE INDEX IF NOT EXISTS idx_loan_staff ON Loan(staff_id);
+CREATE INDEX IF NOT EXISTS idx_review_book ON Review(book_id);
+CREATE INDEX IF NOT EXISTS idx_review_reader ON Review(reader_id);
+
+-- sort orders used by list_books (keyset pagination on (key, book_id))
+CREATE INDEX IF NOT EXISTS idx_book_title_sort ON Book(title, book_id);
+CREATE INDEX IF NOT EXISTS idx_book_year_sort ON Book(COALESCE(publish_year, 0), book_id);
+CREATE INDEX IF NOT EXISTS idx_book_created_sort ON Book(created_at, book_id);
+
+-- full-text search over title + description
+CREATE VIRTUAL TABLE IF NOT EXISTS Book_fts USING fts5(
+    title, description, content='Book', content_rowid='book_id', prefix='2 3'
+);
+CREATE TRIGGER IF NOT EXISTS book_fts_insert AFTER INSERT ON Book BEGIN
+    INSERT INTO Book_fts(rowid, title, description) VALUES (new.book_id, new.title, new.description);
+END;
+CREATE TRIGGER IF NOT EXISTS book_fts_delete AFTER DELETE ON Book BEGIN
+    INSERT INTO Book_fts(Book_fts, rowid, title, description)
+    VALUES ('delete', old.book_id, old.title, old.description);
+END;
+CREATE TRIGGER IF NOT EXISTS book_fts_update AFTER UPDATE ON Book BEGIN
+    INSERT INTO Book_fts(Book_fts, rowid, title, description)
+    VALUES ('delete', old.book_id, old.title, old.description);
+    INSERT INTO Book_fts(rowid, title, description) VALUES (new.book_id, new.title, new.description);
+END;
+"""
+
+_BOOK_COLUMNS = "b.book_id, b.title, b.isbn, b.publish_year, b.category_id, b.description, b.created_at"
+
+_INSERT_BOOK = (
+    "INSERT INTO Book (title, isbn, publish_year, category_id, description, created_at) "
+    "VALUES (?, ?, ?, ?, ?, ?)"
+)
+_INSERT_BOOK_AUTHOR = "INSERT INTO Book_Author (book_id, author_id) VALUES (?, ?)"
+_INSERT_CATEGORY = "INSERT INTO Category (name, description) VALUES (?, ?)"
+_INSERT_AUTHOR = "INSERT INTO Author (name, biography) VALUES (?, ?)"
+_INSERT_READER = "INSERT INTO Reader (name, email) VALUES (?, ?)"
+_INSERT_REVIEW = (
+    "INSERT INTO Review (book_id, reader_id, rating, comment) VALUES (?, ?, ?, ?) "
+    "RETURNING review_id, created_at"
+)
+_SELECT_BOOK = f"SELECT {_BOOK_COLUMNS} FROM Book b WHERE b.book_id = ?"
+_SELECT_AUTHOR_IDS = (
+    "SELECT book_id, author_id FROM Book_Author "
+    "WHERE book_id IN (SELECT value FROM json_each(?)) ORDER BY rowid"
+)
+_SELECT_BOOKS_BY_AUTHOR = (
+    f"SELECT {_BOOK_COLUMNS} FROM Book_Author ba JOIN Book b ON b.book_id = ba.book_id "
+    "WHERE ba.author_id = ? ORDER BY b.book_id"
+)
+_SELECT_AUTHORS = (
+    "SELECT author_id, name, biography FROM Author "
+    "WHERE author_id IN (SELECT value FROM json_each(?))"
+)
+_SELECT_REVIEWS = (
+    "SELECT review_id, book_id, reader_id, rating, comment, created_at FROM Review "
+    "WHERE book_id IN (SELECT value FROM json_each(?)) ORDER BY review_id"
+)
+
+# sort= field -> SQL expression matching the sort index
+_SORT_EXPR = {
+    "title": "b.title",
+    "publish_year": "COALESCE(b.publish_year, 0)",
+    "created_at": "b.created_at",
+    "id": "b.book_id",
+}
+
+
+class ConnectionPool:
+    """
+    Bounded pool of SQLite connections for one process.
+
+    At most `size` connections are checked out at once; idle ones are
+    reused LIFO so hot connections keep their page and statement caches.
+    After a fork (uvicorn/gunicorn workers) the child starts a fresh pool
+    instead of sharing the parent's connections.
+    """
+
+    def __init__(self, path: str, size: int = 8, busy_timeout_ms: int = 5000):
+        self._path = path
+        self._size = size
+        self._busy_timeout_ms = busy_timeout_ms
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._idle: List[sqlite3.Connection] = []
+        self._slots = threading.BoundedSemaphore(self._size)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self._path,
+            timeout=self._busy_timeout_ms / 1000,
+            check_same_thread=False,
+            isolation_level=None,  # explicit BEGIN/COMMIT
+            cached_statements=256,
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        conn.execute(f"PRAGMA busy_timeout={self._busy_timeout_ms}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        if os.getpid() != self._pid:
+            self._reset()
+        self._slots.acquire()
+        try:
+            try:
+                conn = self._idle.pop()
+            except IndexError:
+                conn = self._connect()
+            try:
+                yield conn
+            finally:
+                if conn.in_transaction:
+                    conn.rollback()
+                self._idle.append(conn)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Write transaction; takes the write lock up front (BEGIN IMMEDIATE)."""
+        with self.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def close(self):
+        while self._idle:
+            self._idle.pop().close()
+
+
+# "UNIQUE constraint failed: <columns>" -> message
+_UNIQUE_MESSAGES = {
+    "Book.isbn": "A book with this ISBN already exists",
+    "Reader.email": "A reader with this email already exists",
+}
+
+
+def _integrity_error(e: sqlite3.IntegrityError) -> RepositoryError:
+    msg = str(e)
+    if msg.startswith("UNIQUE constraint failed: "):
+        columns = msg[len("UNIQUE constraint failed: "):]
+        return DuplicateKeyError(_UNIQUE_MESSAGES.get(columns, f"Duplicate value for {columns}"))
+    if "FOREIGN KEY" in msg:
+        # SQLite does not say which key; the inserts below name it where they can
+        return UnknownReferenceError("Referenced category, author, reader or book does not exist")
+    # CHECK / NOT NULL: "CHECK constraint failed: rating BETWEEN 1 AND 5"
+    return ConstraintError(msg)
+
+
+def _is_foreign_key_error(e: sqlite3.IntegrityError) -> bool:
+    return "FOREIGN KEY" in str(e)
+
+
+def _missing_ids(conn: sqlite3.Connection, table: str, column: str, ids: Iterable[int]) -> List[int]:
+    found = {row[0] for row in conn.execute(
+        f"SELECT {column} FROM {table} WHERE {column} IN (SELECT value FROM json_each(?))",
+        (json.dumps(list(ids)),),
+    )}
+    return [i for i in ids if i not in found]
+
+
+class SQLiteBookRepository(BookRepository):
+    """BookRepository over an SQLite file shared by all worker processes."""
+
+    def __init__(self, path: str = "books.db", pool_size: int = 8):
+        if path == ":memory:":
+            # every pooled connection would open its own empty database
+            raise ValueError("SQLiteBookRepository needs a file path")
+        self._pool = ConnectionPool(path, size=pool_size)
+        with self._pool.connection() as conn:
+            conn.executescript(SCHEMA)
+
+    def close(self):
+        self._pool.close()
+
+    # ---------- writes ----------
+
+    def add_category(self, name: str, description: Optional[str] = None) -> int:
+        with self._pool.transaction() as conn:
+            return conn.execute(_INSERT_CATEGORY, (name, description)).lastrowid
+
+    def add_author(self, name: str, biography: Optional[str] = None) -> int:
+        with self._pool.transaction() as conn:
+            return conn.execute(_INSERT_AUTHOR, (name, biography)).lastrowid
+
+    def add_reader(self, name: str, email: Optional[str] = None) -> int:
+        try:
+            with self._pool.transaction() as conn:
+                return conn.execute(_INSERT_READER, (name, email)).lastrowid
+        except sqlite3.IntegrityError as e:
+            raise _integrity_error(e) from e
+
+    @staticmethod
+    def _insert_review(conn: sqlite3.Connection, book_id: int, reader_id: int,
+                       rating: int, comment: Optional[str] = None) -> Dict:
+        try:
+            review_id, created_at = conn.execute(_INSERT_REVIEW, (book_id, reader_id, rating, comment)).fetchone()
+        except sqlite3.IntegrityError as e:
+            if not _is_foreign_key_error(e):
+                raise
+            if _missing_ids(conn, "Book", "book_id", [book_id]):
+                raise unknown_reference("book", [book_id]) from e
+            raise unknown_reference("reader", [reader_id]) from e
+        return {
+            "id": review_id,
+            "book_id": book_id,
+            "reader_id": reader_id,
+            "rating": rating,
+            "comment": comment,
+            "created_at": datetime.fromisoformat(created_at),
+        }
+
+    def add_review(self, book_id: int, reader_id: int, rating: int, comment: Optional[str] = None) -> Dict:
+        try:
+            with self._pool.transaction() as conn:
+                return self._insert_review(conn, book_id, reader_id, rating, comment)
+        except sqlite3.IntegrityError as e:
+            raise _integrity_error(e) from e
+
+    @staticmethod
+    def _insert_book(conn: sqlite3.Connection, data: Dict) -> Book:
+        authors = list(dict.fromkeys(data.get("authors") or []))
+        created_at = data.get("created_at") or datetime.utcnow()
+        try:
+            book_id = conn.execute(
+                _INSERT_BOOK,
+                (
+                    data["title"],
+                    data.get("isbn"),
+                    data.get("publish_year"),
+                    data.get("category_id"),
+                    data.get("description"),
+                    created_at.isoformat(timespec="microseconds"),
+                ),
+            ).lastrowid
+        except sqlite3.IntegrityError as e:
+            if _is_foreign_key_error(e):  # category_id is the only key on Book
+                raise unknown_reference("category", [data.get("category_id")]) from e
+            raise
+        if authors:
+            try:
+                conn.executemany(_INSERT_BOOK_AUTHOR, [(book_id, a) for a in authors])
+            except sqlite3.IntegrityError as e:
+                if _is_foreign_key_error(e):
+                    raise unknown_reference("author", _missing_ids(conn, "Author", "author_id", authors)) from e
+                raise
+        return Book(id=book_id, **dict(data, authors=authors, created_at=created_at))
+
+    def add_book(self, data: Dict) -> Book:
+        try:
+            with self._pool.transaction() as conn:
+                return self._insert_book(conn, data)
+        except sqlite3.IntegrityError as e:
+            raise _integrity_error(e) from e
+
+    def add_books(self, rows: Iterable[Dict], batch_size: int = 10_000) -> int:
+        """Bulk insert, committing every `batch_size` rows."""
+        count = 0
+        rows = iter(rows)
+        try:
+            while True:
+                with self._pool.transaction() as conn:
+                    batch = 0
+                    for data in rows:
+                        self._insert_book(conn, data)
+                        batch += 1
+                        if batch == batch_size:
+                            break
+                count += batch
+                if batch < batch_size:
+                    return count
+        except sqlite3.IntegrityError as e:
+            raise _integrity_error(e) from e
+
+    def seed(self, categories: List[Dict], authors: List[Dict], books: List[Dict],
+             readers: List[Dict] = (), reviews: List[Dict] = ()) -> None:
+        # one write transaction, so concurrent workers cannot seed twice
+        try:
+            with self._pool.transaction() as conn:
+                if conn.execute("SELECT EXISTS (SELECT 1 FROM Book)").fetchone()[0]:
+                    return
+                for c in categories:
+                    conn.execute(_INSERT_CATEGORY, (c["name"], c.get("description")))
+                for a in authors:
+                    conn.execute(_INSERT_AUTHOR, (a["name"], a.get("biography")))
+                for r in readers:
+                    conn.execute(_INSERT_READER, (r["name"], r.get("email")))
+                for data in books:
+                    self._insert_book(conn, data)
+                for r in reviews:
+                    self._insert_review(conn, **r)
+        except sqlite3.IntegrityError as e:
+            raise _integrity_error(e) from e
+
+    # ---------- reads ----------
+
+    def _to_books(self, conn: sqlite3.Connection, rows: List[Tuple]) -> List[Book]:
+        if not rows:
+            return []
+        authors: Dict[int, List[int]] = {row[0]: [] for row in rows}
+        for book_id, author_id in conn.execute(_SELECT_AUTHOR_IDS, (json.dumps(list(authors)),)):
+            authors[book_id].append(author_id)
+        # rows come from our own schema: skip re-validation
+        return [
+            Book.construct(
+                id=book_id,
+                title=title,
+                isbn=isbn,
+                publish_year=publish_year,
+                category_id=category_id,
+                description=description,
+                authors=authors[book_id],
+                created_at=datetime.fromisoformat(created_at),
+            )
+            for book_id, title, isbn, publish_year, category_id, description, created_at in rows
+        ]
+
+    def get_book(self, book_id: int) -> Optional[Book]:
+        with self._pool.connection() as conn:
+            row = conn.execute(_SELECT_BOOK, (book_id,)).fetchone()
+            return self._to_books(conn, [row])[0] if row is not None else None
+
+    def count_books(self) -> int:
+        with self._pool.connection() as conn:
+            return conn.execute("SELECT count(*) FROM Book").fetchone()[0]
+
+    def list_books_by_author(self, author_id: int) -> List[Book]:
+        with self._pool.connection() as conn:
+            return self._to_books(conn, conn.execute(_SELECT_BOOKS_BY_AUTHOR, (author_id,)).fetchall())
+
+    def get_authors(self, author_ids: List[int]) -> Dict[int, Dict]:
+        with self._pool.connection() as conn:
+            rows = conn.execute(_SELECT_AUTHORS, (json.dumps(author_ids),)).fetchall()
+        return {
+            author_id: {"id": author_id, "name": name, "biography": biography}
+            for author_id, name, biography in rows
+        }
+
+    def get_reviews_for_books(self, book_ids: List[int]) -> Dict[int, List[Dict]]:
+        reviews: Dict[int, List[Dict]] = {book_id: [] for book_id in book_ids}
+        with self._pool.connection() as conn:
+            for review_id, book_id, reader_id, rating, comment, created_at in conn.execute(
+                _SELECT_REVIEWS, (json.dumps(book_ids),)
+            ):
+                reviews[book_id].append({
+                    "id": review_id,
+                    "book_id": book_id,
+                    "reader_id": reader_id,
+                    "rating": rating,
+                    "comment": comment,
+                    "created_at": datetime.fromisoformat(created_at),
+                })
+        return reviews
+
+    def list_books(self, q=None, isbn=None, publish_year=None, category_id=None,
+                   sort=None, page=1, per_page=10, cursor=None):
+        where: List[str] = []
+        params: List = []
+        if isbn:
+            where.append("b.isbn = ?")
+            params.append(isbn)
+        if publish_year:
+            where.append("b.publish_year = ?")
+            params.append(publish_year)
+        if category_id:
+            where.append("b.category_id = ?")
+            params.append(category_id)
+
+        match = None
+        if q:
+            tokens = tokenize(q)
+            if not tokens:
+                return [], None
+            # every token must match, as a prefix
+            match = " ".join(f'"{t}"*' for t in tokens)
+
+        order = sort if sort in _SORT_EXPR else None
+        if match and order is None and cursor is None:
+            # relevance order (bm25), page-based
+            sql = (
+                f"SELECT {_BOOK_COLUMNS} FROM Book_fts JOIN Book b ON b.book_id = Book_fts.rowid "
+                f"WHERE Book_fts MATCH ?{''.join(' AND ' + w for w in where)} "
+                "ORDER BY Book_fts.rank, b.book_id LIMIT ? OFFSET ?"
+            )
+            args = [match, *params, per_page, (page - 1) * per_page]
+            with self._pool.connection() as conn:
+                return self._to_books(conn, conn.execute(sql, args).fetchall()), None
+
+        if match:
+            where.append("b.book_id IN (SELECT rowid FROM Book_fts WHERE Book_fts MATCH ?)")
+            params.append(match)
+
+        order = order or "id"
+        expr = _SORT_EXPR[order]
+        offset = (page - 1) * per_page
+        if cursor is not None:
+            key, after_id = decode_cursor(cursor, order)
+            if order == "id":
+                where.append("b.book_id > ?")
+                params.append(after_id)
+            else:
+                where.append(f"({expr}, b.book_id) > (?, ?)")
+                params.extend([key, after_id])
+            offset = 0
+
+        sql = (
+            f"SELECT {_BOOK_COLUMNS}, {expr} FROM Book b"
+            f"{' WHERE ' + ' AND '.join(where) if where else ''} "
+            f"ORDER BY {expr}, b.book_id LIMIT ? OFFSET ?"
+        )
+        params.extend([per_page + 1, offset])
+        with self._pool.connection() as conn:
+            rows = conn.execute(sql, params).fetchall()
+            next_cursor = None
+            if len(rows) > per_page:
+                rows = rows[:per_page]
+                next_cursor = encode_cursor(order, rows[-1][-1], rows[-1][0])
+            return self._to_books(conn, [row[:-1] for row in rows]), next_cursor
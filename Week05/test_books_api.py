@@ -0,0 +1,59 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import books_api
+from sqlite_repository import SQLiteBookRepository
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(books_api.app) as client:  # startup seeds the sample books
+        yield client
+
+
+def test_cursor_walks_the_list(client):
+    everything = [b["id"] for b in client.get("/books", params={"sort": "title", "per_page": 100}).json()]
+    seen, params = [], {"sort": "title", "per_page": 1}
+    while True:
+        r = client.get("/books", params=params)
+        seen += [b["id"] for b in r.json()]
+        if "X-Next-Cursor" not in r.headers:
+            break
+        params["cursor"] = r.headers["X-Next-Cursor"]
+    assert seen == everything
+    assert len(seen) > 1
+
+
+@pytest.mark.parametrize("cursor", ["garbage", "WyJpZCIsICJ4IiwgMV0="])  # the second is ["id", "x", 1]
+def test_invalid_cursor_is_a_400(client, cursor):
+    r = client.get("/books", params={"sort": "id", "cursor": cursor})
+    assert r.status_code == 400
+
+
+def test_unknown_book_is_a_404(client):
+    assert client.get("/books/999").status_code == 404
+    assert client.get("/books/999/reviews").status_code == 404
+    assert client.post("/books/999/reviews", json={"reader_id": 1, "rating": 5}).status_code == 404
+
+
+def test_duplicate_isbn_is_a_409(client):
+    r = client.post("/books", json={"title": "Again", "isbn": "978-0201633610"})
+    assert r.status_code == 409
+
+
+def test_unknown_reference_is_a_422(client, monkeypatch, tmp_path):
+    repo = SQLiteBookRepository(str(tmp_path / "books.db"), pool_size=1)
+    monkeypatch.setattr(books_api, "_repo", repo)
+    r = client.post("/books", json={"title": "Orphan", "category_id": 999})
+    assert (r.status_code, r.json()["detail"]) == (422, "Unknown category: 999")
+    book_id = client.post("/books", json={"title": "Book"}).json()["id"]
+    assert client.post(f"/books/{book_id}/reviews", json={"reader_id": 42, "rating": 5}).status_code == 422
+    repo.close()
+
+
+def test_expanded_list_resolves_relationships_in_three_round_trips(client):
+    r = client.get("/books/expanded", params={"per_page": 3})
+    assert r.headers["X-Backend-Round-Trips"] == "3"
+    books = r.json()
+    assert all(isinstance(a, dict) and "name" in a for b in books for a in b["authors"])
+    assert any(b["authors"] for b in books)
@@ -0,0 +1,52 @@
+import asyncio
+
+import pytest
+
+from dataloader import DataLoader
+
+
+def _loader(fail=False):
+    calls = []
+
+    def batch(keys):
+        calls.append(list(keys))
+        if fail:
+            raise RuntimeError("backend down")
+        return {k: k * 10 for k in keys if k != 3}
+
+    return DataLoader(batch, default="missing"), calls
+
+
+def test_keys_from_one_tick_share_one_batch():
+    loader, calls = _loader()
+
+    async def main():
+        return await asyncio.gather(loader.load(1), loader.load_many([2, 3]), loader.load(1))
+
+    assert asyncio.run(main()) == [10, [20, "missing"], 10]
+    assert calls == [[1, 2, 3]]
+    assert loader.batch_count == 1
+
+
+def test_loaded_keys_are_memoized():
+    loader, calls = _loader()
+
+    async def main():
+        await loader.load_many([1, 2])
+        return await loader.load_many([2, 4])
+
+    assert asyncio.run(main()) == [20, 40]
+    assert calls == [[1, 2], [4]]
+
+
+def test_a_failed_batch_fails_its_keys_and_is_not_cached():
+    loader, calls = _loader(fail=True)
+
+    async def main():
+        with pytest.raises(RuntimeError):
+            await loader.load_many([1, 2])
+        with pytest.raises(RuntimeError):
+            await loader.load(1)
+
+    asyncio.run(main())
+    assert calls == [[1, 2], [1]]
@@ -0,0 +1,79 @@
+import pytest
+
+from indexes import HashIndex, InvertedIndex, UniqueIndex, intersect, tokenize
+from repository import InMemoryBookRepository
+
+
+def _index(*docs):
+    index = InvertedIndex()
+    for doc_id, text in enumerate(docs, 1):
+        index.add(doc_id, text)
+    return index
+
+
+def test_tokenize_lowercases_and_splits_on_non_word_characters():
+    assert tokenize("Clean-Code: A Handbook") == ["clean", "code", "a", "handbook"]
+    assert tokenize(None) == []
+
+
+def test_search_requires_every_token():
+    index = _index("clean code", "clean architecture", "code complete")
+    assert [doc_id for doc_id, _ in index.search("clean code")] == [1]
+    assert index.search("clean missing") == []
+
+
+def test_search_matches_prefixes_unless_disabled():
+    index = _index("the pragmatic programmer", "programming pearls")
+    assert sorted(doc_id for doc_id, _ in index.search("program")) == [1, 2]
+    assert index.search("program", prefix=False) == []
+
+
+def test_exact_token_ranks_above_prefix_completion():
+    index = _index("design patterns", "design")
+    assert [doc_id for doc_id, _ in index.search("design")] == [1, 2]  # equal score: id order
+    index = _index("designing systems", "design")
+    assert [doc_id for doc_id, _ in index.search("design")] == [2, 1]
+
+
+def test_repository_q_returns_books_by_relevance():
+    repo = InMemoryBookRepository()
+    repo.add_book({"title": "Refactoring", "description": "improving the design of code"})
+    repo.add_book({"title": "Design Patterns", "description": "design of reusable software"})
+    books, next_cursor = repo.list_books(q="design")
+    assert [b.title for b in books] == ["Design Patterns", "Refactoring"]
+    assert next_cursor is None
+
+
+def test_hash_index_groups_ids_and_skips_none():
+    index = HashIndex()
+    index.add(2008, 1)
+    index.add(2008, 2)
+    index.add(None, 3)
+    assert index.lookup(2008) == {1, 2}
+    assert index.lookup(None) == set()
+    assert index.lookup(1999) == set()
+
+
+def test_unique_index_rejects_a_second_id():
+    index = UniqueIndex()
+    index.add("978-0132350884", 1)
+    with pytest.raises(KeyError):
+        index.add("978-0132350884", 2)
+    assert index.lookup("978-0132350884") == {1}
+
+
+def test_intersect_starts_from_the_smallest_set():
+    assert intersect([{1, 2, 3}, {2}, {2, 3}]) == {2}
+    assert intersect([{1}, set(), {1}]) == set()
+
+
+def test_repository_combines_equality_filters():
+    repo = InMemoryBookRepository()
+    repo.add_book({"title": "A", "isbn": "1", "publish_year": 2008, "category_id": 1})
+    repo.add_book({"title": "B", "isbn": "2", "publish_year": 2008, "category_id": 2})
+    repo.add_book({"title": "C", "isbn": "3", "publish_year": 1994, "category_id": 2})
+    titles = lambda **filters: [b.title for b in repo.list_books(**filters)[0]]
+    assert titles(publish_year=2008) == ["A", "B"]
+    assert titles(publish_year=2008, category_id=2) == ["B"]
+    assert titles(isbn="3", category_id=2) == ["C"]
+    assert titles(isbn="3", publish_year=2008) == []
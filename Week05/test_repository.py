@@ -0,0 +1,145 @@
+import pytest
+
+from indexes import SortedIndex
+from repository import (
+    ConstraintError,
+    DuplicateKeyError,
+    InMemoryBookRepository,
+    InvalidCursorError,
+    UnknownReferenceError,
+    decode_cursor,
+    encode_cursor,
+)
+from sqlite_repository import SQLiteBookRepository
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def repo(request, tmp_path):
+    if request.param == "memory":
+        yield InMemoryBookRepository()
+        return
+    repo = SQLiteBookRepository(str(tmp_path / "books.db"), pool_size=2)
+    yield repo
+    repo.close()
+
+
+@pytest.fixture
+def sqlite_repo(tmp_path):
+    repo = SQLiteBookRepository(str(tmp_path / "books.db"), pool_size=2)
+    yield repo
+    repo.close()
+
+
+def _add(repo, n):
+    for i in range(n):
+        repo.add_book({"title": f"Book {i % 7}", "publish_year": 2000 + i % 5})
+
+
+def test_sorted_index_stays_ordered_across_bucket_splits(monkeypatch):
+    monkeypatch.setattr(SortedIndex, "BUCKET_SIZE", 2)
+    index = SortedIndex()
+    keys = [5, 1, 4, 1, 3, 9, 2, 6, 5, 3]
+    for doc_id, key in enumerate(keys):
+        index.add(key, doc_id)
+    assert list(index.iter_from()) == sorted((key, doc_id) for doc_id, key in enumerate(keys))
+    assert next(index.iter_from(index.position_after(3, 4))) == (3, 9)
+
+
+@pytest.mark.parametrize("sort", ["title", "publish_year", "created_at", None])
+def test_keyset_pages_cover_every_book_once_in_order(repo, sort):
+    _add(repo, 23)
+    offset_order = [b.id for b in repo.list_books(sort=sort, per_page=100)[0]]
+    seen, cursor = [], None
+    while True:
+        books, cursor = repo.list_books(sort=sort, per_page=5, cursor=cursor)
+        seen += [b.id for b in books]
+        if cursor is None:
+            break
+    assert seen == offset_order
+    assert len(seen) == 23
+
+
+def test_keyset_pages_respect_filters(repo):
+    _add(repo, 30)
+    first, cursor = repo.list_books(publish_year=2001, sort="title", per_page=2)
+    rest, _ = repo.list_books(publish_year=2001, sort="title", per_page=10, cursor=cursor)
+    assert {b.publish_year for b in first + rest} == {2001}
+    assert len(first + rest) == 6
+
+
+def test_cursor_round_trips():
+    assert decode_cursor(encode_cursor("title", "Clean Code", 7), "title") == ("Clean Code", 7)
+
+
+@pytest.mark.parametrize("order, cursor", [
+    ("title", "not base64!"),
+    ("title", encode_cursor("title", "x", 1)[:-4]),
+    ("publish_year", encode_cursor("publish_year", "1994", 1)),  # key of the wrong type
+    ("publish_year", encode_cursor("publish_year", True, 1)),
+    ("title", encode_cursor("title", "x", "1")),  # id of the wrong type
+])
+def test_malformed_cursors_are_rejected(order, cursor):
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor, order)
+
+
+def test_cursor_for_another_sort_is_rejected(repo):
+    _add(repo, 3)
+    _, cursor = repo.list_books(sort="title", per_page=1)
+    with pytest.raises(InvalidCursorError):
+        repo.list_books(sort="publish_year", cursor=cursor)
+
+
+def test_created_at_cursor_with_a_bad_timestamp_is_rejected(repo):
+    _add(repo, 3)
+    with pytest.raises(InvalidCursorError):
+        repo.list_books(sort="created_at", cursor=encode_cursor("created_at", "yesterday", 1))
+
+
+def test_engines_list_the_same_books(tmp_path):
+    memory, sqlite = InMemoryBookRepository(), SQLiteBookRepository(str(tmp_path / "books.db"))
+    for repo in (memory, sqlite):
+        repo.add_category("Design")
+        repo.add_author("Gamma")
+        for i in range(12):
+            repo.add_book({"title": f"Design {i % 4}", "isbn": str(i), "publish_year": 2000 + i % 3,
+                           "category_id": 1, "description": "patterns", "authors": [1]})
+    for query in [{}, {"sort": "title"}, {"publish_year": 2001}, {"q": "design", "sort": "publish_year"},
+                  {"isbn": "5"}, {"page": 2, "per_page": 5}]:
+        ids = lambda repo: [b.id for b in repo.list_books(**query)[0]]
+        assert ids(memory) == ids(sqlite), query
+    assert sqlite.get_book(3).authors == memory.get_book(3).authors == [1]
+    sqlite.close()
+
+
+def test_duplicate_isbn_is_a_duplicate_key_error(repo):
+    repo.add_book({"title": "A", "isbn": "978-0132350884"})
+    with pytest.raises(DuplicateKeyError, match="ISBN"):
+        repo.add_book({"title": "B", "isbn": "978-0132350884"})
+
+
+def test_review_of_an_unknown_book_is_rejected(repo):
+    with pytest.raises(UnknownReferenceError):
+        repo.add_review(999, 1, 5)
+
+
+def test_sqlite_names_the_missing_references(sqlite_repo):
+    with pytest.raises(UnknownReferenceError, match="Unknown category: 999"):
+        sqlite_repo.add_book({"title": "A", "category_id": 999})
+    with pytest.raises(UnknownReferenceError, match="Unknown author: 7, 8"):
+        sqlite_repo.add_book({"title": "A", "authors": [7, 8]})
+    assert sqlite_repo.count_books() == 0  # nothing half-written
+
+
+def test_memory_engine_stores_unknown_references_as_given():
+    book = InMemoryBookRepository().add_book({"title": "A", "category_id": 999, "authors": [7]})
+    assert (book.category_id, book.authors) == (999, [7])
+
+
+def test_sqlite_maps_other_integrity_errors(sqlite_repo):
+    sqlite_repo.add_reader("Ann", "ann@example.com")
+    with pytest.raises(DuplicateKeyError, match="email"):
+        sqlite_repo.add_reader("Ann again", "ann@example.com")
+    book = sqlite_repo.add_book({"title": "A"})
+    with pytest.raises(ConstraintError, match="rating"):
+        sqlite_repo.add_review(book.id, 1, 9)
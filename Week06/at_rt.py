@@ -11,9 +11,14 @@ from fastapi import FastAPI, HTTPException, Depends, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel
 from datetime import datetime, timedelta
-from typing import Optional, Dict
+from typing import Optional
+import calendar
 import jwt
 
+# common/ resolves from the repo root: run with PYTHONPATH=<repo root> (see common/__init__.py)
+from common.jwt_cache import TokenCache
+from refresh_store import RefreshSessionStore
+
 app = FastAPI(title="Access Token & Refresh Token Demo")
 
 # ------------------------
@@ -27,6 +32,11 @@ REFRESH_TOKEN_EXPIRE_DAYS = 7
 
 # Security scheme
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
+
+# Verified access tokens, so a token is HMAC-checked once, not per request
+# (entries expire with the token; revoked tokens are rejected first)
+access_tokens = TokenCache(lambda token: jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]))
 
 # ------------------------
 # Fake Database
@@ -42,8 +52,9 @@ books_db = [
     {"id": 3, "title": "Data Science", "author": "Bob Johnson", "year": 2023}
 ]
 
-# Store active refresh tokens (in production, use Redis or database)
-active_refresh_tokens: Dict[str, str] = {}
+# Active refresh sessions by token id (jti) and by user; expired ones are
+# evicted automatically (in production, use Redis or database)
+refresh_sessions = RefreshSessionStore()
 
 # ------------------------
 # Request/Response Models
@@ -85,23 +96,23 @@ def create_access_token(username: str, role: str) -> str:
 def create_refresh_token(username: str) -> str:
     """Create long-lived refresh token"""
     expire = datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    # Store the session (not the token itself); its id goes into the token
+    jti = refresh_sessions.issue(username, calendar.timegm(expire.utctimetuple()))
     payload = {
         "sub": username,
         "type": "refresh",
+        "jti": jti,
         "exp": expire,
         "iat": datetime.utcnow()
     }
-    token = jwt.encode(payload, REFRESH_SECRET_KEY, algorithm=ALGORITHM)
-    # Store refresh token
-    active_refresh_tokens[token] = username
-    return token
+    return jwt.encode(payload, REFRESH_SECRET_KEY, algorithm=ALGORITHM)
 
 def verify_access_token(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
     """Verify and decode access token"""
     token = credentials.credentials
     
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = access_tokens.decode(token)
         
         if payload.get("type") != "access":
             raise HTTPException(
@@ -129,18 +140,18 @@ def verify_access_token(credentials: HTTPAuthorizationCredentials = Depends(secu
             detail="Invalid access token"
         )
 
-def verify_refresh_token(refresh_token: str) -> str:
+def verify_refresh_token(refresh_token: str) -> dict:
     """Verify and decode refresh token"""
     try:
-        # Check if token is in active list
-        if refresh_token not in active_refresh_tokens:
+        payload = jwt.decode(refresh_token, REFRESH_SECRET_KEY, algorithms=[ALGORITHM])
+        
+        # Check that its session is still active
+        if refresh_sessions.owner(payload.get("jti")) != payload.get("sub"):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Refresh token has been revoked or does not exist"
             )
         
-        payload = jwt.decode(refresh_token, REFRESH_SECRET_KEY, algorithms=[ALGORITHM])
-        
         if payload.get("type") != "refresh":
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -154,12 +165,10 @@ def verify_refresh_token(refresh_token: str) -> str:
                 detail="Invalid token payload"
             )
         
-        return username
+        return payload
     
     except jwt.ExpiredSignatureError:
-        # Remove expired token from active list
-        if refresh_token in active_refresh_tokens:
-            del active_refresh_tokens[refresh_token]
+        # its session is evicted by the store's expiry timer
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Refresh token has expired. Please login again."
@@ -183,7 +192,8 @@ def root():
             "login": "POST /login - Get access token and refresh token",
             "refresh": "POST /refresh - Exchange refresh token for new access token",
             "books": "GET /books - List books (requires access token)",
-            "logout": "POST /logout - Revoke refresh token"
+            "logout": "POST /logout - Revoke refresh token",
+            "logout_all": "POST /logout/all - Revoke every session of the user (requires access token)"
         },
         "token_info": {
             "access_token_lifetime": f"{ACCESS_TOKEN_EXPIRE_MINUTES} minutes",
@@ -226,11 +236,15 @@ def refresh_access_token(request: RefreshRequest):
     """
     Refresh endpoint - exchange refresh token for new access + new refresh token
     """
-    username = verify_refresh_token(request.refresh_token)
+    payload = verify_refresh_token(request.refresh_token)
+    username = payload["sub"]
     
-    # Xoá refresh token cũ
-    if request.refresh_token in active_refresh_tokens:
-        del active_refresh_tokens[request.refresh_token]
+    # Xoá refresh token cũ (only one concurrent refresh can win the rotation)
+    if refresh_sessions.revoke(payload["jti"]) is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Refresh token has been revoked or does not exist"
+        )
     
     # Tạo access token mới
     user = users_db[username]
@@ -248,18 +262,27 @@ def refresh_access_token(request: RefreshRequest):
     }
 
 @app.post("/logout")
-def logout(request: RefreshRequest):
+def logout(
+    request: RefreshRequest,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+):
     """
     Logout endpoint - revoke refresh token
     
     This removes the refresh token from the active list,
     preventing it from being used to generate new access tokens.
+    If the access token is sent too (Authorization: Bearer), it is
+    revoked as well instead of staying usable until it expires.
     """
-    refresh_token = request.refresh_token
+    try:
+        payload = jwt.decode(request.refresh_token, REFRESH_SECRET_KEY, algorithms=[ALGORITHM])
+    except jwt.InvalidTokenError:
+        payload = {}
+    username = refresh_sessions.revoke(payload.get("jti")) if payload.get("type") == "refresh" else None
     
-    if refresh_token in active_refresh_tokens:
-        username = active_refresh_tokens[refresh_token]
-        del active_refresh_tokens[refresh_token]
+    if username is not None:
+        if credentials is not None:
+            access_tokens.revoke(credentials.credentials)
         return {
             "message": f"User {username} logged out successfully",
             "detail": "Refresh token has been revoked"
@@ -270,6 +293,22 @@ def logout(request: RefreshRequest):
             detail="Refresh token not found or already revoked"
         )
 
+@app.post("/logout/all")
+def logout_all(
+    current_user: dict = Depends(verify_access_token),
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+):
+    """
+    Log out everywhere - revoke every refresh token of the current user
+    (and the access token used for this call)
+    """
+    revoked = refresh_sessions.revoke_user(current_user["sub"])
+    access_tokens.revoke(credentials.credentials, current_user)
+    return {
+        "message": f"User {current_user['sub']} logged out of all sessions",
+        "revoked_refresh_tokens": revoked
+    }
+
 @app.get("/books")
 def get_books(current_user: dict = Depends(verify_access_token)):
     """
@@ -319,8 +358,8 @@ def list_active_tokens(current_user: dict = Depends(verify_access_token)):
         )
     
     return {
-        "active_refresh_tokens": len(active_refresh_tokens),
-        "users": list(set(active_refresh_tokens.values()))
+        "active_refresh_tokens": len(refresh_sessions),
+        "users": refresh_sessions.users()
     }
 
 # ------------------------
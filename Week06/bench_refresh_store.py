@@ -0,0 +1,148 @@
+"""
+Memory / latency of the refresh-token store at scale.
+
+Compares the old `active_refresh_tokens` dict (full token string -> user)
+with RefreshSessionStore (refresh_store.py). Each store runs in its own
+subprocess so its resident memory is measured in isolation. The tokens
+are synthetic strings of a real refresh token's length, so no time goes
+into signing.
+
+    python bench_refresh_store.py                       # 10M tokens, 100k users
+    python bench_refresh_store.py --tokens 1000000 --users 1000
+
+Reported per store: issue cost, RSS added, lookup latency, "list users"
+(the /admin/tokens query), revoke-all-sessions for one user, and
+eviction as the clock runs past every expiry (total and the longest
+single pause).
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+TOKEN_LENGTH = 190  # a refresh JWT from at_rt.py (header.payload.signature)
+LIFETIME = 7 * 24 * 3600
+
+
+def rss_mb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+def timed(fn, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def bench_dict(tokens, users):
+    """The old store: token string -> user, pruned only when an expired token is presented."""
+    rng = random.Random(1)
+    names = [f"user{i}" for i in range(users)]
+    store = {}
+    base = rss_mb()
+    start = time.perf_counter()
+    for i in range(tokens):
+        token = f"{i:016x}".rjust(TOKEN_LENGTH, "t")
+        store[token] = names[rng.randrange(users)]
+    issue = (time.perf_counter() - start) / tokens
+    memory = rss_mb() - base
+
+    sample = [f"{rng.randrange(tokens):016x}".rjust(TOKEN_LENGTH, "t") for _ in range(100_000)]
+    lookup, _ = timed(lambda: [token in store for token in sample])
+    list_users, _ = timed(lambda: list(set(store.values())))
+    # no user index: revoking a user's sessions means scanning every token
+    revoke_user, revoked = timed(lambda: [t for t, u in store.items() if u == names[0]])
+    for token in revoked:
+        del store[token]
+    # nothing expires on its own: every token stays until it is presented again
+    return {
+        "issue_us": issue * 1e6, "rss_mb": memory, "lookup_us": lookup / len(sample) * 1e6,
+        "list_users_ms": list_users * 1e3, "revoke_user_ms": revoke_user * 1e3,
+        "revoked": len(revoked), "evict_s": None, "evict_pause_ms": None,
+        "left_after_expiry": len(store),
+    }
+
+
+def bench_store(tokens, users):
+    from refresh_store import RefreshSessionStore
+
+    rng = random.Random(1)
+    names = [f"user{i}" for i in range(users)]
+    now = [1_700_000_000.0]
+    store = RefreshSessionStore(clock=lambda: now[0])
+    every = max(tokens // 100_000, 1)
+    sample = []
+    base = rss_mb()
+    start = time.perf_counter()
+    for i in range(tokens):
+        # issue times spread over one lifetime: expiries land in many buckets
+        jti = store.issue(names[rng.randrange(users)], now[0] + LIFETIME + i % LIFETIME)
+        if i % every == 0:
+            sample.append(jti)
+    issue = (time.perf_counter() - start) / tokens
+    memory = rss_mb() - base
+
+    lookup, _ = timed(lambda: [store.owner(jti) for jti in sample])
+    list_users, _ = timed(store.users)
+    revoke_user, revoked = timed(lambda: store.revoke_user(names[0]))
+    # let the clock run past every expiry one wheel bucket at a time, as a
+    # live server would: each call evicts the bucket that just expired
+    evict = pause = 0.0
+    end = now[0] + 2 * LIFETIME + store.resolution
+    while now[0] < end:
+        now[0] += store.resolution
+        seconds, _ = timed(lambda: len(store))
+        evict += seconds
+        pause = max(pause, seconds)
+    return {
+        "issue_us": issue * 1e6, "rss_mb": memory, "lookup_us": lookup / len(sample) * 1e6,
+        "list_users_ms": list_users * 1e3, "revoke_user_ms": revoke_user * 1e3,
+        "revoked": revoked, "evict_s": evict, "evict_pause_ms": pause * 1e3,
+        "left_after_expiry": len(store),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tokens", type=int, default=10_000_000)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--only", choices=["dict", "store"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.only:
+        result = (bench_dict if args.only == "dict" else bench_store)(args.tokens, args.users)
+        print(json.dumps(result))
+        return
+
+    print(f"{args.tokens:,} issued tokens, {args.users:,} users\n")
+    rows = []
+    for label, only in (("dict[token]", "dict"), ("session store", "store")):
+        out = subprocess.run(
+            [sys.executable, __file__, "--only", only, "--tokens", str(args.tokens), "--users", str(args.users)],
+            capture_output=True, text=True, check=True,
+        )
+        rows.append((label, json.loads(out.stdout)))
+
+    print(f"{'':<24}" + "".join(f"{label:>16}" for label, _ in rows))
+    for key, title, fmt in (
+        ("issue_us", "issue (us/token)", "{:.2f}"),
+        ("rss_mb", "memory (MB)", "{:,.0f}"),
+        ("lookup_us", "lookup (us)", "{:.2f}"),
+        ("list_users_ms", "list users (ms)", "{:,.2f}"),
+        ("revoke_user_ms", "revoke user (ms)", "{:,.3f}"),
+        ("revoked", "  sessions revoked", "{:,}"),
+        ("evict_s", "evict expired (s)", "{:.2f}"),
+        ("evict_pause_ms", "  longest pause (ms)", "{:.2f}"),
+        ("left_after_expiry", "  left after expiry", "{:,}"),
+    ):
+        print(f"{title:<24}" + "".join(f"{'-' if r[key] is None else fmt.format(r[key]):>16}" for _, r in rows))
+
+
+if __name__ == "__main__":
+    main()
@@ -10,7 +10,9 @@ from fastapi import FastAPI, Form, Request
 from fastapi.responses import RedirectResponse, HTMLResponse, JSONResponse
 from datetime import datetime, timedelta
 import jwt
-import uuid
+import os
+
+from code_store import make_code_store
 
 app = FastAPI(title="OAuth2 Auth Server")
 
@@ -21,7 +23,19 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 5
 
 # Giả lập database người dùng và code
 fake_users = {"admin": "admin123"}
-auth_codes = {}  # code -> username
+# code -> grant, single-use with a TTL; OAUTH_CODE_DB=<file> shares codes
+# between workers / restarts through SQLite (see code_store.py)
+auth_codes = make_code_store()
+
+
+@app.on_event("startup")
+def start_code_sweeper():
+    auth_codes.start_sweeper(float(os.environ.get("OAUTH_CODE_SWEEP_INTERVAL", "30")))
+
+
+@app.on_event("shutdown")
+def stop_code_sweeper():
+    auth_codes.close()
 
 # ---------------------
 # Trang login (HTML)
@@ -58,9 +72,8 @@ def login(
     if username not in fake_users or fake_users[username] != password:
         return HTMLResponse("<h3>❌ Invalid credentials</h3>", status_code=401)
 
-    # Sinh authorization code ngẫu nhiên
-    code = str(uuid.uuid4())
-    auth_codes[code] = username
+    # Sinh authorization code ngẫu nhiên, gắn với client + redirect_uri
+    code = auth_codes.issue(username, client_id, redirect_uri)
     print(f"[AuthServer] Issued code for {username}: {code}")
 
     # Redirect về client (Resource server)
@@ -78,10 +91,12 @@ def exchange_code_for_token(
     """
     Client gửi code để đổi access token
     """
-    if code not in auth_codes:
+    # consume() is atomic: a code yields at most one token, even across workers
+    grant = auth_codes.consume(code)
+    if grant is None or grant["client_id"] != client_id or grant["redirect_uri"] != redirect_uri:
         return JSONResponse({"error": "invalid_grant"}, status_code=400)
 
-    username = auth_codes.pop(code)
+    username = grant["username"]
     expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     token = jwt.encode(
         {"sub": username, "exp": expire, "iat": datetime.utcnow()},
@@ -0,0 +1,204 @@
+"""
+Authorization-code store for auth_server.py.
+
+    codes = make_code_store()          # from the environment, see below
+    code = codes.issue("admin", client_id, redirect_uri)
+    grant = codes.consume(code)        # dict once, then None forever
+
+- codes expire after `ttl` seconds (OAUTH_CODE_TTL, default 60; RFC 6749
+  allows at most 10 minutes) and are single-use: consume() removes the
+  code and returns its grant in one atomic step, so two concurrent
+  /token calls with the same code cannot both get a token
+- a background thread sweeps codes that were never exchanged
+  (start_sweeper / close)
+
+Backends:
+- MemoryCodeStore: one process only, lost on restart (the old dict)
+- SQLiteCodeStore: a file in WAL mode. Every uvicorn worker opens the same
+  file, so a code issued by one worker can be exchanged at another,
+  and codes survive a restart. Consumption is a single
+  DELETE ... RETURNING statement.
+
+make_code_store() uses SQLite when OAUTH_CODE_DB (a file path) is set:
+
+    OAUTH_CODE_DB=auth_codes.db uvicorn auth_server:app --port 8001 --workers 4
+"""
+
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Optional, Tuple
+
+Grant = Dict[str, str]  # username, client_id, redirect_uri
+
+
+class CodeStore(ABC):
+    """Issue / consume / sweeper logic; backends implement _put, _take, sweep and __len__."""
+
+    def __init__(self, ttl: float = 60.0, clock=time.time):
+        self.ttl = ttl
+        self._clock = clock
+        self._sweeper: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def issue(self, username: str, client_id: str, redirect_uri: str) -> str:
+        code = secrets.token_urlsafe(32)
+        self._put(code, {"username": username, "client_id": client_id, "redirect_uri": redirect_uri},
+                  self._clock() + self.ttl)
+        return code
+
+    def consume(self, code: str) -> Optional[Grant]:
+        """The code's grant, removing the code; None if unknown, used or expired."""
+        found = self._take(code)
+        if found is None:
+            return None
+        grant, expires_at = found
+        return grant if expires_at > self._clock() else None
+
+    def start_sweeper(self, interval: float = 30.0) -> None:
+        if self._sweeper is not None:
+            return
+
+        def run():
+            while not self._stop.wait(interval):
+                self.sweep()
+
+        self._stop.clear()
+        self._sweeper = threading.Thread(target=run, name="code-store-sweeper", daemon=True)
+        self._sweeper.start()
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._sweeper is not None:
+            self._sweeper.join()
+            self._sweeper = None
+
+    @abstractmethod
+    def _put(self, code: str, grant: Grant, expires_at: float) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def _take(self, code: str) -> Optional[Tuple[Grant, float]]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def sweep(self) -> int:
+        """Delete expired codes; returns how many."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+
+class MemoryCodeStore(CodeStore):
+    def __init__(self, ttl: float = 60.0, clock=time.time):
+        super().__init__(ttl, clock)
+        self._codes: Dict[str, Tuple[Grant, float]] = {}
+        self._lock = threading.Lock()
+
+    def _put(self, code, grant, expires_at):
+        with self._lock:
+            self._codes[code] = (grant, expires_at)
+
+    def _take(self, code):
+        with self._lock:
+            return self._codes.pop(code, None)
+
+    def sweep(self) -> int:
+        now = self._clock()
+        with self._lock:
+            expired = [code for code, (_, expires_at) in self._codes.items() if expires_at <= now]
+            for code in expired:
+                del self._codes[code]
+        return len(expired)
+
+    def __len__(self) -> int:
+        return len(self._codes)
+
+
+class SQLiteCodeStore(CodeStore):
+    # RETURNING needs SQLite 3.35+; older libraries select + delete in one
+    # IMMEDIATE transaction instead
+    _RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+    def __init__(self, path: str, ttl: float = 60.0, clock=time.time):
+        super().__init__(ttl, clock)
+        self.path = path
+        self._local = threading.local()  # one connection per thread
+        self._connections = []
+        db = self._db()
+        db.execute("PRAGMA journal_mode=WAL")
+        with db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS auth_codes ("
+                " code TEXT PRIMARY KEY, username TEXT NOT NULL, client_id TEXT NOT NULL,"
+                " redirect_uri TEXT NOT NULL, expires_at REAL NOT NULL) WITHOUT ROWID"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS auth_codes_expires_at ON auth_codes (expires_at)")
+
+    def _db(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            # autocommit (isolation_level=None): each statement is its own
+            # transaction unless we BEGIN explicitly
+            db = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            # WAL + NORMAL: no fsync per commit; a power cut may lose the
+            # newest codes (users just log in again) but never corrupts the file
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+            self._connections.append(db)
+        return db
+
+    def _put(self, code, grant, expires_at):
+        self._db().execute(
+            "INSERT INTO auth_codes (code, username, client_id, redirect_uri, expires_at) VALUES (?, ?, ?, ?, ?)",
+            (code, grant["username"], grant["client_id"], grant["redirect_uri"], expires_at),
+        )
+
+    def _take(self, code):
+        db = self._db()
+        if self._RETURNING:
+            row = db.execute(
+                "DELETE FROM auth_codes WHERE code = ? RETURNING username, client_id, redirect_uri, expires_at",
+                (code,),
+            ).fetchone()
+        else:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                row = db.execute(
+                    "SELECT username, client_id, redirect_uri, expires_at FROM auth_codes WHERE code = ?", (code,)
+                ).fetchone()
+                db.execute("DELETE FROM auth_codes WHERE code = ?", (code,))
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        username, client_id, redirect_uri, expires_at = row
+        return {"username": username, "client_id": client_id, "redirect_uri": redirect_uri}, expires_at
+
+    def sweep(self) -> int:
+        return self._db().execute("DELETE FROM auth_codes WHERE expires_at <= ?", (self._clock(),)).rowcount
+
+    def __len__(self) -> int:
+        return self._db().execute("SELECT COUNT(*) FROM auth_codes").fetchone()[0]
+
+    def close(self) -> None:
+        super().close()
+        for db in self._connections:
+            db.close()
+        self._connections.clear()
+        self._local = threading.local()
+
+
+def make_code_store() -> CodeStore:
+    ttl = float(os.environ.get("OAUTH_CODE_TTL", "60"))
+    path = os.environ.get("OAUTH_CODE_DB")
+    if path:
+        return SQLiteCodeStore(path, ttl=ttl)
+    return MemoryCodeStore(ttl=ttl)
@@ -0,0 +1,139 @@
+"""
+Load test: /callback throughput under concurrent logins.
+
+Starts, each with uvicorn in its own process:
+- auth_server.py              :8001 (the upstream of the code exchange)
+- resources_server.py         :8000 (async, pooled httpx exchange)
+- legacy_app (below)          :8002 (the previous sync requests.post callback)
+
+then, per target and concurrency level, logs users in against the Auth
+Server to obtain codes and fires the /callback requests with that many
+in flight, reporting callbacks/s and latency percentiles. Run from this
+folder (needs uvicorn):
+
+    python load_test.py
+    python load_test.py --logins 2000 --concurrency 1 10 50 200
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from urllib.parse import parse_qs, urlparse
+
+import httpx
+import requests
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+from resources_server import AUTH_SERVER_URL, CLIENT_ID, CLIENT_SECRET, REDIRECT_URI
+
+# --- the callback as it was: blocking, new connection per call, no timeout
+
+legacy_app = FastAPI(title="Legacy callback")
+
+
+@legacy_app.get("/callback")
+def legacy_callback(code: str, state: str):
+    data = {"code": code, "client_id": CLIENT_ID, "client_secret": CLIENT_SECRET, "redirect_uri": REDIRECT_URI}
+    r = requests.post(f"{AUTH_SERVER_URL}/token", data=data)
+    if r.status_code != 200:
+        return JSONResponse({"error": "cannot exchange code"}, status_code=400)
+    return {"access_token": r.json()["access_token"]}
+
+
+# --- harness
+
+SERVERS = {
+    "auth": ("auth_server:app", 8001),
+    "async pooled": ("resources_server:app", 8000),
+    "legacy sync": ("load_test:legacy_app", 8002),
+}
+
+
+def start(app, port):
+    env = {**os.environ, "OAUTH_CODE_TTL": "600"}
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app, "--port", str(port), "--log-level", "warning"],
+        cwd=os.path.dirname(os.path.abspath(__file__)), env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.time() + 15
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return process
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError(f"{app} did not start on port {port}")
+
+
+async def issue_codes(client, count, concurrency):
+    form = {"username": "admin", "password": "admin123", "client_id": CLIENT_ID,
+            "redirect_uri": REDIRECT_URI, "state": "load"}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            r = await client.post(f"{AUTH_SERVER_URL}/login", data=form)
+            return parse_qs(urlparse(r.headers["location"]).query)["code"][0]
+
+    return await asyncio.gather(*(one() for _ in range(count)))
+
+
+async def run_callbacks(client, port, codes, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, failures = [], 0
+
+    async def one(code):
+        nonlocal failures
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                r = await client.get(f"http://127.0.0.1:{port}/callback", params={"code": code, "state": "load"})
+                failures += r.status_code != 200
+            except httpx.HTTPError:
+                failures += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(code) for code in codes))
+    return len(codes) / (time.perf_counter() - start), latencies, failures
+
+
+async def measure(targets, logins, levels):
+    limits = httpx.Limits(max_connections=max(levels) + 10)
+    async with httpx.AsyncClient(timeout=60, limits=limits) as client:
+        print(f"{'callback':<14} {'in flight':>9} {'callbacks/s':>12} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+        for label, port in targets:
+            for concurrency in levels:
+                codes = await issue_codes(client, logins, concurrency)
+                rate, latencies, failures = await run_callbacks(client, port, codes, concurrency)
+                q = statistics.quantiles(latencies, n=100)
+                print(f"{label:<14} {concurrency:>9} {rate:>12,.0f} {q[49] * 1e3:>8.1f} "
+                      f"{q[94] * 1e3:>8.1f} {q[98] * 1e3:>8.1f} {failures:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=1000, help="callbacks per measurement")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50, 100])
+    args = parser.parse_args()
+
+    processes = [start(app, port) for app, port in SERVERS.values()]
+    try:
+        targets = [(label, port) for label, (_, port) in SERVERS.items() if label != "auth"]
+        asyncio.run(measure(targets, args.logins, args.concurrency))
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == "__main__":
+    main()
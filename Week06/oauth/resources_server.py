@@ -10,7 +10,11 @@ Cung cấp API được bảo vệ:
 from fastapi import FastAPI, Request, HTTPException, status, Depends
 from fastapi.responses import RedirectResponse, JSONResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-import requests
+from typing import Optional
+import asyncio
+import os
+import random
+import httpx
 import jwt
 
 app = FastAPI(title="OAuth2 Resource Server")
@@ -25,6 +29,60 @@ ALGORITHM = "HS256"
 
 security = HTTPBearer()
 
+# Token exchange: one shared async client (keep-alive pool to the Auth
+# Server), bounded timeouts, retries with exponential backoff + jitter
+TOKEN_EXCHANGE_TIMEOUT = httpx.Timeout(float(os.environ.get("TOKEN_EXCHANGE_TIMEOUT", "5")), connect=2.0)
+TOKEN_EXCHANGE_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=50)
+TOKEN_EXCHANGE_RETRIES = int(os.environ.get("TOKEN_EXCHANGE_RETRIES", "3"))
+TOKEN_EXCHANGE_BACKOFF = 0.1  # seconds, doubled per attempt
+
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """The shared client, opened on first use (also without the startup event, e.g. in tests)."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            base_url=AUTH_SERVER_URL, timeout=TOKEN_EXCHANGE_TIMEOUT, limits=TOKEN_EXCHANGE_LIMITS
+        )
+    return _http_client
+
+
+@app.on_event("shutdown")
+async def close_http_client():
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+async def exchange_code(code: str) -> httpx.Response:
+    """
+    POST the code to the Auth Server's /token.
+
+    A code is single-use, so only failures where the Auth Server cannot
+    have consumed it are retried: the connection could not be made (or
+    no pooled one was free), or it answered 502/503/504. A read timeout
+    is not retried, since the code may already be spent.
+    """
+    data = {
+        "code": code,
+        "client_id": CLIENT_ID,
+        "client_secret": CLIENT_SECRET,
+        "redirect_uri": REDIRECT_URI
+    }
+    for attempt in range(TOKEN_EXCHANGE_RETRIES + 1):
+        last = attempt == TOKEN_EXCHANGE_RETRIES
+        try:
+            r = await get_http_client().post("/token", data=data)
+            if r.status_code not in (502, 503, 504) or last:
+                return r
+        except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout):
+            if last:
+                raise
+        await asyncio.sleep(TOKEN_EXCHANGE_BACKOFF * 2 ** attempt * random.uniform(0.5, 1.5))
+
 # ---------------------
 # Simulate client login flow
 # ---------------------
@@ -42,18 +100,15 @@ def login_demo():
 
 
 @app.get("/callback")
-def oauth_callback(code: str, state: str):
+async def oauth_callback(code: str, state: str):
     """
     Nhận code từ Auth Server, đổi sang access token
+    (async: không giữ thread nào trong lúc chờ Auth Server)
     """
-    token_url = f"{AUTH_SERVER_URL}/token"
-    data = {
-        "code": code,
-        "client_id": CLIENT_ID,
-        "client_secret": CLIENT_SECRET,
-        "redirect_uri": REDIRECT_URI
-    }
-    r = requests.post(token_url, data=data)
+    try:
+        r = await exchange_code(code)
+    except httpx.HTTPError:
+        return JSONResponse({"error": "auth server unavailable"}, status_code=502)
     if r.status_code != 200:
         return JSONResponse({"error": "cannot exchange code"}, status_code=400)
 
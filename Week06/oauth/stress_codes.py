@@ -0,0 +1,98 @@
+"""
+Several processes sharing one SQLite code store, as uvicorn workers would.
+
+1. every worker issues codes into the shared file
+2. every worker then tries to consume *all* codes (its own and the
+   others'), in its own shuffled order
+3. each code must have been consumed exactly once across all workers
+
+Also prints issue / consume throughput for the memory and SQLite
+backends. Run from this folder:
+
+    python stress_codes.py
+    python stress_codes.py --workers 8 --codes 2000
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+
+from code_store import MemoryCodeStore, SQLiteCodeStore
+
+
+def issue_codes(path, count, queue):
+    store = SQLiteCodeStore(path)
+    queue.put([store.issue("admin", "demo-client", "http://127.0.0.1:8000/callback") for _ in range(count)])
+    store.close()
+
+
+def consume_codes(path, codes, seed, barrier, queue):
+    store = SQLiteCodeStore(path)
+    codes = list(codes)
+    random.Random(seed).shuffle(codes)
+    barrier.wait()
+    queue.put([code for code in codes if store.consume(code) is not None])
+    store.close()
+
+
+def run_workers(target, args_for, workers):
+    queue = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=target, args=(*args_for(i), queue)) for i in range(workers)]
+    for p in processes:
+        p.start()
+    results = [queue.get() for _ in processes]
+    for p in processes:
+        p.join()
+    return results
+
+
+def throughput(store, n):
+    start = time.perf_counter()
+    codes = [store.issue("admin", "demo-client", "http://127.0.0.1:8000/callback") for _ in range(n)]
+    issued = time.perf_counter() - start
+    start = time.perf_counter()
+    for code in codes:
+        store.consume(code)
+    consumed = time.perf_counter() - start
+    return n / issued, n / consumed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--codes", type=int, default=1000, help="codes issued per worker")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "codes.db")
+        SQLiteCodeStore(path).close()  # create the schema once
+
+        issued = [code for batch in run_workers(issue_codes, lambda i: (path, args.codes), args.workers)
+                  for code in batch]
+        barrier = multiprocessing.Barrier(args.workers)
+        consumed = run_workers(consume_codes, lambda i: (path, issued, i, barrier), args.workers)
+
+        wins = {}
+        for batch in consumed:
+            for code in batch:
+                wins[code] = wins.get(code, 0) + 1
+        print(f"{args.workers} workers, {len(issued):,} codes issued")
+        print(f"  consumed per worker: {[len(batch) for batch in consumed]}")
+        print(f"  consumed exactly once: {sum(1 for c in issued if wins.get(c) == 1):,}")
+        print(f"  consumed twice or more: {sum(1 for n in wins.values() if n > 1)}")
+        print(f"  never consumed: {sum(1 for c in issued if c not in wins)}")
+        assert all(wins.get(code) == 1 for code in issued), "a code was lost or consumed twice"
+
+        print("\nsingle process, codes/s     issue    consume")
+        for label, store in (("memory", MemoryCodeStore()), ("sqlite (WAL)", SQLiteCodeStore(os.path.join(tmp, "t.db")))):
+            issue_rate, consume_rate = throughput(store, 5000)
+            print(f"  {label:<22} {issue_rate:>9,.0f} {consume_rate:>10,.0f}")
+            store.close()
+    print("OK: every code consumed exactly once")
+
+
+if __name__ == "__main__":
+    main()
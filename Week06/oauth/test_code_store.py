@@ -0,0 +1,86 @@
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+import auth_server
+from code_store import CodeStore, MemoryCodeStore, SQLiteCodeStore
+
+
+@pytest.fixture
+def clock():
+    return [1000.0]
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def codes(request, tmp_path, clock):
+    if request.param == "memory":
+        store = MemoryCodeStore(ttl=60, clock=lambda: clock[0])
+    else:
+        store = SQLiteCodeStore(str(tmp_path / "codes.db"), ttl=60, clock=lambda: clock[0])
+    yield store
+    store.close()
+
+
+def test_a_code_is_consumed_once(codes):
+    code = codes.issue("admin", "client", "http://cb")
+    assert codes.consume(code) == {"username": "admin", "client_id": "client", "redirect_uri": "http://cb"}
+    assert codes.consume(code) is None
+    assert codes.consume("never-issued") is None
+
+
+def test_an_expired_code_is_refused_and_swept(codes, clock):
+    stale = codes.issue("admin", "client", "http://cb")
+    clock[0] += 30
+    fresh = codes.issue("admin", "client", "http://cb")
+    clock[0] += 31
+    assert codes.sweep() == 1
+    assert len(codes) == 1
+    assert codes.consume(stale) is None
+    clock[0] += 60
+    assert codes.consume(fresh) is None  # expired, though never swept
+
+
+def test_concurrent_consumers_get_one_grant(codes):
+    code = codes.issue("admin", "client", "http://cb")
+    barrier = threading.Barrier(8)
+    grants = []
+
+    def consume():
+        barrier.wait()
+        grants.append(codes.consume(code))
+
+    threads = [threading.Thread(target=consume) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sum(grant is not None for grant in grants) == 1
+
+
+def test_sqlite_codes_are_shared_between_workers(tmp_path):
+    issuer = SQLiteCodeStore(str(tmp_path / "codes.db"))
+    exchanger = SQLiteCodeStore(str(tmp_path / "codes.db"))
+    code = issuer.issue("admin", "client", "http://cb")
+    assert exchanger.consume(code)["username"] == "admin"
+    assert issuer.consume(code) is None
+    issuer.close()
+    exchanger.close()
+
+
+def test_code_store_is_abstract():
+    with pytest.raises(TypeError):
+        CodeStore()
+
+
+def test_token_endpoint_accepts_a_code_once(monkeypatch):
+    monkeypatch.setattr(auth_server, "auth_codes", MemoryCodeStore())
+    client = TestClient(auth_server.app)
+    login = client.post("/login", data={
+        "username": "admin", "password": "admin123", "client_id": "demo-client",
+        "redirect_uri": "http://cb", "state": "s",
+    }, follow_redirects=False)
+    code = login.headers["location"].split("code=")[1].split("&")[0]
+    form = {"code": code, "client_id": "demo-client", "client_secret": "x", "redirect_uri": "http://cb"}
+    assert client.post("/token", data=form).status_code == 200
+    assert client.post("/token", data=form).json() == {"error": "invalid_grant"}
@@ -0,0 +1,66 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+import resources_server as rs
+
+
+@pytest.fixture
+def auth_server(monkeypatch):
+    """Scripted /token answers: a status code or an exception per call."""
+    script, calls = [], []
+
+    def handler(request):
+        calls.append(request)
+        outcome = script.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        body = {"access_token": "token-" + "x" * 30} if outcome == 200 else {"error": "invalid_grant"}
+        return httpx.Response(outcome, json=body)
+
+    monkeypatch.setattr(rs, "TOKEN_EXCHANGE_BACKOFF", 0)
+    monkeypatch.setattr(rs, "TOKEN_EXCHANGE_RETRIES", 2)
+    monkeypatch.setattr(rs, "_http_client", httpx.AsyncClient(
+        base_url=rs.AUTH_SERVER_URL, transport=httpx.MockTransport(handler)))
+    return script, calls
+
+
+def _callback():
+    return TestClient(rs.app).get("/callback", params={"code": "c", "state": "s"})
+
+
+def test_unavailable_and_unreachable_answers_are_retried(auth_server):
+    script, calls = auth_server
+    script += [503, httpx.ConnectError("refused"), 200]
+    assert _callback().status_code == 200
+    assert len(calls) == 3
+    assert dict(httpx.QueryParams(calls[0].content.decode()))["code"] == "c"
+
+
+def test_retries_are_bounded(auth_server):
+    script, calls = auth_server
+    script += [503, 503, 503]
+    assert _callback().status_code == 400  # the last 503 is passed on
+    script += [httpx.ConnectError("refused")] * 3
+    assert _callback().status_code == 502
+    assert len(calls) == 6
+
+
+@pytest.mark.parametrize("outcome, status", [(400, 400), (httpx.ReadTimeout("slow"), 502)])
+def test_answers_that_may_have_spent_the_code_are_not_retried(auth_server, outcome, status):
+    script, calls = auth_server
+    script += [outcome]
+    assert _callback().status_code == status
+    assert len(calls) == 1
+
+
+def test_http_client_is_opened_lazily_and_closed_on_shutdown(monkeypatch):
+    monkeypatch.setattr(rs, "_http_client", None)
+    client = rs.get_http_client()
+    assert rs.get_http_client() is client
+    asyncio.run(rs.close_http_client())
+    assert client.is_closed and rs._http_client is None
+    assert not rs.get_http_client().is_closed
+    asyncio.run(rs.close_http_client())
@@ -0,0 +1,123 @@
+"""
+In-memory refresh-token sessions for at_rt.py, indexed by token id and
+by user, with expired entries evicted by a timer wheel.
+
+    sessions = RefreshSessionStore()
+    jti = sessions.issue("admin", expires_at)   # put it in the token's "jti" claim
+    sessions.owner(jti)                         # "admin" while active, else None
+    sessions.revoke(jti)                        # rotation / logout
+    sessions.revoke_user("admin")               # log out everywhere
+
+- the store keeps the jti (an int, hex in the token), not the token
+  string: one small int per session instead of a ~200-byte JWT. jtis
+  count up from a random 62-bit start: unique within a process and
+  unlikely to repeat across restarts; they need not be secret, since
+  the token carrying one is signed
+- jti -> user and user -> {jti}: lookups O(1), users() O(users),
+  revoke_user() O(sessions of that user)
+- timer wheel: sessions are bucketed by expiry (`resolution` seconds per
+  bucket); every call first drops the buckets that have fully expired,
+  so the store never holds more than the sessions issued within one
+  token lifetime (+ one bucket). A session may outlive its exp by up to
+  `resolution` seconds here; the JWT's own exp check covers that gap.
+- revoked jtis stay in their bucket list until it expires, so revoke
+  touches only that session's own entries
+
+Thread-safe (FastAPI runs sync endpoints in a thread pool).
+"""
+
+import heapq
+import itertools
+import secrets
+import threading
+import time
+from typing import Dict, List, Optional, Set
+
+
+class RefreshSessionStore:
+    def __init__(self, resolution: int = 60, clock=time.time):
+        self.resolution = resolution
+        self._clock = clock
+        self._ids = itertools.count(secrets.randbits(62))
+        self._owner: Dict[int, str] = {}          # jti -> user
+        self._by_user: Dict[str, Set[int]] = {}   # user -> active jtis
+        self._buckets: Dict[int, List[int]] = {}  # expiry bucket -> jtis
+        self._bucket_heap: List[int] = []         # bucket numbers, soonest first
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._expire()
+            return len(self._owner)
+
+    def _expire(self) -> None:
+        # a bucket is dropped once its last second has passed
+        current = int(self._clock()) // self.resolution
+        while self._bucket_heap and self._bucket_heap[0] < current:
+            for jti in self._buckets.pop(heapq.heappop(self._bucket_heap)):
+                user = self._owner.pop(jti, None)
+                if user is not None:
+                    sessions = self._by_user[user]
+                    sessions.discard(jti)
+                    if not sessions:
+                        del self._by_user[user]
+
+    def issue(self, user: str, expires_at: float) -> str:
+        """Register a new session; returns its jti (hex string)."""
+        with self._lock:
+            self._expire()
+            jti = next(self._ids)
+            self._owner[jti] = user
+            self._by_user.setdefault(user, set()).add(jti)
+            bucket = int(expires_at) // self.resolution
+            if bucket not in self._buckets:
+                self._buckets[bucket] = []
+                heapq.heappush(self._bucket_heap, bucket)
+            self._buckets[bucket].append(jti)
+            return format(jti, "x")
+
+    @staticmethod
+    def _parse(jti) -> Optional[int]:
+        try:
+            return int(jti, 16)
+        except (TypeError, ValueError):
+            return None
+
+    def owner(self, jti: str) -> Optional[str]:
+        """User of an active session, None if unknown, revoked or expired."""
+        with self._lock:
+            self._expire()
+            return self._owner.get(self._parse(jti))
+
+    def revoke(self, jti: str) -> Optional[str]:
+        """End one session; returns its user, or None if it was not active."""
+        key = self._parse(jti)
+        with self._lock:
+            self._expire()
+            user = self._owner.pop(key, None)
+            if user is not None:
+                sessions = self._by_user[user]
+                sessions.discard(key)
+                if not sessions:
+                    del self._by_user[user]
+            return user
+
+    def revoke_user(self, user: str) -> int:
+        """End every session of `user`; returns how many there were."""
+        with self._lock:
+            self._expire()
+            sessions = self._by_user.pop(user, set())
+            for jti in sessions:
+                del self._owner[jti]
+            return len(sessions)
+
+    def users(self) -> List[str]:
+        """Users with at least one active session."""
+        with self._lock:
+            self._expire()
+            return list(self._by_user)
+
+    def sessions_of(self, user: str) -> int:
+        with self._lock:
+            self._expire()
+            return len(self._by_user.get(user, ()))
@@ -0,0 +1,63 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import at_rt
+from refresh_store import RefreshSessionStore
+
+
+@pytest.fixture
+def clock():
+    return [1_000_000.0]
+
+
+@pytest.fixture
+def sessions(clock):
+    return RefreshSessionStore(resolution=60, clock=lambda: clock[0])
+
+
+def test_sessions_are_indexed_by_jti_and_user(sessions, clock):
+    a = sessions.issue("ann", clock[0] + 600)
+    b = sessions.issue("ann", clock[0] + 600)
+    c = sessions.issue("bob", clock[0] + 600)
+    assert len({a, b, c}) == 3
+    assert (sessions.owner(a), sessions.owner(c), sessions.owner("zz"), sessions.owner(None)) == ("ann", "bob", None, None)
+    assert sorted(sessions.users()) == ["ann", "bob"]
+    assert sessions.revoke(a) == "ann" and sessions.revoke(a) is None
+    assert sessions.revoke_user("ann") == 1
+    assert sessions.users() == ["bob"] and len(sessions) == 1
+
+
+def test_expired_sessions_are_evicted_by_bucket(sessions, clock):
+    soon = sessions.issue("ann", clock[0] + 100)
+    later = sessions.issue("ann", clock[0] + 1000)
+    clock[0] += 100
+    assert sessions.owner(soon) == "ann"  # its bucket is not over yet
+    clock[0] += 120
+    assert sessions.owner(soon) is None
+    assert sessions.owner(later) == "ann"
+    assert sessions.sessions_of("ann") == 1
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(at_rt, "refresh_sessions", RefreshSessionStore())
+    return TestClient(at_rt.app)
+
+
+def _login(client):
+    return client.post("/login", json={"username": "user", "password": "user123"}).json()
+
+
+def test_refresh_rotates_the_token(client):
+    old = _login(client)["refresh_token"]
+    new = client.post("/refresh", json={"refresh_token": old}).json()["refresh_token"]
+    assert client.post("/refresh", json={"refresh_token": old}).status_code == 401
+    assert client.post("/refresh", json={"refresh_token": new}).status_code == 200
+
+
+def test_logout_all_ends_every_session(client):
+    first, second = _login(client), _login(client)
+    headers = {"Authorization": f"Bearer {first['access_token']}"}
+    assert client.post("/logout/all", headers=headers).json()["revoked_refresh_tokens"] == 2
+    assert client.post("/refresh", json={"refresh_token": second["refresh_token"]}).status_code == 401
+    assert client.get("/me", headers=headers).status_code == 401
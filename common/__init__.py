@@ -0,0 +1,10 @@
+"""
+Helpers shared by the weekly demo apps.
+
+The apps import this package (and Week02's shared store.py / batch.py as
+`Week02.store` / `Week02.batch`) from the repository root, so run them
+from their own folder with the root on PYTHONPATH:
+
+    cd Week03 && PYTHONPATH=.. uvicorn extensibility:app --reload
+    cd Week02/v4_cache && PYTHONPATH=../.. python app.py
+"""
@@ -0,0 +1,94 @@
+"""
+Auth overhead per request, with and without the verified-token cache.
+
+1. the verify function alone (Week02 v2, Week04, Week06 at_rt), same token
+   over and over, cache disabled (JWT_CACHE_MAX_ENTRIES=0 equivalent) vs
+   enabled
+2. a full protected GET through the app (test client, no network)
+
+    PYTHONPATH=. python common/bench_jwt_cache.py
+    PYTHONPATH=. python common/bench_jwt_cache.py --calls 50000 --requests 3000
+"""
+
+import argparse
+import importlib.util
+import os
+import sys
+import time
+import warnings
+
+from fastapi.security import HTTPAuthorizationCredentials
+
+from common.jwt_cache import TokenCache
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load(name, relative_path):
+    """Import an app by path; its own folder is importable while it loads, as when run from there."""
+    path = os.path.join(ROOT, relative_path)
+    sys.path.insert(0, os.path.dirname(path))
+    try:
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    finally:
+        sys.path.remove(os.path.dirname(path))
+    return module
+
+
+def per_call_us(fn, calls):
+    fn()  # warm (fills the cache when enabled)
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=20_000, help="verify calls per measurement")
+    parser.add_argument("--requests", type=int, default=2_000, help="HTTP requests per measurement")
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore", message="The HMAC key")  # the demo secrets are short
+
+    from fastapi.testclient import TestClient
+
+    v2 = load("week02_v2", "Week02/v2_stateless/app.py")
+    week04 = load("week04_main", "Week04/main.py")
+    at_rt = load("week06_at_rt", "Week06/at_rt.py")
+    at_rt.ACCESS_TOKEN_EXPIRE_MINUTES = 60  # the demo's 30 s would expire mid-run
+
+    v2_token = v2.create_token("admin")
+    week04_token = week04.create_access_token({"sub": "admin"})
+    at_rt_token = at_rt.create_access_token("admin", "admin")
+
+    # (label, module, cache attribute, verify call, HTTP client + request)
+    cases = [
+        ("Week02 v2", v2, "verified_tokens", lambda: v2.verify_token(v2_token),
+         lambda: v2.app.test_client(), ("/books", v2_token)),
+        ("Week04", week04, "access_tokens",
+         lambda: week04.verify_token(HTTPAuthorizationCredentials(scheme="Bearer", credentials=week04_token)),
+         lambda: TestClient(week04.app), ("/books", week04_token)),
+        ("Week06 at_rt", at_rt, "access_tokens",
+         lambda: at_rt.verify_access_token(HTTPAuthorizationCredentials(scheme="Bearer", credentials=at_rt_token)),
+         lambda: TestClient(at_rt.app), ("/me", at_rt_token)),
+    ]
+
+    print(f"{'app':<13} {'verify: no cache':>17} {'cached':>9} {'GET: no cache':>14} {'cached':>9}")
+    for label, module, attribute, verify, make_client, (path, token) in cases:
+        cache = getattr(module, attribute)
+        results = []
+        for enabled in (False, True):
+            setattr(module, attribute, TokenCache(cache._decode, max_entries=10_000 if enabled else 0))
+            results.append(per_call_us(verify, args.calls))
+        client = make_client()
+        headers = {"Authorization": f"Bearer {token}"}
+        for enabled in (False, True):
+            setattr(module, attribute, TokenCache(cache._decode, max_entries=10_000 if enabled else 0))
+            results.append(per_call_us(lambda: client.get(path, headers=headers), args.requests))
+        print(f"{label:<13} {results[0]:>14.1f} µs {results[1]:>6.1f} µs {results[2]:>11.0f} µs {results[3]:>6.0f} µs")
+
+
+if __name__ == "__main__":
+    main()
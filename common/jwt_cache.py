@@ -0,0 +1,125 @@
+"""
+Verified-token cache for JWT-protected routes (Flask and FastAPI).
+
+    access_tokens = TokenCache(lambda token: jwt.decode(token, SECRET_KEY, algorithms=["HS256"]))
+
+    def verify_token(credentials = Depends(security)):
+        try:
+            payload = access_tokens.decode(credentials.credentials)
+        except jwt.InvalidTokenError: ...
+
+    access_tokens.revoke(token)   # logout: rejected from now until its exp
+
+A client sends the same token on every request until it expires, so the
+HMAC check + base64/JSON decoding is done once per token instead of once
+per request:
+
+- keyed on a BLAKE2 digest of the token (raw tokens are not kept)
+- only successful decodes are cached; failures always re-run `decode`,
+  so expired / tampered tokens raise exactly what jwt.decode raises
+- an entry expires at the token's "exp" (or after `max_ttl` seconds,
+  whichever is sooner): past exp the next call re-runs `decode`, which
+  raises ExpiredSignatureError
+- revoke() drops the entry and denies the digest until the token's exp,
+  checked before the cache, so a cached token never outlives revocation
+- bounded LRU (JWT_CACHE_MAX_ENTRIES, default 10000; 0 disables caching)
+
+Every call returns a fresh copy of the payload, so callers may mutate it.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+import jwt
+
+
+class TokenCache:
+    def __init__(
+        self,
+        decode: Callable[[str], Dict],
+        max_entries: Optional[int] = None,
+        max_ttl: float = 300.0,
+        clock: Callable[[], float] = time.time,
+    ):
+        if max_entries is None:
+            max_entries = int(os.environ.get("JWT_CACHE_MAX_ENTRIES", "10000"))
+        self._decode = decode
+        self.max_entries = max_entries
+        self.max_ttl = max_ttl
+        self._clock = clock
+        self._entries: "OrderedDict[bytes, Tuple[Dict, float]]" = OrderedDict()
+        self._revoked: Dict[bytes, float] = {}  # digest -> until (the token's exp)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _digest(token: str) -> bytes:
+        return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+    def _expires(self, payload: Dict, now: float) -> float:
+        exp = payload.get("exp")
+        limit = now + self.max_ttl
+        return min(float(exp), limit) if isinstance(exp, (int, float)) else limit
+
+    def decode(self, token: str) -> Dict:
+        """The verified payload; raises whatever `decode` raises (jwt.InvalidTokenError subclasses)."""
+        key = self._digest(token)
+        now = self._clock()
+        if self._revoked:
+            until = self._revoked.get(key)
+            if until is not None:
+                if now < until:
+                    raise jwt.InvalidTokenError("Token has been revoked")
+                with self._lock:
+                    self._revoked.pop(key, None)
+
+        if self.max_entries > 0:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    if now < entry[1]:
+                        self._entries.move_to_end(key)
+                        self.hits += 1
+                        return dict(entry[0])
+                    del self._entries[key]
+                self.misses += 1
+
+        payload = self._decode(token)
+        if self.max_entries > 0:
+            with self._lock:
+                if key not in self._revoked:  # revoked while we were decoding
+                    self._entries[key] = (payload, self._expires(payload, now))
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+        return dict(payload)
+
+    def revoke(self, token: str, payload: Optional[Dict] = None) -> None:
+        """
+        Reject `token` from now on, cached or not, until it would have
+        expired anyway. `payload` (if already decoded) supplies its exp;
+        otherwise the token is decoded without verification to read it.
+        """
+        if payload is None:
+            try:
+                payload = jwt.decode(token, options={"verify_signature": False})
+            except jwt.InvalidTokenError:
+                return  # not a token we would ever accept
+        key = self._digest(token)
+        now = self._clock()
+        with self._lock:
+            self._entries.pop(key, None)
+            exp = payload.get("exp")
+            self._revoked[key] = float(exp) if isinstance(exp, (int, float)) else float("inf")
+            if len(self._revoked) > 2 * max(self.max_entries, 1024):
+                self._revoked = {k: until for k, until in self._revoked.items() if until > now}
+
+    def clear(self) -> None:
+        """Forget every cached verification (e.g. after rotating the signing key)."""
+        with self._lock:
+            self._entries.clear()
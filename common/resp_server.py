@@ -0,0 +1,137 @@
+"""
+Stand-in Redis-protocol server for local testing of RedisBackend.
+
+Speaks enough RESP for the response and token caches: PING, SELECT,
+GET, SET [EX s | PX ms], INCR, DEL, EXPIRE, FLUSHDB. Data lives in memory
+(one dict per db) and expires lazily on access.
+
+    python common/resp_server.py --port 6380
+    RESPONSE_CACHE_REDIS_URL=redis://127.0.0.1:6380/0 PYTHONPATH=. python Week02/v3_uniform_interface/app.py
+"""
+
+import argparse
+import socketserver
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+
+class Store:
+    def __init__(self):
+        self._dbs: Dict[int, Dict[bytes, Tuple[bytes, Optional[float]]]] = {}
+        self.lock = threading.Lock()
+
+    def db(self, index: int):
+        return self._dbs.setdefault(index, {})
+
+    def get(self, db, key):
+        entry = db.get(key)
+        if entry is None:
+            return None
+        value, expires = entry
+        if expires is not None and expires < time.monotonic():
+            del db[key]
+            return None
+        return value
+
+
+class RESPHandler(socketserver.StreamRequestHandler):
+    def _read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b"*"):
+            return line.split()  # inline command (e.g. typed into telnet)
+        args = []
+        for _ in range(int(line[1:-2])):
+            length = int(self.rfile.readline()[1:-2])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def _write(self, reply):
+        if reply is None:
+            out = b"$-1\r\n"
+        elif isinstance(reply, int):
+            out = b":%d\r\n" % reply
+        elif isinstance(reply, Exception):
+            out = b"-ERR %s\r\n" % str(reply).encode()
+        elif reply in (b"OK", b"PONG"):
+            out = b"+%s\r\n" % reply
+        else:
+            out = b"$%d\r\n%s\r\n" % (len(reply), reply)
+        self.wfile.write(out)
+
+    def handle(self):
+        store: Store = self.server.store
+        db_index = 0
+        while True:
+            args = self._read_command()
+            if args is None:
+                return
+            if not args:
+                continue
+            command = args[0].upper()
+            try:
+                with store.lock:
+                    db = store.db(db_index)
+                    if command == b"PING":
+                        reply = b"PONG"
+                    elif command == b"SELECT":
+                        db_index = int(args[1])
+                        reply = b"OK"
+                    elif command == b"GET":
+                        reply = store.get(db, args[1])
+                    elif command == b"SET":
+                        expires = None
+                        options = [a.upper() for a in args[3:]]
+                        if b"EX" in options:
+                            expires = time.monotonic() + int(args[3 + options.index(b"EX") + 1])
+                        elif b"PX" in options:
+                            expires = time.monotonic() + int(args[3 + options.index(b"PX") + 1]) / 1000
+                        db[args[1]] = (args[2], expires)
+                        reply = b"OK"
+                    elif command == b"INCR":
+                        value = int(store.get(db, args[1]) or 0) + 1
+                        expires = db[args[1]][1] if args[1] in db else None
+                        db[args[1]] = (str(value).encode(), expires)
+                        reply = value
+                    elif command == b"DEL":
+                        reply = sum(1 for key in args[1:] if db.pop(key, None) is not None)
+                    elif command == b"EXPIRE":
+                        value = store.get(db, args[1])
+                        if value is None:
+                            reply = 0
+                        else:
+                            db[args[1]] = (value, time.monotonic() + int(args[2]))
+                            reply = 1
+                    elif command == b"FLUSHDB":
+                        db.clear()
+                        reply = b"OK"
+                    else:
+                        reply = ValueError(f"unknown command '{command.decode()}'")
+            except (IndexError, ValueError) as e:
+                reply = e
+            self._write(reply)
+
+
+class RESPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address):
+        super().__init__(address, RESPHandler)
+        self.store = Store()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6380)
+    args = parser.parse_args()
+    with RESPServer((args.host, args.port)) as server:
+        print(f"RESP stand-in listening on {args.host}:{args.port}")
+        server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
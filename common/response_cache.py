@@ -0,0 +1,399 @@
+"""
+Server-side response cache for GET endpoints (Flask and FastAPI).
+
+    response_cache = ResponseCache("week02-v3:books")
+
+    @app.route('/api/books')
+    @response_cache.flask()
+    def get_books(): ...
+
+    @app.get("/api/v1/books")
+    @response_cache.fastapi(version="v1")
+    def list_books_v1(q: Optional[str] = None): ...
+
+    response_cache.invalidate()   # after every write
+
+Entries are keyed on namespace + generation + API version + route path +
+normalised query string (+ an optional `vary_on(request)` scope, e.g. the
+authenticated user; returning None bypasses the cache). Only 200
+responses are stored, with their headers, so ETag / Last-Modified /
+X-Next-Cursor survive a hit.
+
+Invalidation bumps the namespace generation instead of deleting keys:
+every existing entry becomes unreachable at once and ages out through
+the LRU bound or its TTL. If the bump fails (shared backend down), the
+process bypasses the cache for one TTL, until every entry that may be
+stale has expired, instead of serving them.
+
+FastAPI: the wrapper always returns a Response (cached bytes on a hit,
+the encoded result on a miss), so FastAPI never applies a route's
+`response_model` to it. Decorated routes declare their schema for the
+docs with `responses={200: {"model": ...}}` instead, and return data
+already in that shape.
+
+Backends:
+- LRUBackend: in-process, TTL + entry count + byte size bounds
+- RedisBackend: any Redis-protocol server (see resp_server.py for a
+  stand-in). Shared by all workers, so an invalidation in one process
+  is seen by the others.
+
+`make_backend()` picks one from the environment: RESPONSE_CACHE_REDIS_URL
+(redis://host:port/db) selects Redis, otherwise the LRU is sized by
+RESPONSE_CACHE_MAX_ENTRIES / RESPONSE_CACHE_MAX_BYTES.
+"""
+
+import functools
+import inspect
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Iterable, List, Optional, Tuple
+from urllib.parse import urlencode, urlparse
+
+logger = logging.getLogger(__name__)
+
+# headers that must not be replayed from a cached entry
+_SKIP_HEADERS = {"content-length", "set-cookie", "date", "server", "x-cache"}
+
+
+class LRUBackend:
+    """Thread-safe in-process LRU with per-entry TTL."""
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._counters = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                self._discard(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._bytes += len(value)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._discard(oldest)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            value = self._counters.get(key, 0) + 1
+            self._counters[key] = value
+            return value
+
+    def get_counter(self, key: str) -> int:
+        return self._counters.get(key, 0)
+
+    def _discard(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry[1])
+
+
+class RedisError(Exception):
+    """Error reply from a Redis-protocol server."""
+
+
+class RedisBackend:
+    """
+    Minimal RESP client (GET / SET EX / INCR), one connection per thread.
+
+    A failing server degrades to cache misses: reads return None and
+    writes are dropped, so requests still reach the origin. A failed
+    INCR raises, since that invalidation is lost.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 6379, db: int = 0, timeout: float = 0.5):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.timeout = timeout
+        self._local = threading.local()
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisBackend":
+        parsed = urlparse(url)
+        db = int(parsed.path.lstrip("/") or 0)
+        return cls(parsed.hostname or "127.0.0.1", parsed.port or 6379, db)
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            conn = self._local.conn = (sock, sock.makefile("rb"))
+            if self.db:
+                self._call(conn, "SELECT", self.db)
+        return conn
+
+    def _close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        self._local.conn = None
+        if conn is not None:
+            conn[1].close()
+            conn[0].close()
+
+    @staticmethod
+    def _encode(args) -> bytes:
+        out = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            if not isinstance(arg, bytes):
+                arg = str(arg).encode()
+            out.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+        return b"".join(out)
+
+    def _read_reply(self, reader):
+        line = reader.readline()
+        if not line:
+            raise ConnectionError("connection closed by server")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"+":
+            return payload
+        if kind == b"-":
+            raise RedisError(payload.decode())
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            length = int(payload)
+            if length < 0:
+                return None
+            data = reader.read(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            length = int(payload)
+            return None if length < 0 else [self._read_reply(reader) for _ in range(length)]
+        raise ConnectionError(f"unexpected reply {line!r}")
+
+    def _call(self, conn, *args):
+        sock, reader = conn
+        sock.sendall(self._encode(args))
+        return self._read_reply(reader)
+
+    def execute(self, *args):
+        try:
+            return self._call(self._connection(), *args)
+        except (OSError, ConnectionError):
+            # reconnect once: the server may have closed an idle connection
+            self._close()
+            return self._call(self._connection(), *args)
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            return self.execute("GET", key)
+        except (OSError, ConnectionError, RedisError) as e:
+            logger.warning("response cache GET failed: %s", e)
+            self._close()
+            return None
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        try:
+            self.execute("SET", key, value, "PX", max(1, int(ttl * 1000)))
+        except (OSError, ConnectionError, RedisError) as e:
+            logger.warning("response cache SET failed: %s", e)
+            self._close()
+
+    def incr(self, key: str) -> int:
+        """Raises on failure: a lost invalidation must not go unnoticed (see ResponseCache.invalidate)."""
+        try:
+            return self.execute("INCR", key)
+        except (OSError, ConnectionError, RedisError):
+            self._close()
+            raise
+
+    def get_counter(self, key: str) -> int:
+        value = self.get(key)
+        return int(value) if value else 0
+
+
+def make_backend():
+    url = os.environ.get("RESPONSE_CACHE_REDIS_URL")
+    if url:
+        return RedisBackend.from_url(url)
+    return LRUBackend(
+        max_entries=int(os.environ.get("RESPONSE_CACHE_MAX_ENTRIES", "1024")),
+        max_bytes=int(os.environ.get("RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+    )
+
+
+def normalise_query(items: Iterable[Tuple[str, str]]) -> str:
+    """Sorted, blank-free query string: ?b=2&a=1&c= and ?a=1&b=2 share an entry."""
+    return urlencode(sorted((k, v) for k, v in items if v != ""))
+
+
+def _pack(status: int, headers: List[Tuple[str, str]], body: bytes) -> bytes:
+    meta = json.dumps([status, headers]).encode()
+    return meta + b"\n" + body
+
+
+def _unpack(value: bytes) -> Tuple[int, List[Tuple[str, str]], bytes]:
+    meta, body = value.split(b"\n", 1)
+    status, headers = json.loads(meta)
+    return status, headers, body
+
+
+class ResponseCache:
+    def __init__(self, namespace: str, backend=None, ttl: float = None):
+        self.namespace = namespace
+        self.backend = backend if backend is not None else make_backend()
+        self.ttl = ttl if ttl is not None else float(os.environ.get("RESPONSE_CACHE_TTL", "300"))
+        self._generation_key = f"{namespace}:generation"
+        self._bypass_until = 0.0  # monotonic time; set when an invalidation failed
+
+    def invalidate(self) -> None:
+        """Drop every entry of this namespace (call after each write)."""
+        try:
+            self.backend.incr(self._generation_key)
+        except (OSError, ConnectionError, RedisError) as e:
+            # the old generation's entries stay reachable until their TTL:
+            # serve from the origin until then
+            logger.error("response cache invalidation failed, bypassing the cache for %.0f s: %s", self.ttl, e)
+            self._bypass_until = time.monotonic() + self.ttl
+
+    def bypassed(self) -> bool:
+        """True while entries may be stale after a failed invalidation."""
+        return self._bypass_until > time.monotonic()
+
+    def key(self, version: str, path: str, query: str, scope: str = "") -> str:
+        generation = self.backend.get_counter(self._generation_key)
+        return f"{self.namespace}:{generation}:{version}:{path}?{query}#{scope}"
+
+    def _store(self, key: str, status: int, headers, body: bytes) -> None:
+        kept = [(k, v) for k, v in headers if k.lower() not in _SKIP_HEADERS]
+        self.backend.set(key, _pack(status, kept, body), self.ttl)
+
+    # --- Flask ----------------------------------------------------------
+
+    def flask(self, version: str = "", vary_on: Optional[Callable] = None):
+        from flask import current_app, make_response, request
+
+        def decorator(view):
+            @functools.wraps(view)
+            def wrapper(*args, **kwargs):
+                scope = vary_on(request) if vary_on else ""
+                if request.method != "GET" or scope is None or self.bypassed():
+                    return view(*args, **kwargs)
+                key = self.key(version, request.path, normalise_query(request.args.items(multi=True)), scope)
+                cached = self.backend.get(key)
+                if cached is not None:
+                    status, headers, body = _unpack(cached)
+                    response = current_app.response_class(body, status=status, headers=headers)
+                    response.headers["X-Cache"] = "HIT"
+                    return response
+
+                response = make_response(view(*args, **kwargs))
+                if response.status_code == 200 and not response.is_streamed:
+                    self._store(key, 200, response.headers.items(), response.get_data())
+                response.headers["X-Cache"] = "MISS"
+                return response
+
+            return wrapper
+
+        return decorator
+
+    # --- FastAPI --------------------------------------------------------
+
+    def fastapi(self, version: str = "", vary_on: Optional[Callable] = None):
+        """
+        Wraps a FastAPI GET endpoint. The wrapper takes the Request as an
+        extra keyword-only parameter; called directly (not as a route), it
+        is a plain pass-through to the endpoint.
+
+        Non-Response results are encoded with jsonable_encoder and the
+        route's `response_model` is not applied, on hits and misses
+        alike: register the route with `responses={200: {"model": ...}}`
+        and return objects of that model. Headers set on an injected
+        `response: Response` are kept.
+        """
+        from fastapi.encoders import jsonable_encoder
+        from starlette.concurrency import run_in_threadpool
+        from starlette.requests import Request
+        from starlette.responses import JSONResponse, Response, StreamingResponse
+
+        request_param = "_cache_request"
+
+        def decorator(endpoint):
+            is_async = inspect.iscoroutinefunction(endpoint)
+
+            def lookup(request: Request):
+                scope = vary_on(request) if vary_on else ""
+                if scope is None or self.bypassed():
+                    return None, None
+                key = self.key(version, request.url.path, normalise_query(request.query_params.multi_items()), scope)
+                cached = self.backend.get(key)
+                if cached is None:
+                    return key, None
+                status, headers, body = _unpack(cached)
+                response = Response(body, status_code=status, headers=dict(headers))
+                response.headers["X-Cache"] = "HIT"
+                return key, response
+
+            def to_response(key: Optional[str], result, kwargs) -> Response:
+                if key is None or isinstance(result, StreamingResponse):
+                    return result
+                if isinstance(result, Response):
+                    response = result
+                else:
+                    response = JSONResponse(jsonable_encoder(result))
+                    for value in kwargs.values():
+                        # headers the endpoint set on its injected Response
+                        if isinstance(value, Response):
+                            for name, header in value.headers.items():
+                                if name.lower() not in _SKIP_HEADERS:
+                                    response.headers[name] = header
+                if response.status_code == 200:
+                    self._store(key, 200, response.headers.items(), response.body)
+                response.headers["X-Cache"] = "MISS"
+                return response
+
+            if is_async:
+                @functools.wraps(endpoint)
+                async def wrapper(*args, **kwargs):
+                    request = kwargs.pop(request_param, None)
+                    if request is None:
+                        return await endpoint(*args, **kwargs)
+                    key, hit = await run_in_threadpool(lookup, request)
+                    if hit is not None:
+                        return hit
+                    result = await endpoint(*args, **kwargs)
+                    return await run_in_threadpool(to_response, key, result, kwargs)
+            else:
+                @functools.wraps(endpoint)
+                def wrapper(*args, **kwargs):
+                    request = kwargs.pop(request_param, None)
+                    if request is None:
+                        return endpoint(*args, **kwargs)
+                    key, hit = lookup(request)
+                    if hit is not None:
+                        return hit
+                    return to_response(key, endpoint(*args, **kwargs), kwargs)
+
+            signature = inspect.signature(endpoint)
+            wrapper.__signature__ = signature.replace(parameters=[
+                *signature.parameters.values(),
+                inspect.Parameter(request_param, inspect.Parameter.KEYWORD_ONLY, annotation=Request),
+            ])
+            return wrapper
+
+        return decorator
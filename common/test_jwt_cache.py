@@ -0,0 +1,79 @@
+import time
+
+import jwt
+import pytest
+
+from common.jwt_cache import TokenCache
+
+SECRET = "test-secret-" + "x" * 21  # 32 bytes: no short-key warning
+
+
+def _token(**claims):
+    return jwt.encode({"sub": "ann", "exp": int(time.time()) + 3600, **claims}, SECRET, algorithm="HS256")
+
+
+@pytest.fixture
+def clock():
+    return [time.time()]
+
+
+@pytest.fixture
+def decodes():
+    return []
+
+
+@pytest.fixture
+def cache(clock, decodes):
+    def decode(token):
+        decodes.append(token)
+        return jwt.decode(token, SECRET, algorithms=["HS256"])
+
+    return TokenCache(decode, max_entries=2, clock=lambda: clock[0])
+
+
+def test_a_token_is_verified_once(cache, decodes):
+    token = _token()
+    first = cache.decode(token)
+    first["sub"] = "mutated"  # callers get copies
+    assert cache.decode(token)["sub"] == "ann"
+    assert len(decodes) == 1 and (cache.hits, cache.misses) == (1, 1)
+
+
+def test_failures_are_not_cached(cache, decodes):
+    bad = jwt.encode({"sub": "ann"}, SECRET[::-1], algorithm="HS256")
+    for _ in range(2):
+        with pytest.raises(jwt.InvalidSignatureError):
+            cache.decode(bad)
+    assert len(decodes) == 2
+
+
+def test_entries_expire_at_the_token_exp(cache, clock, decodes):
+    token = _token(exp=int(clock[0]) + 10)
+    cache.decode(token)
+    clock[0] += 11
+    cache.decode(token)  # re-verified (jwt itself still accepts it: real time has not moved)
+    assert len(decodes) == 2
+
+
+def test_revoked_tokens_are_rejected_even_when_cached(cache, clock):
+    token = _token(exp=int(clock[0]) + 10)
+    cache.decode(token)
+    cache.revoke(token)
+    with pytest.raises(jwt.InvalidTokenError, match="revoked"):
+        cache.decode(token)
+    clock[0] += 11  # past its exp the denial is dropped; jwt.decode decides again
+    assert cache.decode(token)["sub"] == "ann"
+
+
+def test_lru_bound(cache, decodes):
+    a, b, c = _token(n=1), _token(n=2), _token(n=3)
+    for token in (a, b, a, c, a, b):
+        cache.decode(token)
+    assert decodes == [a, b, c, b]
+
+
+def test_zero_entries_disables_caching(decodes):
+    cache = TokenCache(lambda token: decodes.append(token) or {"sub": "x"}, max_entries=0)
+    cache.decode("t")
+    cache.decode("t")
+    assert decodes == ["t", "t"]
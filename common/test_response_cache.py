@@ -0,0 +1,166 @@
+import threading
+from typing import Optional
+
+import pytest
+
+from common import response_cache as rc
+from common.resp_server import RESPServer
+from common.response_cache import LRUBackend, RedisBackend, ResponseCache, normalise_query
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(rc.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_lru_expires_entries_after_their_ttl(clock):
+    lru = LRUBackend()
+    lru.set("a", b"1", ttl=10)
+    clock[0] += 9
+    assert lru.get("a") == b"1"
+    clock[0] += 2
+    assert lru.get("a") is None
+    assert len(lru) == 0
+
+
+def test_lru_evicts_least_recently_used_within_both_bounds():
+    lru = LRUBackend(max_entries=2, max_bytes=10)
+    lru.set("a", b"1", 60)
+    lru.set("b", b"2", 60)
+    lru.get("a")
+    lru.set("c", b"3", 60)
+    assert (lru.get("a"), lru.get("b"), lru.get("c")) == (b"1", None, b"3")
+    lru.set("big", b"x" * 10, 60)
+    assert (lru.get("a"), lru.get("c"), lru.get("big")) == (None, None, b"x" * 10)
+    lru.set("huge", b"x" * 11, 60)  # larger than the whole cache: not stored
+    assert lru.get("huge") is None and lru.get("big") is not None
+
+
+def test_query_order_and_blank_values_do_not_split_entries():
+    assert normalise_query([("b", "2"), ("a", "1"), ("c", "")]) == normalise_query([("a", "1"), ("b", "2")])
+
+
+@pytest.fixture
+def flask_app():
+    from flask import Flask, jsonify
+
+    app = Flask(__name__)
+    cache = ResponseCache("test", backend=LRUBackend(), ttl=60)
+    calls = []
+
+    def user(request) -> Optional[str]:
+        return request.headers.get("X-User")
+
+    @app.route("/items")
+    @cache.flask()
+    def items():
+        calls.append("items")
+        response = jsonify(len(calls))
+        response.headers["ETag"] = '"v1"'
+        return response
+
+    @app.route("/mine")
+    @cache.flask(vary_on=user)
+    def mine():
+        calls.append("mine")
+        return jsonify(len(calls))
+
+    @app.route("/missing")
+    @cache.flask()
+    def missing():
+        calls.append("missing")
+        return jsonify(error="not found"), 404
+
+    return app.test_client(), cache, calls
+
+
+def test_flask_hits_replay_body_and_headers_until_invalidated(flask_app):
+    client, cache, calls = flask_app
+    miss = client.get("/items?b=2&a=1")
+    hit = client.get("/items?a=1&b=2")
+    assert (miss.headers["X-Cache"], hit.headers["X-Cache"]) == ("MISS", "HIT")
+    assert (hit.json, hit.headers["ETag"]) == (miss.json, '"v1"')
+    cache.invalidate()
+    assert client.get("/items?a=1&b=2").headers["X-Cache"] == "MISS"
+    assert calls == ["items", "items"]
+
+
+def test_flask_vary_on_scopes_entries_and_none_bypasses(flask_app):
+    client, _, calls = flask_app
+    client.get("/mine", headers={"X-User": "ann"})
+    assert client.get("/mine", headers={"X-User": "ann"}).headers["X-Cache"] == "HIT"
+    assert client.get("/mine", headers={"X-User": "bob"}).headers["X-Cache"] == "MISS"
+    client.get("/mine")
+    client.get("/mine")
+    assert calls.count("mine") == 4
+
+
+def test_flask_only_200s_are_stored(flask_app):
+    client, _, calls = flask_app
+    client.get("/missing")
+    client.get("/missing")
+    assert calls == ["missing", "missing"]
+
+
+def test_fastapi_hits_keep_headers_set_on_the_injected_response():
+    from fastapi import FastAPI, Response
+    from fastapi.testclient import TestClient
+
+    app = FastAPI()
+    cache = ResponseCache("test", backend=LRUBackend(), ttl=60)
+    calls = []
+
+    @app.get("/items")
+    @cache.fastapi(version="v1")
+    def items(response: Response, q: Optional[str] = None):
+        calls.append(q)
+        response.headers["X-Next-Cursor"] = "abc"
+        return {"q": q}
+
+    client = TestClient(app)
+    miss, hit = client.get("/items?q=x"), client.get("/items?q=x")
+    assert (miss.headers["X-Cache"], hit.headers["X-Cache"]) == ("MISS", "HIT")
+    assert hit.json() == {"q": "x"} and hit.headers["X-Next-Cursor"] == "abc"
+    assert calls == ["x"]
+    assert items(Response(), q="direct") == {"q": "direct"}  # plain call: pass-through
+
+
+@pytest.fixture
+def resp_server():
+    server = RESPServer(("127.0.0.1", 0))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+
+def test_redis_backend_shares_generations_between_caches(resp_server):
+    first = ResponseCache("shared", backend=RedisBackend(port=resp_server, db=1), ttl=60)
+    second = ResponseCache("shared", backend=RedisBackend(port=resp_server, db=1), ttl=60)
+    key = first.key("v1", "/items", "")
+    first.backend.set(key, b"cached", 60)
+    assert second.backend.get(second.key("v1", "/items", "")) == b"cached"
+    second.invalidate()  # another worker's write
+    assert first.key("v1", "/items", "") != key
+
+
+def test_failed_invalidation_bypasses_the_cache_for_one_ttl(resp_server, clock):
+    cache = ResponseCache("down", backend=RedisBackend(port=resp_server), ttl=60)
+    cache.backend.port = _closed_port()
+    cache.backend._close()
+    assert cache.backend.get("anything") is None  # reads degrade to misses
+    cache.invalidate()
+    assert cache.bypassed()
+    clock[0] += 61
+    assert not cache.bypassed()
+
+
+def _closed_port() -> int:
+    import socket
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
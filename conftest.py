@@ -0,0 +1,16 @@
+"""
+pytest setup for the whole repo: `python -m pytest -q` from this folder.
+
+Test files sit next to the module they cover and import it by its plain
+name, the way the apps run from their own folder. pytest puts each test
+file's folder on sys.path; this folder goes there too, the equivalent of
+the apps' PYTHONPATH=<repo root>, so `common` and `Week02.store` import.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# a load-testing script (starts servers), not a test module
+collect_ignore = ["Week06/oauth/load_test.py"]